@@ -49,23 +49,36 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
+    'django_filters',
 
     # Local apps
     'core',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.AsyncStreamingMiddleware',  # ASGI only, must stay first
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # For static files in production
+    'core.middleware.QueryInstrumentationMiddleware',  # Server-Timing and slow request log
+    'core.middleware.StaticFilesMiddleware',  # WhiteNoise, async-capable for ASGI
     'corsheaders.middleware.CorsMiddleware',  # Must be before CommonMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaPinMiddleware',  # Read-your-writes with DATABASE_REPLICA_URLS
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request SQL instrumentation (core.middleware): adds Server-Timing headers and runs
+# EXPLAIN on slow requests, so it follows DEBUG and production has to opt in
+SQL_INSTRUMENTATION = os.getenv('SQL_INSTRUMENTATION', str(DEBUG)) == 'True'
+SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '500'))
+REQUEST_QUERY_BUDGET = int(os.getenv('REQUEST_QUERY_BUDGET', '50'))
+
+# Background jobs (core.jobs): seconds before a RUNNING job of a dead worker is picked up again
+JOB_LOCK_TIMEOUT = int(os.getenv('JOB_LOCK_TIMEOUT', '1800'))
+
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
 
@@ -100,6 +113,58 @@ DATABASES = {
     )
 }
 
+# Read replicas (core.replicas)
+# Comma-separated URLs, added as replica_0, replica_1, ... List actions and
+# read-only viewsets read from them; users stay on the primary for
+# REPLICA_PIN_SECONDS after they write. Tests run them as mirrors of default.
+
+DATABASE_REPLICAS = []
+for index, url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **dj_database_url.parse(url.strip(), conn_max_age=600, conn_health_checks=True),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '15'))
+
+# Cache
+# Shared by every worker when REDIS_URL is set, or by the workers of one node
+# through files in CACHE_DIR; per-process memory otherwise. Invalidation bumps
+# version keys, so with several gunicorn workers use one of the shared options.
+
+REDIS_URL = os.getenv('REDIS_URL')
+CACHE_DIR = os.getenv('CACHE_DIR')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif CACHE_DIR:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIR,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Membership roles, token claims, blacklist answers and replica pins are only
+# correct if every worker sees the same invalidations. Without a shared cache
+# they are read from the database on every request instead.
+CACHE_IS_SHARED = bool(REDIS_URL or CACHE_DIR)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -146,11 +211,14 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_FILTER_BACKENDS': [
+        'django_filters.rest_framework.DjangoFilterBackend',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
@@ -163,6 +231,7 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_REFRESH_SERIALIZER': 'core.authentication.ClaimsTokenRefreshSerializer',
 }
 
 # CORS Settings
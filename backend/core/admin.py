@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import (
     Company, User, Project, ProjectMembership,
     AppraisalCycle, Appraisal, AppraisalReview,
-    CompetencyRating, OverallEvaluation
+    CompetencyRating, OverallEvaluation, SignatureBlob, Job
 )
 
 
@@ -64,7 +64,7 @@ class AppraisalReviewAdmin(admin.ModelAdmin):
     list_display = ['appraisal', 'reviewer', 'is_completed', 'reviewer_signed_at']
     list_filter = ['is_completed', 'reviewer_signed_at']
     search_fields = ['appraisal__appraisee__username', 'reviewer__username']
-    readonly_fields = ['reviewer_signature_base64']
+    readonly_fields = ['reviewer_signature', 'rating_sum', 'rating_count']
 
 
 @admin.register(CompetencyRating)
@@ -82,4 +82,23 @@ class OverallEvaluationAdmin(admin.ModelAdmin):
     ]
     list_filter = ['ready_for_advanced_work', 'ready_for_promotion', 'finalized_at']
     search_fields = ['appraisal__appraisee__username']
-    readonly_fields = ['overall_rating_avg', 'appraisee_signature_base64', 'hr_signature_base64']
+    readonly_fields = [
+        'overall_rating_avg', 'rating_sum', 'rating_count',
+        'appraisee_signature', 'hr_signature'
+    ]
+
+
+@admin.register(SignatureBlob)
+class SignatureBlobAdmin(admin.ModelAdmin):
+    list_display = ['digest', 'content_type', 'size', 'created_at']
+    search_fields = ['digest']
+    exclude = ['data']
+    readonly_fields = ['digest', 'content_type', 'size', 'created_at']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'run_after', 'locked_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['key']
+    readonly_fields = ['locked_by', 'locked_at', 'result', 'error', 'created_at', 'updated_at', 'finished_at']
@@ -0,0 +1,156 @@
+"""
+Consistency checks for the running rating totals kept on
+AppraisalReview and OverallEvaluation, and for the progress counters kept
+on Appraisal and AppraisalCycle.
+"""
+from django.db import transaction
+from django.db.models import Avg, Case, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from .models import (
+    STATUS_COUNTERS, Appraisal, AppraisalCycle, AppraisalReview, CompetencyRating, CycleReportPartition,
+    OverallEvaluation
+)
+
+
+def _review_totals():
+    """Subquery expressions computing a review's totals from its ratings"""
+    ratings = (
+        CompetencyRating.objects
+        .filter(appraisal_review=OuterRef('pk'))
+        .values('appraisal_review')
+    )
+    return {
+        'actual_sum': Coalesce(
+            Subquery(ratings.annotate(total=Sum('rating')).values('total')),
+            Value(0), output_field=IntegerField()
+        ),
+        'actual_count': Coalesce(
+            Subquery(ratings.annotate(count=Count('id')).values('count')),
+            Value(0), output_field=IntegerField()
+        ),
+    }
+
+
+def _evaluation_totals():
+    """Subquery expressions computing an evaluation's totals from completed reviews"""
+    ratings = (
+        CompetencyRating.objects
+        .filter(appraisal_review__appraisal=OuterRef('appraisal'), appraisal_review__is_completed=True)
+        .values('appraisal_review__appraisal')
+    )
+    return {
+        'actual_sum': Coalesce(
+            Subquery(ratings.annotate(total=Sum('rating')).values('total')),
+            Value(0), output_field=IntegerField()
+        ),
+        'actual_count': Coalesce(
+            Subquery(ratings.annotate(count=Count('id')).values('count')),
+            Value(0), output_field=IntegerField()
+        ),
+        'actual_avg': Subquery(ratings.annotate(avg=Avg('rating')).values('avg')),
+    }
+
+
+def drifted_reviews():
+    """Reviews whose stored totals no longer match their ratings"""
+    return AppraisalReview.objects.annotate(**_review_totals()).filter(
+        ~Q(rating_sum=F('actual_sum')) | ~Q(rating_count=F('actual_count'))
+    )
+
+
+def drifted_evaluations():
+    """Evaluations whose stored totals no longer match their completed reviews"""
+    return OverallEvaluation.objects.annotate(**_evaluation_totals()).filter(
+        ~Q(rating_sum=F('actual_sum')) | ~Q(rating_count=F('actual_count'))
+    )
+
+
+def rebuild_rating_aggregates(fix=True):
+    """
+    Compare every stored total against a from-scratch aggregation.
+    Returns the number of drifted reviews and evaluations, repairing them if fix is set.
+    """
+    review_ids = list(drifted_reviews().values_list('pk', flat=True))
+    evaluation_ids = list(drifted_evaluations().values_list('pk', flat=True))
+
+    if fix:
+        with transaction.atomic():
+            review_totals = _review_totals()
+            AppraisalReview.objects.filter(pk__in=review_ids).update(
+                rating_sum=review_totals['actual_sum'],
+                rating_count=review_totals['actual_count'],
+            )
+            evaluation_totals = _evaluation_totals()
+            OverallEvaluation.objects.filter(pk__in=evaluation_ids).update(
+                rating_sum=evaluation_totals['actual_sum'],
+                rating_count=evaluation_totals['actual_count'],
+                overall_rating_avg=evaluation_totals['actual_avg'],
+            )
+
+    return {'reviews': len(review_ids), 'evaluations': len(evaluation_ids)}
+
+
+def _count(rows, group):
+    """Subquery expression counting rows per group, 0 when there are none"""
+    return Coalesce(
+        Subquery(rows.order_by().values(group).annotate(count=Count('id')).values('count')),
+        Value(0), output_field=IntegerField()
+    )
+
+
+def drifted_appraisals():
+    """Appraisals whose review counters or status no longer match their reviews"""
+    reviews = AppraisalReview.objects.filter(appraisal=OuterRef('pk'))
+    return Appraisal.objects.annotate(
+        actual_total=_count(reviews, 'appraisal'),
+        actual_completed=_count(reviews.filter(is_completed=True), 'appraisal'),
+    ).annotate(
+        actual_status=Case(
+            When(actual_completed=0, then=Value('PENDING')),
+            When(actual_completed__gte=F('actual_total'), then=Value('COMPLETED')),
+            default=Value('IN_PROGRESS'),
+        )
+    ).filter(
+        ~Q(reviews_total=F('actual_total'))
+        | ~Q(reviews_completed=F('actual_completed'))
+        | ~Q(status=F('actual_status'))
+    )
+
+
+def drifted_cycles():
+    """Cycles whose progress counters no longer match their appraisals"""
+    appraisals = Appraisal.objects.filter(cycle=OuterRef('pk'))
+    counts = {
+        field: _count(appraisals.filter(status=status), 'cycle')
+        for status, field in STATUS_COUNTERS.items()
+    }
+    counts['appraisals_finalized'] = _count(
+        appraisals.filter(overall_evaluation__finalized_at__isnull=False), 'cycle'
+    )
+
+    drift = Q()
+    for field in counts:
+        drift |= ~Q(**{field: F(f'actual_{field}')})
+    return AppraisalCycle.objects.annotate(
+        **{f'actual_{field}': count for field, count in counts.items()}
+    ).filter(drift)
+
+
+def rebuild_progress_counters(fix=True):
+    """
+    Compare every progress counter against a from-scratch count.
+    Returns the number of drifted appraisals and cycles, repairing them if fix is set.
+    """
+    appraisal_ids = list(drifted_appraisals().values_list('pk', flat=True))
+    if not fix:
+        return {'appraisals': len(appraisal_ids), 'cycles': drifted_cycles().count()}
+
+    with transaction.atomic():
+        appraisals = Appraisal.objects.filter(pk__in=appraisal_ids)
+        Appraisal.recount_progress(appraisals)
+        CycleReportPartition.mark_stale(appraisals)
+        # The cycles count the repaired statuses
+        cycle_ids = list(drifted_cycles().values_list('pk', flat=True))
+        AppraisalCycle.recount_progress(AppraisalCycle.objects.filter(pk__in=cycle_ids))
+
+    return {'appraisals': len(appraisal_ids), 'cycles': len(cycle_ids)}
@@ -0,0 +1,142 @@
+"""
+Async views for endpoints that only read.
+
+DRF views are sync only, so under ASGI each one holds a thread for the
+whole request. Views here run on the event loop and await Django's async
+ORM, so a worker keeps serving other requests while their queries wait on
+the database. Under WSGI Django runs them in an event loop per request.
+"""
+import asyncio
+from asgiref.sync import sync_to_async
+from django.db.models import Count
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from .memberships import project_ids
+from .models import Appraisal, AppraisalCycle, AppraisalReview, User
+from .serializers import AppraisalCycleSerializer, AppraisalSerializer, PendingReviewSerializer, UserSerializer
+
+# Rows per dashboard list; the counts cover everything
+DASHBOARD_LIST_LIMIT = 20
+
+
+async def fetch(queryset):
+    """Evaluate a queryset through the async ORM"""
+    return [row async for row in queryset]
+
+
+class AsyncAPIView(View):
+    """
+    The part of APIView these endpoints need: DRF authentication and
+    permission classes, JSON responses and DRF-style error bodies.
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = [IsAuthenticated]
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        try:
+            # Authentication may read the cache or the database
+            await sync_to_async(self.check_permissions)(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(request, exc)
+
+    def check_permissions(self, request):
+        for permission in [permission() for permission in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def handle_exception(self, request, exc):
+        headers = {}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # As APIView: 401 with a challenge when the scheme has one, 403 otherwise
+            authenticators = request.authenticators
+            challenge = authenticators[0].authenticate_header(request) if authenticators else None
+            if challenge:
+                headers['WWW-Authenticate'] = challenge
+            else:
+                exc.status_code = 403
+        detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        return self.respond(detail, status=exc.status_code, headers=headers)
+
+    def respond(self, data, status=200, headers=None):
+        """data rendered the way DRF's JSONRenderer renders it"""
+        return HttpResponse(
+            JSONRenderer().render(data), status=status, headers=headers,
+            content_type='application/json',
+        )
+
+
+class MeView(AsyncAPIView):
+    """Current user, replacing the sync AuthViewSet.me action"""
+
+    async def get(self, request):
+        # request.user is built from token claims; the profile needs the full row
+        user = await User.objects.aget(pk=request.user.pk)
+        return self.respond(UserSerializer(user, context={'request': request, 'view': self}).data)
+
+
+class DashboardView(AsyncAPIView):
+    """
+    Everything the dashboard shows in one response: the user, active
+    cycles, the user's unfinished reviews, their own appraisals, and
+    appraisal counts by status across the active cycles of their projects.
+
+    A fixed set of queries that do not depend on each other, awaited
+    together, so the cost does not grow with the user's workload.
+    """
+
+    async def get(self, request):
+        user = request.user
+        memberships = await sync_to_async(project_ids)(request)
+
+        def visible(queryset, project='project'):
+            # Same rule as the viewsets: staff see everything, others their projects
+            return queryset if user.is_staff else queryset.filter(**{f'{project}__in': memberships})
+
+        cycles = AppraisalCycle.objects.filter(status='ACTIVE').select_related('company')
+        if not user.is_staff:
+            cycles = cycles.filter(company_id=user.company_id)
+        pending_reviews = visible(
+            AppraisalReview.objects.filter(
+                reviewer_id=user.pk, is_completed=False, appraisal__cycle__status='ACTIVE'
+            ),
+            project='appraisal__project',
+        )
+        own_appraisals = visible(Appraisal.objects.filter(appraisee_id=user.pk))
+        active_appraisals = visible(Appraisal.objects.filter(cycle__status='ACTIVE'))
+
+        profile, active_cycles, reviews, pending_count, appraisals, status_counts = await asyncio.gather(
+            User.objects.aget(pk=user.pk),
+            fetch(cycles),
+            fetch(
+                pending_reviews.select_related('appraisal__appraisee', 'appraisal__project', 'appraisal__cycle')
+                .order_by('appraisal__cycle__period_end', 'appraisal__appraisee__last_name', 'pk')
+                [:DASHBOARD_LIST_LIMIT]
+            ),
+            pending_reviews.acount(),
+            fetch(own_appraisals.select_related('cycle', 'appraisee', 'project')[:DASHBOARD_LIST_LIMIT]),
+            fetch(active_appraisals.order_by().values_list('status').annotate(count=Count('pk'))),
+        )
+
+        by_status = dict.fromkeys([status for status, _ in Appraisal.STATUS_CHOICES], 0)
+        by_status.update(status_counts)
+        # No request in the context: ?fields= and ?expand= shape the endpoints these mirror, not this one
+        return self.respond({
+            'user': UserSerializer(profile).data,
+            'active_cycles': AppraisalCycleSerializer(active_cycles, many=True).data,
+            'pending_reviews': PendingReviewSerializer(reviews, many=True).data,
+            'my_appraisals': AppraisalSerializer(appraisals, many=True).data,
+            'counts': {
+                'projects': len(memberships),
+                'pending_reviews': pending_count,
+                'appraisals': by_status,
+            },
+        })
@@ -0,0 +1,158 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from .caching import bump_version, get_versions, versioned_key
+from .memberships import membership_namespace
+from .models import User
+
+# Only read when token claims are stale, and re-keyed on every user change
+USER_SNAPSHOT_TIMEOUT = 5 * 60
+
+CLAIM_FIELDS = ('company_id', 'is_staff')
+
+
+def user_namespace(user_id):
+    return f'users:{user_id}'
+
+
+def invalidate_user_claims(user_id):
+    """Mark claims in already-issued tokens as stale after the user row changed"""
+    bump_version(user_namespace(user_id))
+
+
+def load_user_snapshot(user_id, version):
+    """Claim fields plus is_active for a user, cached for the current user version"""
+    key = versioned_key(user_namespace(user_id), 'snapshot', version=version)
+    snapshot = cache.get(key) if settings.CACHE_IS_SHARED else None
+    if snapshot is None:
+        snapshot = User.objects.filter(pk=user_id).values(*CLAIM_FIELDS, 'is_active').first()
+        if snapshot is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if settings.CACHE_IS_SHARED:
+            cache.set(key, snapshot, USER_SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def blacklist_key(jti):
+    return f'blacklist:{jti}'
+
+
+def remember_blacklist_state(jti, expires_at, blacklisted):
+    """Cache whether a token is blacklisted until the token would expire anyway"""
+    timeout = int((expires_at - timezone.now()).total_seconds())
+    if timeout > 0 and settings.CACHE_IS_SHARED:
+        cache.set(blacklist_key(jti), blacklisted, timeout)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token carrying the claims ClaimsJWTAuthentication builds its user from"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_claims(user)
+        return token
+
+    def set_claims(self, user):
+        for field in CLAIM_FIELDS:
+            self[field] = getattr(user, field)
+        [self['user_version']] = get_versions(user_namespace(user.pk))
+
+    def check_blacklist(self):
+        """Answer from the cache; BlacklistedToken saves overwrite the cached answer"""
+        jti = self.payload[api_settings.JTI_CLAIM]
+        blacklisted = cache.get(blacklist_key(jti)) if settings.CACHE_IS_SHARED else None
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            remember_blacklist_state(jti, datetime_from_epoch(self.payload['exp']), blacklisted)
+        if blacklisted:
+            raise TokenError(_('Token is blacklisted'))
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token refresh with cached blacklist checks.
+
+    The user row is read on refresh anyway, so the new tokens also get
+    fresh claims.
+    """
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user = User.objects.filter(pk=refresh.payload.get(api_settings.USER_ID_CLAIM)).first()
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'],
+                'no_active_account',
+            )
+        refresh.set_claims(user)
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+class ClaimsUser(TokenUser):
+    """Request user backed by token claims instead of a User row"""
+
+    def __init__(self, token, claims, membership_version):
+        super().__init__(token)
+        self.company_id = claims['company_id']
+        self.is_staff = claims['is_staff']
+        self.membership_version = membership_version
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that skips the per-request User query.
+
+    The user is built from the token's claims while their user_version is
+    current. Once the User row has changed, the claims are replaced by a
+    short-lived cached snapshot until the client gets a fresh token. Views
+    must use user.id and user.company_id rather than model relations.
+
+    Without CACHE_IS_SHARED a change made through another worker would not
+    bump the version this one sees, so the claims are never trusted and the
+    user row is read on every request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        # Read alongside the user version so the membership lookup skips its own round trip
+        user_version, membership_version = get_versions(
+            user_namespace(user_id), membership_namespace(user_id)
+        )
+
+        if settings.CACHE_IS_SHARED and validated_token.get('user_version') == user_version:
+            claims = validated_token
+        else:
+            claims = load_user_snapshot(user_id, user_version)
+            if api_settings.CHECK_USER_IS_ACTIVE and not claims['is_active']:
+                raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        return ClaimsUser(validated_token, claims, membership_version)
@@ -0,0 +1,113 @@
+import hashlib
+import time
+from functools import wraps
+from django.core.cache import cache
+from rest_framework.response import Response
+
+
+def version_key(name):
+    return f'version:{name}'
+
+
+def get_version(name):
+    """
+    Current version of a cached namespace.
+
+    A missing version is started at the current time rather than at zero, so
+    an evicted counter can never fall back to a value older entries were
+    stored under.
+    """
+    key = version_key(name)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_versions(*names):
+    """Versions of several namespaces in one cache round trip"""
+    keys = [version_key(name) for name in names]
+    found = cache.get_many(keys)
+    return [
+        found[key] if key in found else get_version(name)
+        for key, name in zip(keys, names)
+    ]
+
+
+def bump_version(name):
+    """Orphan every entry stored under the namespace's previous version"""
+    cache.set(version_key(name), time.time_ns(), timeout=None)
+
+
+def versioned_key(name, *parts, version=None):
+    if version is None:
+        version = get_version(name)
+    return ':'.join([name, str(version), *map(str, parts)])
+
+
+def reference_namespace(company_id=None):
+    """Version namespace of one company's reference data, or of all companies' with None"""
+    return 'reference' if company_id is None else f'reference:{company_id}'
+
+
+def invalidate_reference_data(*company_ids):
+    """Orphan cached reference responses of the companies and every cross-company one"""
+    bump_version(reference_namespace())
+    for company_id in set(company_ids) - {None}:
+        bump_version(reference_namespace(company_id))
+
+
+def cached_response(handler):
+    """Serve a GET handler's 200 responses from the cache; see CachedResponseMixin"""
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        key = self.response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = handler(self, request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.response_cache_timeout)
+        return response
+    return wrapper
+
+
+class CachedResponseMixin:
+    """
+    Cache list and retrieve responses of read-mostly reference data.
+
+    Keys hold the requester's scope (staff, or their company, which is all
+    the querysets filter on) and the full path, under the version of the
+    company the response is limited to, or the cross-company version when it
+    may include several. Model signals bump both on writes. Decorate extra
+    GET actions with @cached_response.
+
+    These viewsets read the primary even with replicas configured: a miss
+    just after a write would otherwise store a lagging replica's rows under
+    the new version for the whole timeout.
+    """
+    response_cache_timeout = 600
+
+    def response_cache_company(self, request):
+        """Company the response is limited to, or None when it may span companies"""
+        return None
+
+    def response_cache_key(self, request):
+        user = request.user
+        scope = 'staff' if user.is_staff else f'company{user.company_id}'
+        path = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False).hexdigest()
+        return versioned_key(
+            reference_namespace(self.response_cache_company(request)),
+            type(self).__name__, self.action, scope, path
+        )
+
+    @cached_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
@@ -0,0 +1,71 @@
+"""
+Conditional GET for detail views of nested resources.
+
+The validator is the newest updated_at across everything the response
+contains, computed as an annotation on the same query that loads the
+object. Prefetches for the nested rows run only when the client's copy is
+out of date, so a 304 costs one query plus the permission checks.
+"""
+import hashlib
+from django.db.models import F, Subquery, prefetch_related_objects
+from django.db.models.functions import Coalesce, Greatest
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def newest(queryset):
+    """Subquery for the latest updated_at among queryset's rows"""
+    return Subquery(queryset.order_by('-updated_at').values('updated_at')[:1])
+
+
+def latest(*expressions):
+    """Greatest of the object's own updated_at and the expressions, ignoring missing rows"""
+    if not expressions:
+        return F('updated_at')
+    # Coalesce because Greatest is NULL on SQLite as soon as any argument is
+    return Greatest(F('updated_at'), *[Coalesce(expression, F('updated_at')) for expression in expressions])
+
+
+class ConditionalRetrieveMixin:
+    """
+    retrieve() with ETag and Last-Modified validators and 304 responses.
+
+    Views define tree_updated_at() returning an expression for the newest
+    updated_at in the serialized tree; see latest() and newest().
+    """
+
+    def tree_updated_at(self):
+        raise NotImplementedError
+
+    def get_conditional_object(self):
+        """get_object() with the tree stamp annotated and the prefetches left for later"""
+        queryset = self.filter_queryset(self.get_queryset())
+        prefetches = queryset._prefetch_related_lookups
+        queryset = queryset.prefetch_related(None).annotate(tree_updated_at=self.tree_updated_at())
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(self.request, instance)
+        return instance, prefetches
+
+    def retrieve(self, request, *args, **kwargs):
+        instance, prefetches = self.get_conditional_object()
+        updated_at = instance.tree_updated_at
+
+        # ?fields= and ?expand= change the body, so they are part of the entity tag
+        variant = hashlib.md5(request.get_full_path().encode(), usedforsecurity=False).hexdigest()[:12]
+        etag = quote_etag(f'{instance.pk}-{updated_at.timestamp():.6f}-{variant}')
+        last_modified = int(updated_at.timestamp())
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            prefetch_related_objects([instance], *prefetches)
+            response = Response(self.get_serializer(instance).data)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Validate on every use; the body depends on who is asking
+        response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -0,0 +1,248 @@
+"""
+Printable PDF appraisal forms, rendered off the request path.
+
+A rendered form is stored in AppraisalDocument together with the latest
+updated_at across the appraisal, its appraisee, reviews, ratings and overall
+evaluation at render time. GET requests serve the stored PDF while that stamp
+is still current; POST requests queue a render job for the background worker,
+which GET then reports on until the fresh form is stored.
+"""
+import tempfile
+import zipfile
+from io import BytesIO
+from django.db.models import Max, Prefetch
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from .jobs import PENDING, enqueue_many
+from .models import Appraisal, AppraisalDocument, AppraisalReview, CompetencyRating, Job, SignatureBlob
+
+STAMP_FIELDS = [
+    'updated_at',
+    'appraisee__updated_at',
+    'cycle__updated_at',
+    'project__updated_at',
+    'reviews__updated_at',
+    'reviews__reviewer__updated_at',
+    'reviews__competency_ratings__updated_at',
+    'overall_evaluation__updated_at',
+]
+
+SIGNATURE_SIZE = (50 * mm, 18 * mm)
+
+
+def source_stamps(appraisals):
+    """Latest updated_at of everything printed on each appraisal's form, by pk"""
+    rows = appraisals.order_by().values('pk').annotate(
+        **{f'stamp_{index}': Max(field) for index, field in enumerate(STAMP_FIELDS)}
+    )
+    stamps = {}
+    for row in rows:
+        pk = row.pop('pk')
+        stamps[pk] = max(value for value in row.values() if value is not None)
+    return stamps
+
+
+def stale_appraisal_ids(appraisals):
+    """Pks of the appraisals whose stored form is missing or out of date"""
+    stamps = source_stamps(appraisals)
+    rendered = dict(
+        AppraisalDocument.objects.filter(appraisal_id__in=stamps)
+        .values_list('appraisal_id', 'source_updated_at')
+    )
+    return [pk for pk, stamp in stamps.items() if rendered.get(pk) != stamp]
+
+
+def current_document(appraisal):
+    """The stored form if it is still current, otherwise None"""
+    stamp = source_stamps(Appraisal.objects.filter(pk=appraisal.pk))[appraisal.pk]
+    return AppraisalDocument.objects.filter(appraisal=appraisal, source_updated_at=stamp).first()
+
+
+def render_key(appraisal_id):
+    return f'render_document:{appraisal_id}'
+
+
+def queue_render(appraisal_ids, created_by_id=None):
+    """Pending render jobs for the appraisals, queuing those not queued yet"""
+    return enqueue_many(
+        'render_document',
+        {render_key(pk): {'appraisal_id': pk} for pk in appraisal_ids},
+        created_by_id=created_by_id,
+    )
+
+
+def pending_renders(appraisal_ids):
+    """Render jobs already queued or running for the appraisals, without queuing any"""
+    return list(Job.objects.filter(key__in=[render_key(pk) for pk in appraisal_ids], status__in=PENDING))
+
+
+def render_document(appraisal_id):
+    """Render and store one appraisal's form unless the stored one is current"""
+    appraisals = Appraisal.objects.filter(pk=appraisal_id)
+    stamps = source_stamps(appraisals)
+    if appraisal_id not in stamps:
+        return None
+    stamp = stamps[appraisal_id]
+
+    document = AppraisalDocument.objects.filter(appraisal_id=appraisal_id).first()
+    if document is not None and document.source_updated_at == stamp:
+        return document
+
+    appraisal = appraisals.select_related(
+        'cycle', 'project', 'appraisee', 'overall_evaluation__appraisee_signature',
+        'overall_evaluation__hr_signature',
+    ).prefetch_related(
+        Prefetch(
+            'reviews',
+            queryset=AppraisalReview.objects.select_related('reviewer', 'reviewer_signature')
+            .order_by('reviewer__last_name', 'reviewer__first_name', 'pk')
+        ),
+        Prefetch(
+            'reviews__competency_ratings',
+            queryset=CompetencyRating.objects.order_by('category', 'criterion_name')
+        ),
+    ).get()
+    data = render_pdf(appraisal)
+
+    document, _ = AppraisalDocument.objects.update_or_create(
+        appraisal_id=appraisal_id,
+        defaults={'source_updated_at': stamp, 'data': data, 'size': len(data)},
+    )
+    return document
+
+
+def render_pdf(appraisal):
+    """The appraisal form as PDF bytes"""
+    styles = getSampleStyleSheet()
+    appraisee = appraisal.appraisee
+    story = [
+        Paragraph('Employee Appraisal Form', styles['Title']),
+        field_table([
+            ('Employee', appraisee.get_full_name() or appraisee.username),
+            ('Position', appraisee.position),
+            ('Division', appraisee.division),
+            ('Project', appraisal.project.name),
+            ('Period', f'{appraisal.cycle.period_start:%d %b %Y} - {appraisal.cycle.period_end:%d %b %Y}'),
+            ('Discussion date', f'{appraisal.discussion_date:%d %b %Y}' if appraisal.discussion_date else ''),
+            ('Status', appraisal.get_status_display()),
+        ]),
+    ]
+
+    for review in appraisal.reviews.all():
+        reviewer = review.reviewer
+        story += [
+            Spacer(1, 6 * mm),
+            Paragraph(f'Review by {reviewer.get_full_name() or reviewer.username}', styles['Heading2']),
+            ratings_table(review.competency_ratings.all(), styles),
+            Spacer(1, 3 * mm),
+            signature_table([('Reviewer', review.reviewer_signature, review.reviewer_signed_at)]),
+        ]
+
+    evaluation = getattr(appraisal, 'overall_evaluation', None)
+    if evaluation is not None:
+        average = evaluation.overall_rating_avg
+        story += [
+            Spacer(1, 6 * mm),
+            Paragraph('Overall Evaluation', styles['Heading2']),
+            field_table([
+                ('Overall rating', f'{average:.2f}' if average is not None else 'Not rated'),
+                ('Ready for advanced work', 'Yes' if evaluation.ready_for_advanced_work else 'No'),
+                ('Ready for promotion', 'Yes' if evaluation.ready_for_promotion else 'No'),
+            ]),
+            Spacer(1, 3 * mm),
+            Paragraph(escape(evaluation.summary_comment) or '&nbsp;', styles['BodyText']),
+            Spacer(1, 3 * mm),
+            signature_table([
+                ('Employee', evaluation.appraisee_signature, evaluation.appraisee_signed_at),
+                ('HR', evaluation.hr_signature, evaluation.hr_signed_at),
+            ]),
+        ]
+
+    buffer = BytesIO()
+    SimpleDocTemplate(
+        buffer, pagesize=A4, title=f'Appraisal {appraisal.pk}',
+        leftMargin=18 * mm, rightMargin=18 * mm, topMargin=18 * mm, bottomMargin=18 * mm,
+    ).build(story)
+    return buffer.getvalue()
+
+
+def escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def field_table(rows):
+    table = Table([[label, value or ''] for label, value in rows], colWidths=[45 * mm, None], hAlign='LEFT')
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+    return table
+
+
+def ratings_table(ratings, styles):
+    labels = dict(CompetencyRating.RATING_CHOICES)
+    rows = [['Category', 'Criterion', 'Rating', 'Comments']]
+    for rating in ratings:
+        rows.append([
+            rating.get_category_display(),
+            Paragraph(escape(rating.criterion_name), styles['BodyText']),
+            f'{rating.rating} - {labels[rating.rating]}',
+            Paragraph(escape(rating.comments), styles['BodyText']),
+        ])
+    if len(rows) == 1:
+        rows.append(['No ratings yet', '', '', ''])
+
+    table = Table(rows, colWidths=[40 * mm, 55 * mm, 30 * mm, None], repeatRows=1)
+    table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+    return table
+
+
+def signature_table(signatures):
+    """Label, signature image and signing time for each (label, SignatureBlob, signed_at)"""
+    rows = []
+    for label, blob, signed_at in signatures:
+        rows.append([
+            label,
+            signature_image(blob) if blob is not None else 'Not signed',
+            f'{signed_at:%d %b %Y %H:%M}' if signed_at else '',
+        ])
+    table = Table(rows, colWidths=[30 * mm, 60 * mm, None], hAlign='LEFT')
+    table.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'MIDDLE')]))
+    return table
+
+
+def signature_image(blob: SignatureBlob):
+    """The signature scaled into SIGNATURE_SIZE, or a note if it cannot be drawn"""
+    try:
+        reader = ImageReader(BytesIO(bytes(blob.data)))
+        width, height = reader.getSize()
+    except Exception:
+        return 'Signature on file'
+    scale = min(SIGNATURE_SIZE[0] / width, SIGNATURE_SIZE[1] / height)
+    return Image(BytesIO(bytes(blob.data)), width=width * scale, height=height * scale)
+
+
+def write_cycle_zip(appraisals):
+    """Spooled zip of the stored forms, which the caller must have checked are current"""
+    archive = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    documents = (
+        AppraisalDocument.objects.filter(appraisal__in=appraisals)
+        .order_by('appraisal_id')
+        .values_list('appraisal_id', 'appraisal__appraisee__username', 'data')
+        .iterator(chunk_size=50)
+    )
+    # PDFs are already compressed, so store them as they are
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as bundle:
+        for appraisal_id, username, data in documents:
+            bundle.writestr(f'appraisal-{appraisal_id}-{username}.pdf', bytes(data))
+    archive.seek(0)
+    return archive
@@ -0,0 +1,111 @@
+import django_filters
+from .models import (
+    Company, User, Project, ProjectMembership,
+    AppraisalCycle, Appraisal, AppraisalReview,
+    CompetencyRating, OverallEvaluation, Job
+)
+
+
+class CompanyFilter(django_filters.FilterSet):
+    """Company filters"""
+    name = django_filters.CharFilter(lookup_expr='icontains')
+
+    class Meta:
+        model = Company
+        fields = ['name']
+
+
+class UserFilter(django_filters.FilterSet):
+    """User filters - backed by the (company, division) index"""
+    company = django_filters.NumberFilter(field_name='company_id')
+    division = django_filters.CharFilter()
+    position = django_filters.CharFilter()
+
+    class Meta:
+        model = User
+        fields = ['company', 'division', 'position']
+
+
+class ProjectFilter(django_filters.FilterSet):
+    """Project filters"""
+    company = django_filters.NumberFilter(field_name='company_id')
+
+    class Meta:
+        model = Project
+        fields = ['company']
+
+
+class ProjectMembershipFilter(django_filters.FilterSet):
+    """Membership filters - backed by the (project, role) index"""
+    project = django_filters.NumberFilter(field_name='project_id')
+    user = django_filters.NumberFilter(field_name='user_id')
+    role = django_filters.ChoiceFilter(choices=ProjectMembership.ROLE_CHOICES)
+
+    class Meta:
+        model = ProjectMembership
+        fields = ['project', 'user', 'role']
+
+
+class AppraisalCycleFilter(django_filters.FilterSet):
+    """Cycle filters - backed by the (company, status) index"""
+    company = django_filters.NumberFilter(field_name='company_id')
+    status = django_filters.ChoiceFilter(choices=AppraisalCycle.STATUS_CHOICES)
+
+    class Meta:
+        model = AppraisalCycle
+        fields = ['company', 'status']
+
+
+class AppraisalFilter(django_filters.FilterSet):
+    """Appraisal filters - backed by the (cycle, status) and (project, cycle) indexes"""
+    cycle = django_filters.NumberFilter(field_name='cycle_id')
+    project = django_filters.NumberFilter(field_name='project_id')
+    appraisee = django_filters.NumberFilter(field_name='appraisee_id')
+    status = django_filters.ChoiceFilter(choices=Appraisal.STATUS_CHOICES)
+
+    class Meta:
+        model = Appraisal
+        fields = ['cycle', 'project', 'appraisee', 'status']
+
+
+class AppraisalReviewFilter(django_filters.FilterSet):
+    """Review filters - backed by the (appraisal, reviewer) and (reviewer, is_completed) indexes"""
+    appraisal = django_filters.NumberFilter(field_name='appraisal_id')
+    reviewer = django_filters.NumberFilter(field_name='reviewer_id')
+    is_completed = django_filters.BooleanFilter()
+
+    class Meta:
+        model = AppraisalReview
+        fields = ['appraisal', 'reviewer', 'is_completed']
+
+
+class CompetencyRatingFilter(django_filters.FilterSet):
+    """Rating filters - backed by the (appraisal_review, category) index"""
+    appraisal_review = django_filters.NumberFilter(field_name='appraisal_review_id')
+    category = django_filters.ChoiceFilter(choices=CompetencyRating.CATEGORY_CHOICES)
+
+    class Meta:
+        model = CompetencyRating
+        fields = ['appraisal_review', 'category']
+
+
+class OverallEvaluationFilter(django_filters.FilterSet):
+    """Evaluation filters - appraisal is unique and already indexed"""
+    appraisal = django_filters.NumberFilter(field_name='appraisal_id')
+    ready_for_promotion = django_filters.BooleanFilter()
+    ready_for_advanced_work = django_filters.BooleanFilter()
+    finalized = django_filters.BooleanFilter(field_name='finalized_at', lookup_expr='isnull', exclude=True)
+
+    class Meta:
+        model = OverallEvaluation
+        fields = ['appraisal', 'ready_for_promotion', 'ready_for_advanced_work', 'finalized']
+
+
+class JobFilter(django_filters.FilterSet):
+    """Job filters"""
+    name = django_filters.CharFilter()
+    status = django_filters.ChoiceFilter(choices=Job.STATUS_CHOICES)
+
+    class Meta:
+        model = Job
+        fields = ['name', 'status']
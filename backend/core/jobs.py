@@ -0,0 +1,152 @@
+"""
+Database-backed background jobs, run by the run_worker management command.
+
+enqueue() inserts a Job row in the caller's transaction, so a job only
+becomes visible to workers once the data it works on is committed, and a
+partial unique index keeps a keyed job from being queued twice while it is
+pending. Workers claim the oldest due job with SELECT ... FOR UPDATE SKIP
+LOCKED plus a conditional UPDATE, call the function registered under the
+job's name with its payload as keyword arguments, and retry failures with
+exponential backoff until max_attempts is reached.
+"""
+import logging
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# name -> function, filled by @task in core.tasks
+TASKS = {}
+
+PENDING = ('QUEUED', 'RUNNING')
+
+RETRY_DELAY = 30
+MAX_RETRY_DELAY = 3600
+
+
+def task(name):
+    """Register a function as the job called name; it must return JSON-serializable data"""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def lock_timeout():
+    """Seconds after which a RUNNING job is presumed orphaned by a dead worker"""
+    return getattr(settings, 'JOB_LOCK_TIMEOUT', 1800)
+
+
+def enqueue(name, payload=None, key='', created_by_id=None, max_attempts=3):
+    """Queue one job, or return the pending job already queued under key"""
+    if key:
+        return enqueue_many(name, {key: payload or {}}, created_by_id, max_attempts)[0]
+    if name not in TASKS:
+        raise LookupError(f'No task registered as {name!r}')
+    return Job.objects.create(
+        name=name, payload=payload or {}, created_by_id=created_by_id, max_attempts=max_attempts
+    )
+
+
+def enqueue_many(name, payloads, created_by_id=None, max_attempts=3):
+    """Queue a job per key -> payload, skipping keys that already have a pending job"""
+    if name not in TASKS:
+        raise LookupError(f'No task registered as {name!r}')
+    keys = list(payloads)
+    # job_pending_key_unique turns a concurrent insert of the same key into a no-op
+    Job.objects.bulk_create([
+        Job(name=name, payload=payload, key=key, created_by_id=created_by_id, max_attempts=max_attempts)
+        for key, payload in payloads.items()
+    ], ignore_conflicts=True)
+
+    jobs = {job.key: job for job in Job.objects.filter(key__in=keys, status__in=PENDING).order_by()}
+    missing = [key for key in keys if key not in jobs]
+    if missing:
+        # Finished between the insert and the read
+        for job in Job.objects.filter(key__in=missing).order_by('pk'):
+            jobs[job.key] = job
+    return [jobs[key] for key in keys]
+
+
+def claim(worker_id):
+    """Lock the next due job for worker_id, or return None when nothing is due"""
+    now = timezone.now()
+    due = (
+        Q(status='QUEUED', run_after__lte=now)
+        | Q(status='RUNNING', locked_at__lt=now - timedelta(seconds=lock_timeout()))
+    )
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by('run_after', 'pk')
+            .first()
+        )
+        if job is None:
+            return None
+        # Without SKIP LOCKED (SQLite) two workers can read the same row; only one wins this
+        claimed = Job.objects.filter(pk=job.pk, status=job.status, attempts=job.attempts).update(
+            status='RUNNING', locked_by=worker_id, locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+        )
+        if not claimed:
+            return None
+
+    job.status, job.locked_by, job.locked_at = 'RUNNING', worker_id, now
+    job.attempts += 1
+    return job
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome; a retry goes back in the queue with backoff"""
+    # The update only lands while we still hold the job, not after another worker reclaimed it
+    ours = Job.objects.filter(pk=job.pk, locked_by=job.locked_by, locked_at=job.locked_at)
+    try:
+        func = TASKS.get(job.name)
+        if func is None:
+            raise LookupError(f'No task registered as {job.name!r}')
+        result = func(**job.payload)
+    except Exception:
+        logger.exception('Job %s (%s) failed on attempt %s', job.pk, job.name, job.attempts)
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            delay = min(RETRY_DELAY * 2 ** (job.attempts - 1), MAX_RETRY_DELAY)
+            ours.update(
+                status='QUEUED', run_after=now + timedelta(seconds=delay), error=traceback.format_exc(),
+                locked_by='', locked_at=None, updated_at=now,
+            )
+        else:
+            ours.update(
+                status='FAILED', error=traceback.format_exc(), finished_at=now, updated_at=now,
+            )
+        return False
+
+    now = timezone.now()
+    ours.update(status='SUCCEEDED', result=result, error='', finished_at=now, updated_at=now)
+    return True
+
+
+def run_next(worker_id):
+    """Claim and run one job; False when the queue had nothing due"""
+    close_old_connections()
+    try:
+        job = claim(worker_id)
+        if job is None:
+            return False
+        run_job(job)
+        return True
+    finally:
+        close_old_connections()
+
+
+def retry(job):
+    """Queue a failed job again with a fresh set of attempts, unless its key is pending again"""
+    requeued = Job.objects.filter(key=OuterRef('key'), status__in=PENDING).exclude(key='')
+    return Job.objects.filter(pk=job.pk, status='FAILED').exclude(Exists(requeued)).update(
+        status='QUEUED', attempts=0, run_after=timezone.now(), locked_by='', locked_at=None,
+        finished_at=None, updated_at=timezone.now(),
+    )
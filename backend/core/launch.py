@@ -0,0 +1,142 @@
+"""
+Set-based launch of an appraisal cycle.
+
+Creates one appraisal per MEMBER of every active project in the cycle's
+company, with its reviews and overall evaluation, in a handful of bulk
+INSERTs. The (cycle, appraisee, project) unique constraint makes a launch
+idempotent: running it again only adds appraisals for new members.
+"""
+from django.db import transaction
+from .models import (
+    AppraisalCycle, Appraisal, AppraisalReview, OverallEvaluation,
+    ProjectMembership, CycleReportPartition
+)
+
+REVIEWER_LAYOUTS = ('previous', 'reporters', 'none')
+
+BATCH_SIZE = 1000
+
+
+def previous_cycle(cycle):
+    return (
+        AppraisalCycle.objects
+        .filter(company_id=cycle.company_id, period_start__lt=cycle.period_start)
+        .order_by('-period_start')
+        .first()
+    )
+
+
+def launch_cycle(cycle, reviewers='previous', created_by_id=None, batch_size=BATCH_SIZE):
+    """
+    Create the cycle's missing appraisals, reviews and evaluations and activate it.
+
+    reviewers picks who reviews each new appraisal: 'previous' copies the
+    reviewers the same appraisee had in the same project last cycle, falling
+    back to the project's reporters; 'reporters' assigns every reporter of the
+    project; 'none' leaves reviews to be added by hand. Reviewers must still
+    be reporters of the project, and nobody reviews themselves.
+    """
+    with transaction.atomic():
+        # Serialises concurrent launches of the same cycle
+        cycle = AppraisalCycle.objects.select_for_update().get(pk=cycle.pk)
+
+        memberships = list(
+            ProjectMembership.objects
+            .filter(project__company_id=cycle.company_id, project__is_active=True, user__is_active=True)
+            .values_list('project_id', 'user_id', 'role')
+        )
+        members = [(project_id, user_id) for project_id, user_id, role in memberships if role == 'MEMBER']
+        reporters = {}
+        for project_id, user_id, role in memberships:
+            if role == 'REPORTER':
+                reporters.setdefault(project_id, set()).add(user_id)
+
+        existing = set(
+            Appraisal.objects.filter(cycle=cycle).order_by().values_list('project_id', 'appraisee_id')
+        )
+        Appraisal.objects.bulk_create(
+            [
+                Appraisal(
+                    cycle=cycle, project_id=project_id, appraisee_id=user_id,
+                    created_by_id=created_by_id, updated_by_id=created_by_id,
+                )
+                for project_id, user_id in members
+                if (project_id, user_id) not in existing
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
+        # ignore_conflicts leaves the new rows without pks, so read them back
+        created = {
+            (project_id, user_id): pk
+            for pk, project_id, user_id in Appraisal.objects.filter(cycle=cycle).order_by().values_list(
+                'pk', 'project_id', 'appraisee_id'
+            )
+            if (project_id, user_id) not in existing
+        }
+
+        layout = reviewer_layout(cycle, created, reporters, reviewers)
+        AppraisalReview.objects.bulk_create(
+            [
+                AppraisalReview(
+                    appraisal_id=created[key], reviewer_id=reviewer_id,
+                    created_by_id=created_by_id, updated_by_id=created_by_id,
+                )
+                for key, reviewer_ids in layout.items()
+                for reviewer_id in sorted(reviewer_ids)
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        OverallEvaluation.objects.bulk_create(
+            [
+                OverallEvaluation(appraisal_id=pk, created_by_id=created_by_id, updated_by_id=created_by_id)
+                for pk in created.values()
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
+        # bulk_create skips the model saves, so count the new rows and register the report partitions here
+        Appraisal.recount_progress(Appraisal.objects.filter(pk__in=created.values()))
+        AppraisalCycle.recount_progress(AppraisalCycle.objects.filter(pk=cycle.pk))
+        CycleReportPartition.touch(cycle.pk, {project_id for project_id, _ in created})
+
+        if cycle.status == 'DRAFT':
+            cycle.status = 'ACTIVE'
+            cycle.updated_by_id = created_by_id
+            cycle.save(update_fields=['status', 'updated_by', 'updated_at'])
+
+    return {
+        'cycle': cycle.pk,
+        'status': cycle.status,
+        'appraisals_created': len(created),
+        'reviews_created': sum(len(reviewer_ids) for reviewer_ids in layout.values()),
+        'appraisals_existing': len(existing),
+    }
+
+
+def reviewer_layout(cycle, created, reporters, reviewers):
+    """Reviewer ids for each new (project_id, appraisee_id)"""
+    if reviewers == 'none':
+        return {}
+
+    previous = {}
+    source = previous_cycle(cycle) if reviewers == 'previous' else None
+    if source is not None and created:
+        rows = AppraisalReview.objects.filter(
+            appraisal__cycle=source,
+            appraisal__project_id__in={project_id for project_id, _ in created},
+        ).order_by().values_list('appraisal__project_id', 'appraisal__appraisee_id', 'reviewer_id')
+        for project_id, appraisee_id, reviewer_id in rows.iterator(chunk_size=BATCH_SIZE):
+            previous.setdefault((project_id, appraisee_id), set()).add(reviewer_id)
+
+    layout = {}
+    for key in created:
+        project_id, appraisee_id = key
+        eligible = reporters.get(project_id, set()) - {appraisee_id}
+        reviewer_ids = previous.get(key, set()) & eligible or eligible
+        if reviewer_ids:
+            layout[key] = reviewer_ids
+    return layout
@@ -0,0 +1,137 @@
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import cycle, islice
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from .benchmark_endpoints import percentile
+
+SERVER_START_TIMEOUT = 30
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare concurrent-request throughput of the WSGI and ASGI server modes '
+        '(gunicorn.conf.py) against the configured database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help='User to log in as')
+        parser.add_argument('--password', required=True)
+        parser.add_argument(
+            '--paths', default='/api/auth/me/',
+            help='Comma-separated GET paths, requested in turn (default: /api/auth/me/)',
+        )
+        parser.add_argument('--modes', default='wsgi,asgi', help='Server modes to compare (default: wsgi,asgi)')
+        parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers per mode (default: 2)')
+        parser.add_argument(
+            '--concurrency', type=int, default=50, help='Requests in flight at once (default: 50)'
+        )
+        parser.add_argument('--requests', type=int, default=2000, help='Timed requests per mode (default: 2000)')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        paths = [path.strip() for path in options['paths'].split(',') if path.strip()]
+
+        self.stdout.write(
+            f"{options['requests']} requests, {options['concurrency']} at a time, "
+            f"{options['workers']} worker(s) per mode"
+        )
+        self.stdout.write(f"  {'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+
+        results = {}
+        for mode in modes:
+            with self.server(mode, options['workers'], options['port']):
+                token = self.login(options)
+                # Warm up every worker's connections and caches before timing
+                self.load(options, paths, token, options['concurrency'] * 2)
+                results[mode] = self.load(options, paths, token, options['requests'])
+
+            result = results[mode]
+            self.stdout.write(
+                f"  {mode:<6} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} "
+                f"{result['p95_ms']:>8.1f} {result['errors']:>7}"
+            )
+
+        if 'wsgi' in results and 'asgi' in results:
+            ratio = results['asgi']['rps'] / results['wsgi']['rps']
+            self.stdout.write(self.style.SUCCESS(f'✓ ASGI throughput is {ratio:.2f}x WSGI'))
+
+    @contextmanager
+    def server(self, mode, workers, port):
+        """gunicorn in the given SERVER_MODE, listening on localhost until the block exits"""
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{port}'],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'SERVER_MODE': mode, 'SLOW_REQUEST_MS': '60000'},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + SERVER_START_TIMEOUT
+            while True:
+                if process.poll() is not None:
+                    raise CommandError(f'gunicorn ({mode}) exited with status {process.returncode}')
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise CommandError(f'gunicorn ({mode}) did not start within {SERVER_START_TIMEOUT}s')
+                    time.sleep(0.2)
+            yield
+        finally:
+            process.terminate()
+            process.wait()
+
+    def login(self, options):
+        connection = http.client.HTTPConnection('127.0.0.1', options['port'], timeout=30)
+        body = json.dumps({'username': options['username'], 'password': options['password']})
+        connection.request('POST', '/api/auth/login/', body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        payload = response.read()
+        connection.close()
+        if response.status != 200:
+            raise CommandError(f'Login failed with status {response.status}: {payload[:200]!r}')
+        return json.loads(payload)['access']
+
+    def load(self, options, paths, token, total):
+        """Send total GETs over concurrency keep-alive connections; throughput and latencies"""
+        headers = {'Authorization': f'Bearer {token}'}
+        local = threading.local()
+
+        def send(path):
+            if not hasattr(local, 'connection'):
+                local.connection = http.client.HTTPConnection('127.0.0.1', options['port'], timeout=60)
+            started = time.perf_counter()
+            try:
+                local.connection.request('GET', path, headers=headers)
+                response = local.connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                local.connection.close()
+                ok = False
+            return (time.perf_counter() - started) * 1000, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            samples = list(pool.map(send, islice(cycle(paths), total)))
+        elapsed = time.perf_counter() - started
+
+        timings = [elapsed_ms for elapsed_ms, ok in samples if ok]
+        return {
+            'rps': len(timings) / elapsed,
+            'p50_ms': statistics.median(timings) if timings else 0.0,
+            'p95_ms': percentile(timings, 0.95) if timings else 0.0,
+            'errors': len(samples) - len(timings),
+        }
@@ -0,0 +1,209 @@
+import json
+import statistics
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+)
+from rest_framework.test import APIClient
+from core.models import ProjectMembership
+from core.urls import router
+
+# generate_dataset arguments for each named scale
+SCALES = {
+    'smoke': {'users_per_company': 20, 'projects_per_company': 2, 'cycles': 1},
+    'small': {'users_per_company': 200, 'cycles': 2},
+    'medium': {'users_per_company': 2000, 'cycles': 4},
+    'large': {'companies': 2, 'users_per_company': 10000, 'cycles': 6},
+}
+
+PASSWORD = 'benchmark-password'
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baselines.json'
+
+# Latency changes smaller than this are noise whatever the percentage
+MIN_LATENCY_DELTA_MS = 2.0
+
+
+def router_endpoints():
+    """(name, method, url template) for every GET route and login in the API, async views included"""
+    endpoints = [
+        ('POST /auth/login/', 'post', '/api/auth/login/'),
+        ('GET /auth/me/', 'get', '/api/auth/me/'),
+        ('GET /dashboard/', 'get', '/api/dashboard/'),
+    ]
+    for prefix, viewset, basename in router.registry:
+        if hasattr(viewset, 'list'):
+            endpoints.append((f'GET /{prefix}/', 'get', f'/api/{prefix}/'))
+        if hasattr(viewset, 'retrieve') and hasattr(viewset, 'list'):
+            endpoints.append((f'GET /{prefix}/{{id}}/', 'get', f'/api/{prefix}/{{id}}/'))
+        for action in viewset.get_extra_actions():
+            if 'get' not in action.mapping:
+                continue
+            if action.detail:
+                if not hasattr(viewset, 'list'):
+                    continue
+                path = f'/{prefix}/{{id}}/{action.url_path}/'
+            else:
+                path = f'/{prefix}/{action.url_path}/'
+            endpoints.append((f'GET {path}', 'get', f'/api{path}'))
+    return endpoints
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every API endpoint against generated datasets and compare with stored baselines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales', default='small,medium',
+            help=f"Comma-separated dataset sizes out of {', '.join(SCALES)} (default: small,medium)",
+        )
+        parser.add_argument('--repeat', type=int, default=20, help='Timed requests per endpoint (default: 20)')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Write these results as the new baseline instead of comparing',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Allowed relative p95 latency and response size growth (default: 0.2)',
+        )
+
+    def handle(self, *args, **options):
+        scales = [scale.strip() for scale in options['scales'].split(',') if scale.strip()]
+        unknown = set(scales) - set(SCALES)
+        if unknown:
+            raise CommandError(f"Unknown scale(s): {', '.join(sorted(unknown))}")
+
+        # Never touch the real databases: build a throwaway primary like the test runner does,
+        # and keep replica reads on it. The only worker's local cache counts as shared.
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(DATABASE_REPLICAS=[], CACHE_IS_SHARED=True):
+                results = {scale: self.run_scale(scale, options) for scale in scales}
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+            baseline.update(results)
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'✓ Saved baseline to {baseline_path}'))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(f'No baseline at {baseline_path}; run with --save-baseline to create one')
+            return
+
+        regressions = self.compare(results, json.loads(baseline_path.read_text()), options['threshold'])
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f'  {regression}'))
+            raise CommandError(f'{len(regressions)} regression(s) against {baseline_path}')
+        self.stdout.write(self.style.SUCCESS('✓ No regressions against the baseline'))
+
+    def run_scale(self, scale, options):
+        call_command('flush', interactive=False, verbosity=0)
+        cache.clear()
+        call_command(
+            'generate_dataset', seed=options['seed'], password=PASSWORD,
+            stdout=self.stdout, **SCALES[scale]
+        )
+
+        reporter = (
+            ProjectMembership.objects.filter(role='REPORTER').select_related('user').order_by('pk').first().user
+        )
+        client = APIClient()
+        login = client.post('/api/auth/login/', {'username': reporter.username, 'password': PASSWORD})
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+
+        self.stdout.write(f'\n{scale}:')
+        self.stdout.write(f"  {'endpoint':<45} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'bytes':>9}")
+
+        results, sample_ids = {}, {}
+        for name, method, template in router_endpoints():
+            if method == 'post':
+                result = self.measure(
+                    client, method, template, options['repeat'],
+                    {'username': reporter.username, 'password': PASSWORD}
+                )
+            else:
+                prefix = template.split('/')[2]
+                if '{id}' in template:
+                    if prefix not in sample_ids:
+                        continue
+                    template = template.format(id=sample_ids[prefix])
+                result = self.measure(client, method, template, options['repeat'])
+                sample_id = result.pop('sample_id', None)
+                if sample_id is not None:
+                    sample_ids.setdefault(prefix, sample_id)
+
+            results[name] = result
+            self.stdout.write(
+                f"  {name:<45} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                f"{result['queries']:>8} {result['bytes']:>9}"
+            )
+        return results
+
+    def measure(self, client, method, url, repeat, data=None):
+        """Time one endpoint after a warm-up request; query count and size come from the last run"""
+        send = getattr(client, method)
+        send(url, data)
+
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = send(url, data)
+                # Streamed bodies are produced while they are read, so read them inside the timing
+                content = b''.join(response.streaming_content) if response.streaming else response.content
+                timings.append((time.perf_counter() - started) * 1000)
+
+        result = {
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'queries': len(queries),
+            'bytes': len(content),
+        }
+
+        # Remember an id from list responses to drive the detail routes
+        if method == 'get' and response.status_code == 200:
+            payload = response.json()
+            rows = payload.get('results') if isinstance(payload, dict) else payload
+            if isinstance(rows, list) and rows and 'id' in rows[0]:
+                result['sample_id'] = rows[0]['id']
+        return result
+
+    def compare(self, results, baseline, threshold):
+        regressions = []
+        for scale, endpoints in results.items():
+            for name, current in endpoints.items():
+                previous = baseline.get(scale, {}).get(name)
+                if previous is None:
+                    continue
+                label = f'[{scale}] {name}'
+                if current['status'] != previous['status']:
+                    regressions.append(f"{label}: status {previous['status']} -> {current['status']}")
+                if current['queries'] > previous['queries']:
+                    regressions.append(f"{label}: queries {previous['queries']} -> {current['queries']}")
+                if current['p95_ms'] > previous['p95_ms'] * (1 + threshold) and \
+                        current['p95_ms'] - previous['p95_ms'] > MIN_LATENCY_DELTA_MS:
+                    regressions.append(f"{label}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+                if current['bytes'] > previous['bytes'] * (1 + threshold):
+                    regressions.append(f"{label}: bytes {previous['bytes']} -> {current['bytes']}")
+        return regressions
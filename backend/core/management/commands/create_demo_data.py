@@ -112,7 +112,6 @@ class Command(BaseCommand):
             project=projects[0],  # Project Alpha
             defaults={
                 'discussion_date': date.today() + timedelta(days=7),
-                'status': 'IN_PROGRESS'
             }
         )
         if created:
@@ -166,7 +165,6 @@ class Command(BaseCommand):
             project=projects[1],  # Project Beta
             defaults={
                 'discussion_date': date.today() + timedelta(days=14),
-                'status': 'PENDING'
             }
         )
         if created:
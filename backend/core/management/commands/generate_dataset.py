@@ -0,0 +1,265 @@
+import random
+import time
+from datetime import date, datetime, time as day_time
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from core.caching import invalidate_reference_data
+from core.models import (
+    Company, User, Project, ProjectMembership,
+    AppraisalCycle, Appraisal, AppraisalReview,
+    CompetencyRating, OverallEvaluation, CycleReportPartition, progress_status
+)
+
+FIRST_NAMES = [
+    'Aisha', 'Ben', 'Chloe', 'Daniel', 'Elena', 'Farid', 'Grace', 'Hiro', 'Isla', 'Jonas',
+    'Kavya', 'Liam', 'Mei', 'Noah', 'Olivia', 'Pedro', 'Quinn', 'Ravi', 'Sofia', 'Tariq',
+]
+LAST_NAMES = [
+    'Abdullah', 'Brown', 'Chen', 'Dubois', 'Evans', 'Fernandez', 'Garcia', 'Hassan', 'Ito',
+    'Johnson', 'Kim', 'Lopez', 'Muller', 'Nguyen', 'Okafor', 'Patel', 'Rossi', 'Smith',
+    'Tan', 'Wilson',
+]
+DIVISIONS = ['Engineering', 'Marketing', 'Sales', 'Finance', 'Operations', 'People']
+POSITIONS = ['Associate', 'Specialist', 'Senior Specialist', 'Team Lead', 'Manager']
+
+CRITERIA = [
+    ('WORK_EFFICIENCY', 'Ability to work without supervision'),
+    ('WORK_EFFICIENCY', 'Knowledge of roles and responsibilities'),
+    ('WORK_EFFICIENCY', 'Work accuracy and correctness'),
+    ('WORK_EFFICIENCY', 'Resourcefulness and creativity'),
+    ('PRODUCTIVITY', 'Completes tasks according to instructions'),
+    ('PRODUCTIVITY', 'Takes responsibility for work'),
+    ('PRODUCTIVITY', 'Sustains productive work'),
+    ('PRODUCTIVITY', 'Meets reasonable time estimates'),
+    ('PERSONAL', 'Initiative and ambition'),
+    ('PERSONAL', 'Manner and appearance'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, reproducible synthetic dataset for load testing and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=1)
+        parser.add_argument('--users-per-company', type=int, default=200)
+        parser.add_argument('--projects-per-company', type=int, default=5)
+        parser.add_argument(
+            '--projects-per-user', type=int, default=1,
+            help='Projects each user is a member of (default: 1)',
+        )
+        parser.add_argument(
+            '--reporters-per-project', type=int, default=3,
+            help='Members of each project who get the REPORTER role (default: 3)',
+        )
+        parser.add_argument(
+            '--cycles', type=int, default=4,
+            help='Half-year cycles per company, oldest first; only the last is ACTIVE (default: 4)',
+        )
+        parser.add_argument('--first-year', type=int, default=2023)
+        parser.add_argument('--reviewers-per-appraisal', type=int, default=2)
+        parser.add_argument('--ratings-per-review', type=int, default=len(CRITERIA))
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--prefix', default='gen',
+            help='Prefix for generated usernames and company names (default: gen)',
+        )
+        parser.add_argument('--password', default='demo123')
+
+    def handle(self, *args, **options):
+        if options['reviewers_per_appraisal'] > options['reporters_per_project']:
+            raise CommandError('--reviewers-per-appraisal cannot exceed --reporters-per-project')
+        if options['projects_per_user'] > options['projects_per_company']:
+            raise CommandError('--projects-per-user cannot exceed --projects-per-company')
+        if User.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(
+                f"Users prefixed '{options['prefix']}_' already exist; pick another --prefix"
+            )
+
+        self.options = options
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # Hashing is the slowest part of user creation, so every user shares one hash
+        self.password = make_password(options['password'], salt=f"dataset{options['seed']}")
+        self.counts = dict.fromkeys(
+            ['users', 'memberships', 'appraisals', 'reviews', 'ratings'], 0
+        )
+
+        started = time.monotonic()
+        for index in range(options['companies']):
+            with transaction.atomic():
+                self.generate_company(index)
+            self.stdout.write(
+                f"  Company {index + 1}/{options['companies']} done "
+                f"({time.monotonic() - started:.1f}s)"
+            )
+
+        summary = ', '.join(f'{count} {name}' for name, count in self.counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Generated {summary} in {time.monotonic() - started:.1f}s'
+        ))
+
+    def generate_company(self, index):
+        options = self.options
+        prefix = f"{options['prefix']}_{index}"
+
+        company = Company.objects.create(name=f"{options['prefix'].title()} Company {index}")
+        projects = Project.objects.bulk_create([
+            Project(company=company, name=f'Project {number}')
+            for number in range(options['projects_per_company'])
+        ])
+        cycles = AppraisalCycle.objects.bulk_create(self.build_cycles(company))
+
+        members = {project.pk: [] for project in projects}
+        for start in range(0, options['users_per_company'], self.batch_size):
+            stop = min(start + self.batch_size, options['users_per_company'])
+            users = User.objects.bulk_create([
+                self.build_user(company, f'{prefix}_{number}') for number in range(start, stop)
+            ])
+            memberships = []
+            for user in users:
+                for project in self.random.sample(projects, options['projects_per_user']):
+                    members[project.pk].append(user.pk)
+                    memberships.append(ProjectMembership(project=project, user=user))
+            ProjectMembership.objects.bulk_create(memberships, batch_size=self.batch_size)
+            self.counts['users'] += len(users)
+            self.counts['memberships'] += len(memberships)
+
+        reporters = {}
+        for project in projects:
+            reporters[project.pk] = members[project.pk][:options['reporters_per_project']]
+            ProjectMembership.objects.filter(
+                project=project, user_id__in=reporters[project.pk]
+            ).update(role='REPORTER')
+
+        for cycle in cycles:
+            for project in projects:
+                appraisees = members[project.pk][options['reporters_per_project']:]
+                for start in range(0, len(appraisees), self.batch_size):
+                    self.generate_appraisals(
+                        cycle, project, appraisees[start:start + self.batch_size], reporters[project.pk]
+                    )
+            # bulk_create skips Appraisal.save, so register the report partitions here
+            CycleReportPartition.touch(cycle.pk, [project.pk for project in projects])
+
+        # The appraisals carry their review counters; the cycles count them once at the end
+        AppraisalCycle.recount_progress(AppraisalCycle.objects.filter(company=company))
+
+        # Nor do bulk inserts send the signals that drop cached reference responses
+        invalidate_reference_data(company.pk)
+
+    def build_cycles(self, company):
+        cycles = []
+        for number in range(self.options['cycles']):
+            year = self.options['first_year'] + number // 2
+            first_half = number % 2 == 0
+            cycles.append(AppraisalCycle(
+                company=company,
+                period_start=date(year, 1, 1) if first_half else date(year, 7, 1),
+                period_end=date(year, 6, 30) if first_half else date(year, 12, 31),
+                status='ACTIVE' if number == self.options['cycles'] - 1 else 'CLOSED',
+            ))
+        return cycles
+
+    def build_user(self, company, username):
+        first_name = self.random.choice(FIRST_NAMES)
+        last_name = self.random.choice(LAST_NAMES)
+        return User(
+            username=username,
+            password=self.password,
+            email=f'{username}@example.com',
+            first_name=first_name,
+            last_name=last_name,
+            company=company,
+            division=self.random.choice(DIVISIONS),
+            position=self.random.choice(POSITIONS),
+        )
+
+    def generate_appraisals(self, cycle, project, appraisee_ids, reporter_ids):
+        """One appraisal per appraisee, with its reviews, ratings and evaluation totals"""
+        options = self.options
+        closed = cycle.status == 'CLOSED'
+        signed_at = timezone.make_aware(datetime.combine(cycle.period_end, day_time(12)))
+
+        # Reviews and ratings are drawn first so the running totals can be written with the rows
+        reviewer_count = min(options['reviewers_per_appraisal'], len(reporter_ids))
+        plans = []
+        for appraisee_id in appraisee_ids:
+            plan = []
+            for reviewer_id in self.random.sample(reporter_ids, reviewer_count):
+                completed = closed or self.random.random() < 0.5
+                ratings = self.build_ratings() if completed or self.random.random() < 0.5 else []
+                plan.append((reviewer_id, completed, ratings))
+            plans.append((appraisee_id, plan))
+
+        appraisals = []
+        for appraisee_id, plan in plans:
+            completed = sum(1 for _, is_completed, _ in plan if is_completed)
+            appraisals.append(Appraisal(
+                cycle=cycle,
+                appraisee_id=appraisee_id,
+                project=project,
+                discussion_date=cycle.period_end,
+                status=progress_status(len(plan), completed),
+                reviews_total=len(plan),
+                reviews_completed=completed,
+            ))
+        Appraisal.objects.bulk_create(appraisals)
+
+        reviews, ratings_by_review = [], []
+        for appraisal, (_, plan) in zip(appraisals, plans):
+            for reviewer_id, completed, ratings in plan:
+                reviews.append(AppraisalReview(
+                    appraisal=appraisal,
+                    reviewer_id=reviewer_id,
+                    is_completed=completed,
+                    reviewer_signed_at=signed_at if completed else None,
+                    rating_sum=sum(rating.rating for rating in ratings),
+                    rating_count=len(ratings),
+                ))
+                ratings_by_review.append(ratings)
+        AppraisalReview.objects.bulk_create(reviews, batch_size=self.batch_size)
+
+        ratings = []
+        for review, review_ratings in zip(reviews, ratings_by_review):
+            for rating in review_ratings:
+                rating.appraisal_review = review
+                ratings.append(rating)
+        CompetencyRating.objects.bulk_create(ratings, batch_size=self.batch_size)
+
+        totals = {appraisal.pk: [0, 0] for appraisal in appraisals}
+        for review in reviews:
+            if review.is_completed:
+                totals[review.appraisal_id][0] += review.rating_sum
+                totals[review.appraisal_id][1] += review.rating_count
+        OverallEvaluation.objects.bulk_create([
+            OverallEvaluation(
+                appraisal=appraisal,
+                rating_sum=totals[appraisal.pk][0],
+                rating_count=totals[appraisal.pk][1],
+                overall_rating_avg=(
+                    totals[appraisal.pk][0] / totals[appraisal.pk][1] if totals[appraisal.pk][1] else None
+                ),
+                finalized_at=signed_at if closed else None,
+            )
+            for appraisal in appraisals
+        ], batch_size=self.batch_size)
+
+        self.counts['appraisals'] += len(appraisals)
+        self.counts['reviews'] += len(reviews)
+        self.counts['ratings'] += len(ratings)
+
+    def build_ratings(self):
+        ratings = []
+        for number in range(self.options['ratings_per_review']):
+            category, criterion = CRITERIA[number % len(CRITERIA)]
+            if number >= len(CRITERIA):
+                criterion = f'{criterion} ({number // len(CRITERIA) + 1})'
+            ratings.append(CompetencyRating(
+                category=category,
+                criterion_name=criterion,
+                rating=self.random.choices([1, 2, 3, 4, 5], weights=[1, 2, 5, 4, 2])[0],
+            ))
+        return ratings
@@ -0,0 +1,63 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+def purge_expired_tokens(batch_size, pause=0):
+    """Delete expired outstanding tokens and their blacklist rows, one short transaction per batch"""
+    now = timezone.now()
+    expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by('expires_at')
+    purged = 0
+
+    while True:
+        ids = list(expired.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return purged
+
+        with transaction.atomic():
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(pk__in=ids).delete()
+        purged += len(ids)
+
+        if pause:
+            time.sleep(pause)
+
+
+class Command(BaseCommand):
+    help = 'Purge expired outstanding and blacklisted JWTs in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Tokens deleted per transaction (default: 5000)',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.1,
+            help='Seconds to sleep between batches to spare the database (default: 0.1)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and purge again every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=3600,
+            help='Seconds between purges with --loop (default: 3600)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            purged = purge_expired_tokens(options['batch_size'], options['pause'])
+            self.stdout.write(self.style.SUCCESS(f'✓ Purged {purged} expired token(s)'))
+
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.aggregates import rebuild_progress_counters
+
+
+class Command(BaseCommand):
+    help = 'Check the appraisal and cycle progress counters against the reviews and rebuild any that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift; exit with an error instead of repairing it',
+        )
+
+    def handle(self, *args, **options):
+        drift = rebuild_progress_counters(fix=not options['check'])
+
+        if not drift['appraisals'] and not drift['cycles']:
+            self.stdout.write(self.style.SUCCESS('✓ Progress counters are consistent'))
+            return
+
+        summary = f"{drift['appraisals']} appraisal(s) and {drift['cycles']} cycle(s)"
+        if options['check']:
+            raise CommandError(f'Progress counters drifted for {summary}')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt progress counters for {summary}'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.aggregates import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Check the running rating totals against the ratings and rebuild any that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift; exit with an error instead of repairing it',
+        )
+
+    def handle(self, *args, **options):
+        drift = rebuild_rating_aggregates(fix=not options['check'])
+
+        if not drift['reviews'] and not drift['evaluations']:
+            self.stdout.write(self.style.SUCCESS('✓ Rating aggregates are consistent'))
+            return
+
+        summary = f"{drift['reviews']} review(s) and {drift['evaluations']} evaluation(s)"
+        if options['check']:
+            raise CommandError(f'Rating aggregates drifted for {summary}')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt rating aggregates for {summary}'))
@@ -0,0 +1,92 @@
+import logging
+import os
+import signal
+import socket
+import threading
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+from core.jobs import run_next
+
+logger = logging.getLogger('core.jobs')
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (PDF renders, cycle launches, report refreshes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=2,
+            help='Jobs run in parallel, one thread and database connection each (default: 2)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait before polling again when the queue is empty (default: 1.0)',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once no job is due instead of polling forever',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        previous = {sig: signal.signal(sig, self.stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+        name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(f"Worker {name} running {options['concurrency']} job(s) at a time")
+
+        try:
+            if options['concurrency'] == 1:
+                processed = self.work(f'{name}:0', options)
+            else:
+                counts = [0] * options['concurrency']
+                threads = [
+                    threading.Thread(
+                        target=self.work_in_thread, args=(f'{name}:{index}', options, counts, index),
+                        name=f'job-worker-{index}',
+                    )
+                    for index in range(options['concurrency'])
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                processed = sum(counts)
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Worker {name} stopped after {processed} job(s)'))
+
+    def stop(self, signum, frame):
+        """Finish the jobs in progress, then exit"""
+        self.stdout.write('Stopping after the current job(s)...')
+        self.stopping.set()
+
+    def work(self, worker_id, options):
+        processed = 0
+        while not self.stopping.is_set():
+            try:
+                ran = run_next(worker_id)
+            except DatabaseError:
+                # Lock contention or a dropped connection; keep the worker alive and try again
+                logger.exception('Worker %s could not claim a job', worker_id)
+                self.stopping.wait(options['poll_interval'])
+                continue
+
+            if ran:
+                processed += 1
+            elif options['burst']:
+                break
+            else:
+                self.stopping.wait(options['poll_interval'])
+        return processed
+
+    def work_in_thread(self, worker_id, options, counts, index):
+        try:
+            counts[index] = self.work(worker_id, options)
+        finally:
+            connections.close_all()
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.cache import cache
+from .caching import bump_version, versioned_key
+from .models import ProjectMembership
+
+# Invalidation is explicit, the timeout only bounds memory for idle users
+MEMBERSHIP_CACHE_TIMEOUT = 60 * 60
+
+
+def membership_namespace(user_id):
+    return f'memberships:{user_id}'
+
+
+def fetch_project_roles(user_id):
+    # Always the primary: a lagging replica's roles would be cached under the current version
+    return dict(
+        ProjectMembership.objects.using('default')
+        .filter(user_id=user_id).values_list('project_id', 'role')
+    )
+
+
+def load_project_roles(user_id, version=None):
+    """{project_id: role} for a user, from the shared cache or a single query"""
+    if not settings.CACHE_IS_SHARED:
+        # Another worker's invalidation would never reach a per-process cache
+        return fetch_project_roles(user_id)
+
+    key = versioned_key(membership_namespace(user_id), version=version)
+    roles = cache.get(key)
+    if roles is None:
+        roles = fetch_project_roles(user_id)
+        cache.set(key, roles, MEMBERSHIP_CACHE_TIMEOUT)
+    return roles
+
+
+def invalidate_project_roles(user_id):
+    """Drop a user's cached roles after one of their memberships changed"""
+    bump_version(membership_namespace(user_id))
+
+
+def project_roles(request, user_id=None):
+    """
+    Roles of a user (the requester by default), resolved once per request.
+
+    Permission classes and viewsets all go through here, so a request never
+    looks up the same user's memberships twice.
+    """
+    if user_id is None:
+        user_id = request.user.pk
+
+    memo = getattr(request, '_project_roles', None)
+    if memo is None:
+        memo = request._project_roles = {}
+    if user_id not in memo:
+        # Token-authenticated users arrive with their membership version already read
+        version = None
+        if user_id == request.user.pk:
+            version = getattr(request.user, 'membership_version', None)
+        memo[user_id] = load_project_roles(user_id, version)
+    return memo[user_id]
+
+
+def project_ids(request):
+    """Projects the requester belongs to, for filtering querysets"""
+    return list(project_roles(request))
+
+
+def is_member(request, project_id, user_id=None):
+    return project_id in project_roles(request, user_id)
+
+
+def is_reporter(request, project_id, user_id=None):
+    return project_roles(request, user_id).get(project_id) == 'REPORTER'
@@ -0,0 +1,297 @@
+import logging
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from itertools import islice
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+from whitenoise.middleware import WhiteNoiseMiddleware
+from .replicas import apin_to_primary, pin_to_primary
+
+logger = logging.getLogger('core.sql')
+
+IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+NUMBER = re.compile(r'\b\d+\b')
+STRING = re.compile(r"'(?:[^']|'')*'")
+
+# Parts of a synchronous streaming body read per thread hop under ASGI
+STREAM_BATCH_SIZE = 256
+
+
+def fingerprint(sql):
+    """SQL with literals and IN lists collapsed, so repeats of one statement compare equal"""
+    sql = IN_LIST.sub('(...)', sql)
+    sql = STRING.sub('?', sql)
+    return NUMBER.sub('?', sql)
+
+
+def view_name(view_func, request):
+    """'AppraisalViewSet.list' for viewset actions, the function name otherwise"""
+    cls = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None)
+    if cls is not None and actions:
+        return f'{cls.__name__}.{actions.get(request.method.lower(), request.method.lower())}'
+    if cls is not None:
+        return cls.__name__
+    view_class = getattr(view_func, 'view_class', None)
+    if view_class is not None:
+        return f'{view_class.__name__}.{request.method.lower()}'
+    return getattr(view_func, '__qualname__', repr(view_func))
+
+
+async def aiterate(iterator, batch_size=STREAM_BATCH_SIZE):
+    """
+    Async iterator over a synchronous one, advanced a batch at a time.
+
+    The batches are read in the request's thread-sensitive worker thread, so
+    a generator holding a transaction or a server-side cursor keeps using the
+    connection it opened.
+    """
+    next_batch = sync_to_async(lambda: list(islice(iterator, batch_size)))
+    while batch := await next_batch():
+        for part in batch:
+            yield part
+
+
+class QueryRecorder:
+    """Execute wrapper collecting per-statement timings for one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.fingerprint_time = defaultdict(float)
+        self.slowest = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+
+            key = fingerprint(sql)
+            self.fingerprints[key] += 1
+            self.fingerprint_time[key] += elapsed
+
+            if not many and (self.slowest is None or elapsed > self.slowest[0]):
+                self.slowest = (elapsed, sql, params, context['connection'].alias)
+
+    def duplicates(self, limit=5):
+        """The most repeated statements, the usual sign of an N+1"""
+        return [
+            (count, self.fingerprint_time[key] * 1000, key)
+            for key, count in self.fingerprints.most_common(limit)
+            if count > 1
+        ]
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Count queries and database time per request and report them.
+
+    Every response gets a Server-Timing header with the view action, query
+    count, database time and total time. Requests over SLOW_REQUEST_MS or
+    REQUEST_QUERY_BUDGET are logged to 'core.sql' with their most repeated
+    statement fingerprints and an EXPLAIN of the slowest statement.
+    Streaming responses are measured up to the point the stream starts.
+    Runs natively in both sync and async chains.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.slow_request_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+        self.query_budget = getattr(settings, 'REQUEST_QUERY_BUDGET', 50)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with self.record_queries(recorder):
+            response = self.get_response(request)
+        total_ms = self.add_timing(request, response, recorder, started)
+        if self.is_slow(recorder, total_ms):
+            self.log_slow_request(request, recorder, total_ms)
+        return response
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        # Connections belong to threads, and the async ORM runs this request's queries in
+        # one thread-sensitive worker thread, so the wrappers go on that thread's connections
+        stack = await sync_to_async(self.record_queries)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        total_ms = self.add_timing(request, response, recorder, started)
+        if self.is_slow(recorder, total_ms):
+            # The EXPLAIN is a blocking query
+            await sync_to_async(self.log_slow_request)(request, recorder, total_ms)
+        return response
+
+    def record_queries(self, recorder):
+        """ExitStack with recorder wrapped around every connection of the current thread"""
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        return stack
+
+    def add_timing(self, request, response, recorder, started):
+        """Set the Server-Timing header and return the total time in ms"""
+        total_ms = (time.perf_counter() - started) * 1000
+        response['Server-Timing'] = ', '.join([
+            f'view;desc="{self.view(request)}"',
+            f'db;desc="{recorder.count} queries";dur={recorder.duration * 1000:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+        return total_ms
+
+    def is_slow(self, recorder, total_ms):
+        return total_ms > self.slow_request_ms or recorder.count > self.query_budget
+
+    def view(self, request):
+        return getattr(request, '_instrumented_view', None) or request.path
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._instrumented_view = view_name(view_func, request)
+
+    def log_slow_request(self, request, recorder, total_ms):
+        lines = [
+            f'Slow request {request.method} {request.get_full_path()} ({self.view(request)}): '
+            f'{total_ms:.0f}ms total, {recorder.count} queries in {recorder.duration * 1000:.0f}ms'
+        ]
+        for count, duration_ms, key in recorder.duplicates():
+            lines.append(f'  {count}x ({duration_ms:.1f}ms) {key}')
+
+        if recorder.slowest is not None:
+            elapsed, sql, params, alias = recorder.slowest
+            lines.append(f'  Slowest ({elapsed * 1000:.1f}ms): {sql}')
+            lines.extend(f'    {row}' for row in self.explain(alias, sql, params))
+
+        logger.warning('\n'.join(lines))
+
+    def explain(self, alias, sql, params):
+        """Plan for a SELECT without executing it; never fails the request"""
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return []
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+                return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+        except DatabaseError as error:
+            return [f'EXPLAIN failed: {error}']
+
+
+class AsyncStreamingMiddleware:
+    """
+    Stream synchronous response bodies under ASGI instead of buffering them.
+
+    Django's ASGI handler reads a synchronous streaming_content into one list
+    before sending any of it, so a cycle export or forms zip would be held in
+    memory whole. Must come first in MIDDLEWARE to see the final response.
+    Not installed in a sync (WSGI) chain, which streams them as they are.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not iscoroutinefunction(get_response):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        markcoroutinefunction(self)
+
+    def __call__(self, request):
+        return self.__acall__(request)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if response.streaming and not response.is_async:
+            response.streaming_content = aiterate(iter(response.streaming_content))
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can also run in an async middleware chain.
+
+    WhiteNoiseMiddleware is sync only, and a single sync middleware makes
+    Django run the whole request, async views included, in a thread under
+    ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Looks at the filesystem; only in DEBUG
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaPinMiddleware:
+    """
+    Pin users to the primary database for a while after they write.
+
+    Any request with an unsafe method counts as a write. DRF authenticates
+    inside the view, so the user is read once the response is back.
+    Not installed without DATABASE_REPLICAS or a shared cache.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS or not settings.CACHE_IS_SHARED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.wrote(request):
+            pin_to_primary(request.user.pk)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.wrote(request):
+            await apin_to_primary(request.user.pk)
+        return response
+
+    def wrote(self, request):
+        user = getattr(request, 'user', None)
+        return request.method not in SAFE_METHODS and user is not None and user.is_authenticated
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:21
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def remove_duplicate_ratings(apps, schema_editor):
+    """Keep only the latest rating per (appraisal_review, criterion_name)"""
+    CompetencyRating = apps.get_model('core', 'CompetencyRating')
+    duplicates = (
+        CompetencyRating.objects
+        .values('appraisal_review', 'criterion_name')
+        .annotate(latest_id=Max('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for group in duplicates.iterator():
+        CompetencyRating.objects.filter(
+            appraisal_review=group['appraisal_review'],
+            criterion_name=group['criterion_name'],
+        ).exclude(id=group['latest_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_ratings, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='competencyrating',
+            unique_together={('appraisal_review', 'criterion_name')},
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:22
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    """Seed the running totals from the existing ratings"""
+    AppraisalReview = apps.get_model('core', 'AppraisalReview')
+    CompetencyRating = apps.get_model('core', 'CompetencyRating')
+    OverallEvaluation = apps.get_model('core', 'OverallEvaluation')
+
+    review_ratings = (
+        CompetencyRating.objects
+        .filter(appraisal_review=OuterRef('pk'))
+        .values('appraisal_review')
+    )
+    AppraisalReview.objects.update(
+        rating_sum=Coalesce(
+            Subquery(review_ratings.annotate(total=Sum('rating')).values('total')),
+            Value(0), output_field=IntegerField()
+        ),
+        rating_count=Coalesce(
+            Subquery(review_ratings.annotate(count=Count('id')).values('count')),
+            Value(0), output_field=IntegerField()
+        ),
+    )
+
+    evaluation_ratings = (
+        CompetencyRating.objects
+        .filter(appraisal_review__appraisal=OuterRef('appraisal'), appraisal_review__is_completed=True)
+        .values('appraisal_review__appraisal')
+    )
+    OverallEvaluation.objects.update(
+        rating_sum=Coalesce(
+            Subquery(evaluation_ratings.annotate(total=Sum('rating')).values('total')),
+            Value(0), output_field=IntegerField()
+        ),
+        rating_count=Coalesce(
+            Subquery(evaluation_ratings.annotate(count=Count('id')).values('count')),
+            Value(0), output_field=IntegerField()
+        ),
+        overall_rating_avg=Subquery(evaluation_ratings.annotate(avg=Avg('rating')).values('avg')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_competencyrating_unique_criterion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appraisalreview',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='appraisalreview',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='overallevaluation',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='overallevaluation',
+            name='rating_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,107 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:24
+
+import base64
+import binascii
+import hashlib
+import django.db.models.deletion
+from django.db import migrations, models
+
+SIGNATURE_FIELDS = [
+    ('AppraisalReview', 'reviewer_signature_base64', 'reviewer_signature'),
+    ('OverallEvaluation', 'appraisee_signature_base64', 'appraisee_signature'),
+    ('OverallEvaluation', 'hr_signature_base64', 'hr_signature'),
+]
+
+
+def decode_signature(value):
+    """Return (content_type, bytes) for a stored data URL or bare base64 string"""
+    content_type = 'image/png'
+    if value.startswith('data:'):
+        header, _, value = value.partition(',')
+        content_type = header[len('data:'):].split(';')[0] or content_type
+    try:
+        return content_type, base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        # Keep unreadable legacy values byte-for-byte rather than dropping them
+        return 'application/octet-stream', value.encode()
+
+
+def move_signatures_to_blobs(apps, schema_editor):
+    """Copy inline base64 signatures into deduplicated SignatureBlob rows"""
+    SignatureBlob = apps.get_model('core', 'SignatureBlob')
+
+    for model_name, old_field, new_field in SIGNATURE_FIELDS:
+        Model = apps.get_model('core', model_name)
+        rows = Model.objects.exclude(**{old_field: ''}).values_list('pk', old_field)
+        for pk, value in rows.iterator():
+            content_type, data = decode_signature(value)
+            digest = hashlib.sha256(data).hexdigest()
+            SignatureBlob.objects.get_or_create(
+                digest=digest,
+                defaults={'content_type': content_type, 'data': data, 'size': len(data)}
+            )
+            Model.objects.filter(pk=pk).update(**{f'{new_field}_id': digest})
+
+
+def move_blobs_to_signatures(apps, schema_editor):
+    """Inline the referenced blobs again as data URLs"""
+    SignatureBlob = apps.get_model('core', 'SignatureBlob')
+
+    for model_name, old_field, new_field in SIGNATURE_FIELDS:
+        Model = apps.get_model('core', model_name)
+        rows = Model.objects.exclude(**{f'{new_field}__isnull': True}).values_list('pk', f'{new_field}_id')
+        for pk, digest in rows.iterator():
+            blob = SignatureBlob.objects.get(digest=digest)
+            encoded = base64.b64encode(bytes(blob.data)).decode()
+            Model.objects.filter(pk=pk).update(**{old_field: f'data:{blob.content_type};base64,{encoded}'})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignatureBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('content_type', models.CharField(default='image/png', max_length=100)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='appraisalreview',
+            name='reviewer_signature',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.signatureblob'),
+        ),
+        migrations.AddField(
+            model_name='overallevaluation',
+            name='appraisee_signature',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.signatureblob'),
+        ),
+        migrations.AddField(
+            model_name='overallevaluation',
+            name='hr_signature',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.signatureblob'),
+        ),
+        migrations.RunPython(move_signatures_to_blobs, move_blobs_to_signatures),
+        migrations.RemoveField(
+            model_name='appraisalreview',
+            name='reviewer_signature_base64',
+        ),
+        migrations.RemoveField(
+            model_name='overallevaluation',
+            name='appraisee_signature_base64',
+        ),
+        migrations.RemoveField(
+            model_name='overallevaluation',
+            name='hr_signature_base64',
+        ),
+    ]
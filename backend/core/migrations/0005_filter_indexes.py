@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0004_signature_blobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appraisal',
+            index=models.Index(fields=['cycle', 'status'], name='appraisal_cycle_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appraisal',
+            index=models.Index(fields=['project', 'cycle'], name='appraisal_project_cycle_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appraisalcycle',
+            index=models.Index(fields=['company', 'status'], name='cycle_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appraisalreview',
+            index=models.Index(fields=['reviewer', 'is_completed'], name='review_reviewer_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competencyrating',
+            index=models.Index(fields=['appraisal_review', 'category'], name='rating_review_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectmembership',
+            index=models.Index(fields=['project', 'role'], name='membership_project_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['company', 'division'], name='user_company_division_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+TABLE = 'token_blacklist_outstandingtoken'
+INDEX = 'outstandingtoken_expires_idx'
+
+
+def create_index(apps, schema_editor):
+    """Index expires_at so purge batches don't scan the whole token table"""
+    # Build without blocking logins on large Postgres tables
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(f'CREATE INDEX {concurrently}IF NOT EXISTS {INDEX} ON {TABLE} (expires_at)')
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX}')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0005_filter_indexes'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
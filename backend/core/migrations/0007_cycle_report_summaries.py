@@ -0,0 +1,80 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_stale_partitions(apps, schema_editor):
+    """Start every existing (cycle, project) as stale so the first report builds it"""
+    Appraisal = apps.get_model('core', 'Appraisal')
+    CycleReportPartition = apps.get_model('core', 'CycleReportPartition')
+    pairs = Appraisal.objects.values_list('cycle_id', 'project_id').distinct().order_by()
+    CycleReportPartition.objects.bulk_create(
+        [CycleReportPartition(cycle_id=cycle_id, project_id=project_id) for cycle_id, project_id in pairs.iterator()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_outstanding_token_expiry_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CycleProgressSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('division', models.CharField(blank=True, max_length=255)),
+                ('appraisals', models.PositiveIntegerField(default=0)),
+                ('appraisals_completed', models.PositiveIntegerField(default=0)),
+                ('reviews', models.PositiveIntegerField(default=0)),
+                ('reviews_completed', models.PositiveIntegerField(default=0)),
+                ('evaluations_finalized', models.PositiveIntegerField(default=0)),
+                ('ready_for_advanced_work', models.PositiveIntegerField(default=0)),
+                ('ready_for_promotion', models.PositiveIntegerField(default=0)),
+                ('cycle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.appraisalcycle')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.project')),
+            ],
+            options={
+                'ordering': ['cycle', 'project', 'division'],
+                'unique_together': {('cycle', 'project', 'division')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CycleRatingSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('division', models.CharField(blank=True, max_length=255)),
+                ('category', models.CharField(choices=[('WORK_EFFICIENCY', 'Work Efficiency'), ('PRODUCTIVITY', 'Productivity & Supervisory'), ('PERSONAL', 'Personal Attributes')], max_length=20)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('cycle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.appraisalcycle')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.project')),
+            ],
+            options={
+                'ordering': ['cycle', 'project', 'division', 'category'],
+                'unique_together': {('cycle', 'project', 'division', 'category')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CycleReportPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_stale', models.BooleanField(default=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('cycle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_partitions', to='core.appraisalcycle')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.project')),
+            ],
+            options={
+                'unique_together': {('cycle', 'project')},
+            },
+        ),
+        migrations.RunPython(create_stale_partitions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_cycle_report_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppraisalDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_updated_at', models.DateTimeField()),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('rendered_at', models.DateTimeField(auto_now=True)),
+                ('appraisal', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='document', to='core.appraisal')),
+            ],
+            options={
+                'ordering': ['appraisal'],
+            },
+        ),
+    ]
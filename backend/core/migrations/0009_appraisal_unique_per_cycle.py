@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-17 03:47
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def check_duplicate_appraisals(apps, schema_editor):
+    """Refuse to migrate while a (cycle, appraisee, project) has more than one appraisal
+
+    Each duplicate carries its own reviews, ratings and evaluation, so picking one to
+    delete has to be a human decision rather than something the migration does silently.
+    """
+    Appraisal = apps.get_model('core', 'Appraisal')
+    duplicates = list(
+        Appraisal.objects
+        .values('cycle', 'appraisee', 'project')
+        .annotate(ids=Count('id'))
+        .filter(ids__gt=1)
+        .order_by('cycle', 'appraisee', 'project')
+    )
+    if duplicates:
+        conflicts = '\n'.join(
+            f"  cycle={group['cycle']} appraisee={group['appraisee']} project={group['project']}"
+            f" ({group['ids']} appraisals)"
+            for group in duplicates
+        )
+        raise RuntimeError(
+            'Cannot make appraisals unique per cycle: merge or delete the duplicates '
+            f'for these (cycle, appraisee, project) groups first:\n{conflicts}'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_appraisal_documents'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_appraisals, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='appraisal',
+            unique_together={('cycle', 'appraisee', 'project')},
+        ),
+    ]
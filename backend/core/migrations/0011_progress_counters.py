@@ -0,0 +1,79 @@
+# Generated by Django 5.2.6 on 2026-10-17 04:05
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+
+def count(queryset, group):
+    return Coalesce(
+        Subquery(queryset.order_by().values(group).annotate(count=Count('id')).values('count')),
+        Value(0), output_field=IntegerField()
+    )
+
+
+def backfill_progress(apps, schema_editor):
+    """Seed the counters from the existing reviews; status follows them from now on"""
+    Appraisal = apps.get_model('core', 'Appraisal')
+    AppraisalCycle = apps.get_model('core', 'AppraisalCycle')
+    AppraisalReview = apps.get_model('core', 'AppraisalReview')
+
+    reviews = AppraisalReview.objects.filter(appraisal=OuterRef('pk'))
+    Appraisal.objects.update(
+        reviews_total=count(reviews, 'appraisal'),
+        reviews_completed=count(reviews.filter(is_completed=True), 'appraisal'),
+    )
+    Appraisal.objects.update(status=Case(
+        When(reviews_completed=0, then=Value('PENDING')),
+        When(reviews_completed__gte=F('reviews_total'), then=Value('COMPLETED')),
+        default=Value('IN_PROGRESS'),
+    ))
+
+    appraisals = Appraisal.objects.filter(cycle=OuterRef('pk'))
+    AppraisalCycle.objects.update(
+        appraisals_pending=count(appraisals.filter(status='PENDING'), 'cycle'),
+        appraisals_in_progress=count(appraisals.filter(status='IN_PROGRESS'), 'cycle'),
+        appraisals_completed=count(appraisals.filter(status='COMPLETED'), 'cycle'),
+        appraisals_finalized=count(appraisals.filter(overall_evaluation__finalized_at__isnull=False), 'cycle'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appraisal',
+            name='reviews_completed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='appraisal',
+            name='reviews_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='appraisalcycle',
+            name='appraisals_completed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='appraisalcycle',
+            name='appraisals_finalized',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='appraisalcycle',
+            name='appraisals_in_progress',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='appraisalcycle',
+            name='appraisals_pending',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
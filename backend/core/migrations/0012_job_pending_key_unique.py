@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 04:27
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+PENDING = ['QUEUED', 'RUNNING']
+
+
+def fail_duplicate_jobs(apps, schema_editor):
+    """Fail all but the oldest pending job per key, which the unique index could not hold"""
+    Job = apps.get_model('core', 'Job')
+    older = Job.objects.filter(key=OuterRef('key'), status__in=PENDING, pk__lt=OuterRef('pk'))
+    now = timezone.now()
+    Job.objects.filter(status__in=PENDING).exclude(key='').filter(Exists(older)).update(
+        status='FAILED', error='Duplicate of an older pending job with the same key',
+        finished_at=now, updated_at=now,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_progress_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['QUEUED', 'RUNNING']), models.Q(('key', ''), _negated=True)), fields=('key',), name='job_pending_key_unique'),
+        ),
+    ]
@@ -1,6 +1,49 @@
-from django.db import models
+import base64
+import binascii
+import hashlib
+from django.db import models, transaction
+from django.db.models import Case, Count, Exists, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
+
+# Running totals maintained with F() updates; never written back from memory
+RATING_AGGREGATE_FIELDS = ('rating_sum', 'rating_count', 'overall_rating_avg')
+PROGRESS_FIELDS = ('status', 'reviews_total', 'reviews_completed')
+CYCLE_PROGRESS_FIELDS = (
+    'appraisals_pending', 'appraisals_in_progress', 'appraisals_completed', 'appraisals_finalized'
+)
+
+# Image types a signature may be, by the bytes every such file starts with
+SIGNATURE_TYPES = {
+    'image/png': b'\x89PNG\r\n\x1a\n',
+    'image/jpeg': b'\xff\xd8\xff',
+}
+
+# Appraisal.status -> the AppraisalCycle counter it is tallied in
+STATUS_COUNTERS = {
+    'PENDING': 'appraisals_pending',
+    'IN_PROGRESS': 'appraisals_in_progress',
+    'COMPLETED': 'appraisals_completed',
+}
+
+
+def progress_status(total, completed):
+    """The appraisal status implied by its review counters"""
+    if completed == 0:
+        return 'PENDING'
+    if completed >= total:
+        return 'COMPLETED'
+    return 'IN_PROGRESS'
+
+
+def fields_excluding(instance, excluded):
+    """Concrete field names to pass as update_fields, minus the excluded ones"""
+    return [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in excluded
+    ]
 
 
 class BaseModel(models.Model):
@@ -55,6 +98,9 @@ class User(AbstractUser, BaseModel):
 
     class Meta:
         ordering = ['last_name', 'first_name']
+        indexes = [
+            models.Index(fields=['company', 'division'], name='user_company_division_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.email})"
@@ -101,6 +147,9 @@ class ProjectMembership(BaseModel):
     class Meta:
         unique_together = ['project', 'user']
         ordering = ['project', 'user']
+        indexes = [
+            models.Index(fields=['project', 'role'], name='membership_project_role_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.project.name} ({self.role})"
@@ -122,13 +171,46 @@ class AppraisalCycle(BaseModel):
     period_start = models.DateField()
     period_end = models.DateField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='DRAFT')
+    # Appraisals by status, and those with a finalized evaluation
+    appraisals_pending = models.PositiveIntegerField(default=0)
+    appraisals_in_progress = models.PositiveIntegerField(default=0)
+    appraisals_completed = models.PositiveIntegerField(default=0)
+    appraisals_finalized = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['-period_start']
+        indexes = [
+            models.Index(fields=['company', 'status'], name='cycle_company_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.company.name} - {self.period_start} to {self.period_end} ({self.status})"
 
+    def save(self, *args, **kwargs):
+        """Override save to leave the progress counters to their F() updates"""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = fields_excluding(self, CYCLE_PROGRESS_FIELDS)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def shift_progress(cycles, **deltas):
+        """Add the deltas to the cycles' progress counters in one UPDATE"""
+        changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if changes:
+            cycles.update(**changes)
+
+    @staticmethod
+    def recount_progress(cycles):
+        """Recount the progress counters from scratch, for appraisals written in bulk"""
+        def count(**filters):
+            appraisals = Appraisal.objects.filter(cycle=OuterRef('pk'), **filters).order_by().values('cycle')
+            return Coalesce(Subquery(appraisals.annotate(count=Count('pk')).values('count')), 0)
+
+        cycles.update(
+            **{field: count(status=status) for status, field in STATUS_COUNTERS.items()},
+            appraisals_finalized=count(overall_evaluation__finalized_at__isnull=False),
+        )
+
 
 class Appraisal(BaseModel):
     """Appraisal model - one per appraisee per cycle per project"""
@@ -154,14 +236,152 @@ class Appraisal(BaseModel):
         related_name='appraisals'
     )
     discussion_date = models.DateField(null=True, blank=True)
+    # Follows the review counters, see progress_status()
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='PENDING')
+    reviews_total = models.PositiveIntegerField(default=0)
+    reviews_completed = models.PositiveIntegerField(default=0)
 
     class Meta:
+        unique_together = ['cycle', 'appraisee', 'project']
         ordering = ['-cycle__period_start', 'appraisee']
+        indexes = [
+            models.Index(fields=['cycle', 'status'], name='appraisal_cycle_status_idx'),
+            models.Index(fields=['project', 'cycle'], name='appraisal_project_cycle_idx'),
+        ]
 
     def __str__(self):
         return f"Appraisal for {self.appraisee.get_full_name()} - {self.project.name}"
 
+    def save(self, *args, **kwargs):
+        """Override save to count the appraisal in its cycle and flag its report partitions"""
+        with transaction.atomic():
+            if self._state.adding:
+                self.status = progress_status(self.reviews_total, self.reviews_completed)
+                super().save(*args, **kwargs)
+                AppraisalCycle.shift_progress(
+                    AppraisalCycle.objects.filter(pk=self.cycle_id), **{STATUS_COUNTERS[self.status]: 1}
+                )
+            else:
+                if kwargs.get('update_fields') is None:
+                    kwargs['update_fields'] = fields_excluding(self, PROGRESS_FIELDS)
+                previous = Appraisal.objects.select_for_update().filter(pk=self.pk).values(
+                    'cycle_id', 'status', 'overall_evaluation__finalized_at'
+                ).first()
+                # The old partition, in case the cycle or project changed
+                CycleReportPartition.mark_stale(Appraisal.objects.filter(pk=self.pk))
+                super().save(*args, **kwargs)
+                if previous is not None and previous['cycle_id'] != self.cycle_id:
+                    counts = {
+                        STATUS_COUNTERS[previous['status']]: 1,
+                        'appraisals_finalized': int(previous['overall_evaluation__finalized_at'] is not None),
+                    }
+                    AppraisalCycle.shift_progress(
+                        AppraisalCycle.objects.filter(pk=previous['cycle_id']),
+                        **{field: -count for field, count in counts.items()}
+                    )
+                    AppraisalCycle.shift_progress(AppraisalCycle.objects.filter(pk=self.cycle_id), **counts)
+            CycleReportPartition.touch(self.cycle_id, [self.project_id])
+
+    @classmethod
+    def shift_review_counts(cls, appraisal_id, total_delta, completed_delta):
+        """Move the review counters, the status with them, and the cycle's status counts"""
+        with transaction.atomic():
+            previous = cls.objects.select_for_update().filter(pk=appraisal_id).values(
+                'cycle_id', 'status', 'reviews_total', 'reviews_completed'
+            ).first()
+            if previous is None:
+                return
+            total = previous['reviews_total'] + total_delta
+            completed = previous['reviews_completed'] + completed_delta
+            status = progress_status(total, completed)
+
+            cls.objects.filter(pk=appraisal_id).update(
+                reviews_total=total, reviews_completed=completed, status=status, updated_at=timezone.now()
+            )
+            if status != previous['status']:
+                AppraisalCycle.shift_progress(
+                    AppraisalCycle.objects.filter(pk=previous['cycle_id']),
+                    **{STATUS_COUNTERS[previous['status']]: -1, STATUS_COUNTERS[status]: 1}
+                )
+
+    @staticmethod
+    def recount_progress(appraisals):
+        """Recount review counters and status from scratch, for reviews written in bulk"""
+        def count(**filters):
+            reviews = AppraisalReview.objects.filter(appraisal=OuterRef('pk'), **filters).order_by().values('appraisal')
+            return Coalesce(Subquery(reviews.annotate(count=Count('pk')).values('count')), 0)
+
+        appraisals.update(reviews_total=count(), reviews_completed=count(is_completed=True))
+        # A second pass, so the status reads the new counters
+        appraisals.update(status=Case(
+            When(reviews_completed=0, then=Value('PENDING')),
+            When(reviews_completed__gte=F('reviews_total'), then=Value('COMPLETED')),
+            default=Value('IN_PROGRESS'),
+        ))
+
+    def delete(self, *args, **kwargs):
+        """Override delete to flag the appraisal's cycle report partition"""
+        with transaction.atomic():
+            CycleReportPartition.objects.filter(
+                cycle_id=self.cycle_id, project_id=self.project_id
+            ).update(is_stale=True)
+            return super().delete(*args, **kwargs)
+
+
+class SignatureBlob(models.Model):
+    """Signature image stored once per distinct content, keyed by its SHA-256"""
+    digest = models.CharField(max_length=64, primary_key=True)
+    content_type = models.CharField(max_length=100, default='image/png')
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.content_type}, {self.size} bytes)"
+
+    @staticmethod
+    def image_type(data):
+        """Content type of a PNG or JPEG image by its magic bytes, otherwise None"""
+        for content_type, magic in SIGNATURE_TYPES.items():
+            if data.startswith(magic):
+                return content_type
+        return None
+
+    @classmethod
+    def decode_data_url(cls, value):
+        """Split a data URL (or bare base64) of a PNG or JPEG into its content type and bytes"""
+        declared = None
+        if value.startswith('data:'):
+            header, _, value = value.partition(',')
+            declared = header[len('data:'):].split(';')[0] or None
+
+        try:
+            data = base64.b64decode(value, validate=True)
+        except (binascii.Error, ValueError):
+            raise ValueError('Signature must be a base64-encoded image or data URL.')
+
+        # The bytes decide the type; a data URL may not claim another one
+        content_type = cls.image_type(data)
+        if content_type is None or declared not in (None, content_type):
+            raise ValueError('Signature must be a PNG or JPEG image.')
+        return content_type, data
+
+    @classmethod
+    def from_data_url(cls, value):
+        """Unsaved blob for a data URL, keyed by the digest of its bytes"""
+        content_type, data = cls.decode_data_url(value)
+        return cls(
+            digest=hashlib.sha256(data).hexdigest(), content_type=content_type, data=data, size=len(data)
+        )
+
+    @classmethod
+    def store(cls, blobs):
+        """Save the blobs that are not stored yet; identical images share a row"""
+        cls.objects.bulk_create(blobs, ignore_conflicts=True)
+
 
 class AppraisalReview(BaseModel):
     """Appraisal Review - one per reporter per appraisal"""
@@ -176,16 +396,78 @@ class AppraisalReview(BaseModel):
         related_name='reviews_given'
     )
     is_completed = models.BooleanField(default=False)
-    reviewer_signature_base64 = models.TextField(blank=True)
+    reviewer_signature = models.ForeignKey(
+        SignatureBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
     reviewer_signed_at = models.DateTimeField(null=True, blank=True)
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
 
     class Meta:
+        # unique_together already indexes (appraisal, reviewer)
         unique_together = ['appraisal', 'reviewer']
         ordering = ['appraisal', 'reviewer']
+        indexes = [
+            models.Index(fields=['reviewer', 'is_completed'], name='review_reviewer_completed_idx'),
+        ]
 
     def __str__(self):
         return f"Review by {self.reviewer.get_full_name()} for {self.appraisal.appraisee.get_full_name()}"
 
+    @classmethod
+    def apply_rating_delta(cls, review_id, sum_delta, count_delta):
+        """Shift a review's running totals, and its evaluation's if completed"""
+        cls.objects.filter(pk=review_id).update(
+            rating_sum=F('rating_sum') + sum_delta,
+            rating_count=F('rating_count') + count_delta,
+            updated_at=timezone.now(),
+        )
+        OverallEvaluation.shift_rating_totals(
+            OverallEvaluation.objects.filter(
+                appraisal__reviews=review_id,
+                appraisal__reviews__is_completed=True
+            ),
+            sum_delta,
+            count_delta
+        )
+
+    def save(self, *args, **kwargs):
+        """Override save to move the review's totals in or out of the evaluation and progress"""
+        if self._state.adding:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                Appraisal.shift_review_counts(self.appraisal_id, 1, int(self.is_completed))
+                CycleReportPartition.mark_stale(Appraisal.objects.filter(pk=self.appraisal_id))
+            return
+
+        if kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = fields_excluding(self, RATING_AGGREGATE_FIELDS)
+
+        with transaction.atomic():
+            previous = AppraisalReview.objects.select_for_update().filter(pk=self.pk).values(
+                'is_completed', 'rating_sum', 'rating_count'
+            ).first()
+            super().save(*args, **kwargs)
+
+            toggled = (
+                previous is not None
+                and 'is_completed' in kwargs['update_fields']
+                and previous['is_completed'] != self.is_completed
+            )
+            if toggled:
+                sign = 1 if self.is_completed else -1
+                OverallEvaluation.shift_rating_totals(
+                    OverallEvaluation.objects.filter(appraisal_id=self.appraisal_id),
+                    sign * previous['rating_sum'],
+                    sign * previous['rating_count']
+                )
+                Appraisal.shift_review_counts(self.appraisal_id, 0, sign)
+                CycleReportPartition.mark_stale(Appraisal.objects.filter(pk=self.appraisal_id))
+
 
 class CompetencyRating(BaseModel):
     """Competency rating - multiple per review"""
@@ -214,11 +496,43 @@ class CompetencyRating(BaseModel):
     comments = models.TextField(blank=True)
 
     class Meta:
+        unique_together = ['appraisal_review', 'criterion_name']
         ordering = ['appraisal_review', 'category', 'criterion_name']
+        indexes = [
+            models.Index(fields=['appraisal_review', 'category'], name='rating_review_category_idx'),
+        ]
 
     def __str__(self):
         return f"{self.criterion_name} - {self.get_rating_display()}"
 
+    def save(self, *args, **kwargs):
+        """Override save to apply the change to the running rating totals"""
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = CompetencyRating.objects.select_for_update().filter(pk=self.pk).values_list(
+                    'appraisal_review_id', 'rating'
+                ).first()
+            super().save(*args, **kwargs)
+            review_ids = {self.appraisal_review_id}
+            if previous is not None:
+                review_ids.add(previous[0])
+            CycleReportPartition.mark_stale(Appraisal.objects.filter(reviews__in=review_ids))
+
+            if previous is None:
+                AppraisalReview.apply_rating_delta(self.appraisal_review_id, self.rating, 1)
+                return
+
+            previous_review_id, previous_rating = previous
+            if previous_review_id == self.appraisal_review_id:
+                if previous_rating != self.rating:
+                    AppraisalReview.apply_rating_delta(
+                        self.appraisal_review_id, self.rating - previous_rating, 0
+                    )
+            else:
+                AppraisalReview.apply_rating_delta(previous_review_id, -previous_rating, -1)
+                AppraisalReview.apply_rating_delta(self.appraisal_review_id, self.rating, 1)
+
 
 class OverallEvaluation(BaseModel):
     """Overall evaluation - one per appraisal (aggregates all reviews)"""
@@ -236,12 +550,26 @@ class OverallEvaluation(BaseModel):
         related_name='overall_evaluation'
     )
     overall_rating_avg = models.FloatField(null=True, blank=True)
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
     ready_for_advanced_work = models.BooleanField(default=False)
     ready_for_promotion = models.BooleanField(default=False)
     summary_comment = models.TextField(blank=True)
-    appraisee_signature_base64 = models.TextField(blank=True)
+    appraisee_signature = models.ForeignKey(
+        SignatureBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
     appraisee_signed_at = models.DateTimeField(null=True, blank=True)
-    hr_signature_base64 = models.TextField(blank=True)
+    hr_signature = models.ForeignKey(
+        SignatureBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
     hr_signed_at = models.DateTimeField(null=True, blank=True)
     finalized_at = models.DateTimeField(null=True, blank=True)
 
@@ -251,26 +579,214 @@ class OverallEvaluation(BaseModel):
     def __str__(self):
         return f"Overall Evaluation for {self.appraisal.appraisee.get_full_name()}"
 
-    def calculate_average_rating(self):
-        """Calculate average rating from all completed reviews"""
-        completed_reviews = self.appraisal.reviews.filter(is_completed=True)
-        if not completed_reviews.exists():
-            return None
-
-        all_ratings = CompetencyRating.objects.filter(
-            appraisal_review__in=completed_reviews
+    @staticmethod
+    def shift_rating_totals(evaluations, sum_delta, count_delta):
+        """Apply a rating delta to the evaluations' totals and average in one UPDATE"""
+        if not sum_delta and not count_delta:
+            return
+
+        new_sum = F('rating_sum') + sum_delta
+        new_count = F('rating_count') + count_delta
+        evaluations.update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            overall_rating_avg=Case(
+                When(rating_count__gt=-count_delta, then=Cast(new_sum, FloatField()) / new_count),
+                default=None,
+                output_field=FloatField()
+            ),
+            updated_at=timezone.now(),
         )
 
-        if not all_ratings.exists():
-            return None
+    def calculate_rating_totals(self):
+        """Calculate rating sum and count from all completed reviews from scratch"""
+        totals = CompetencyRating.objects.filter(
+            appraisal_review__appraisal=self.appraisal_id,
+            appraisal_review__is_completed=True
+        ).aggregate(total=Sum('rating'), count=Count('id'))
 
-        total = sum(rating.rating for rating in all_ratings)
-        count = all_ratings.count()
+        return totals['total'] or 0, totals['count']
 
+    def calculate_average_rating(self):
+        """Calculate average rating from all completed reviews from scratch"""
+        total, count = self.calculate_rating_totals()
         return total / count if count > 0 else None
 
     def save(self, *args, **kwargs):
-        """Override save to auto-calculate average rating"""
-        if self.pk:  # Only if already exists
-            self.overall_rating_avg = self.calculate_average_rating()
-        super().save(*args, **kwargs)
+        """Override save to seed the totals once and count finalizing in the cycle"""
+        if self._state.adding:
+            self.rating_sum, self.rating_count = self.calculate_rating_totals()
+            self.overall_rating_avg = (
+                self.rating_sum / self.rating_count if self.rating_count else None
+            )
+        elif kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = fields_excluding(self, RATING_AGGREGATE_FIELDS)
+
+        with transaction.atomic():
+            was_finalized = None
+            if self._state.adding:
+                was_finalized = False
+            elif 'finalized_at' in kwargs['update_fields']:
+                was_finalized = OverallEvaluation.objects.select_for_update().filter(
+                    pk=self.pk, finalized_at__isnull=False
+                ).exists()
+            super().save(*args, **kwargs)
+            CycleReportPartition.mark_stale(Appraisal.objects.filter(pk=self.appraisal_id))
+
+            finalized = self.finalized_at is not None
+            if was_finalized is not None and finalized != was_finalized:
+                AppraisalCycle.shift_progress(
+                    AppraisalCycle.objects.filter(appraisals=self.appraisal_id),
+                    appraisals_finalized=1 if finalized else -1
+                )
+
+
+class AppraisalDocument(models.Model):
+    """Rendered PDF form of an appraisal, current while source_updated_at matches its data"""
+    appraisal = models.OneToOneField(
+        Appraisal,
+        on_delete=models.CASCADE,
+        related_name='document'
+    )
+    source_updated_at = models.DateTimeField()
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()
+    rendered_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['appraisal']
+
+    def __str__(self):
+        return f"Form for appraisal {self.appraisal_id} ({self.size} bytes)"
+
+
+class CycleReportPartition(models.Model):
+    """
+    Dirty marker for the cycle report summaries of one (cycle, project).
+
+    Writes that change what the report counts set is_stale; the report
+    recomputes only stale partitions before reading the summary tables.
+    """
+    cycle = models.ForeignKey(
+        AppraisalCycle,
+        on_delete=models.CASCADE,
+        related_name='report_partitions'
+    )
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    is_stale = models.BooleanField(default=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['cycle', 'project']
+
+    def __str__(self):
+        return f"Report partition {self.cycle_id}/{self.project_id} ({'stale' if self.is_stale else 'fresh'})"
+
+    @classmethod
+    def mark_stale(cls, appraisals):
+        """Flag the partitions holding any of the given appraisals, in one UPDATE"""
+        cls.objects.filter(
+            Exists(appraisals.filter(cycle=OuterRef('cycle'), project=OuterRef('project')))
+        ).update(is_stale=True)
+
+    @classmethod
+    def touch(cls, cycle_id, project_ids):
+        """Create or flag the partitions of a cycle's projects, for newly added appraisals"""
+        cls.objects.bulk_create(
+            [cls(cycle_id=cycle_id, project_id=project_id, is_stale=True) for project_id in project_ids],
+            update_conflicts=True,
+            unique_fields=['cycle', 'project'],
+            update_fields=['is_stale']
+        )
+
+
+class CycleProgressSummary(models.Model):
+    """Appraisal, review and evaluation counts per cycle, project and division"""
+    cycle = models.ForeignKey(AppraisalCycle, on_delete=models.CASCADE, related_name='+')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    division = models.CharField(max_length=255, blank=True)
+    appraisals = models.PositiveIntegerField(default=0)
+    appraisals_completed = models.PositiveIntegerField(default=0)
+    reviews = models.PositiveIntegerField(default=0)
+    reviews_completed = models.PositiveIntegerField(default=0)
+    evaluations_finalized = models.PositiveIntegerField(default=0)
+    ready_for_advanced_work = models.PositiveIntegerField(default=0)
+    ready_for_promotion = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['cycle', 'project', 'division']
+        ordering = ['cycle', 'project', 'division']
+
+
+class CycleRatingSummary(models.Model):
+    """Rating histogram per cycle, project, division and competency category, over completed reviews"""
+    cycle = models.ForeignKey(AppraisalCycle, on_delete=models.CASCADE, related_name='+')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    division = models.CharField(max_length=255, blank=True)
+    category = models.CharField(max_length=20, choices=CompetencyRating.CATEGORY_CHOICES)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['cycle', 'project', 'division', 'category']
+        ordering = ['cycle', 'project', 'division', 'category']
+
+
+class Job(models.Model):
+    """Background job run by the run_worker command; see core.jobs"""
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    # Jobs sharing a key are not queued twice while one is pending
+    key = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+            models.Index(fields=['key', 'status'], name='job_key_status_idx'),
+        ]
+        constraints = [
+            # Concurrent enqueue() calls insert one pending job per key; the rest are ignored
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=Q(status__in=['QUEUED', 'RUNNING']) & ~Q(key=''),
+                name='job_pending_key_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
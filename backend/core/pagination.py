@@ -0,0 +1,182 @@
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on a multi-column key instead of OFFSET.
+
+    The key comes from the view's keyset_ordering, which must end in a unique
+    column (normally pk) and contain no nullable columns. Every page costs the
+    same however deep it is, and no COUNT(*) runs unless ?count=true is passed.
+    """
+    page_size = 20
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Above this many estimated rows the planner's estimate is returned as-is
+    exact_count_limit = 10000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = [
+            (field.lstrip('-'), field.startswith('-'))
+            for field in getattr(view, 'keyset_ordering', None) or ['pk']
+        ]
+        self.key_fields = [self.resolve_field(queryset.model, field) for field, _ in self.ordering]
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count, self.count_is_estimate = self.get_count(queryset)
+
+        values, self.reverse = self.decode_cursor(request)
+
+        queryset = queryset.annotate(**{
+            f'keyset_{i}': F(field) for i, (field, _) in enumerate(self.ordering)
+        }).order_by(*[
+            f'-{field}' if descending != self.reverse else field
+            for field, descending in self.ordering
+        ])
+        if values is not None:
+            queryset = queryset.filter(self.seek(values))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.page = rows
+        return rows
+
+    @staticmethod
+    def resolve_field(model, path):
+        """Model field at the end of a keyset_ordering path such as cycle__period_start"""
+        *relations, name = path.split('__')
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+    def seek(self, values):
+        """WHERE clause selecting the rows strictly after the key in page order"""
+        condition = Q()
+        for i, (field, descending) in enumerate(self.ordering):
+            lookup = 'lt' if descending != self.reverse else 'gt'
+            step = Q(**{f'{field}__{lookup}': values[i]})
+            for (prior_field, _), prior_value in zip(self.ordering[:i], values[:i]):
+                step &= Q(**{prior_field: prior_value})
+            condition |= step
+        return condition
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_count(self, queryset):
+        """Exact count for small result sets, the planner's estimate for huge ones"""
+        queryset = queryset.order_by()
+        estimate = self.estimate_count(queryset)
+        if estimate is None or estimate < self.exact_count_limit:
+            return queryset.count(), False
+        return estimate, True
+
+    def estimate_count(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values, reverse = cursor['v'], bool(cursor['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Key columns are never null, and a value the column cannot hold
+        # must not reach the database as a 500
+        try:
+            values = [
+                None if isinstance(value, (dict, list)) else field.to_python(value)
+                for field, value in zip(self.key_fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, row, reverse):
+        values = [getattr(row, f'keyset_{i}') for i in range(len(self.ordering))]
+        payload = json.dumps({'v': values, 'r': int(reverse)}, cls=DjangoJSONEncoder)
+        encoded = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_is_estimate'] = self.count_is_estimate
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_is_estimate': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
@@ -1,5 +1,5 @@
 from rest_framework import permissions
-from .models import ProjectMembership
+from .memberships import is_member, is_reporter
 
 
 class IsReporter(permissions.BasePermission):
@@ -20,26 +20,37 @@ class IsReporter(permissions.BasePermission):
         # Allow safe methods for all authenticated users
         if request.method in permissions.SAFE_METHODS:
             return True
+        return self.can_change(request, obj)
 
+    def can_change(self, request, obj):
+        """Whether an unsafe request may change obj; also used for the workspace flags"""
         # Check if user is a reporter in the related project
         user = request.user
 
         # Handle different object types
-        if hasattr(obj, 'project'):
-            project = obj.project
+        if hasattr(obj, 'project_id'):
+            project_id = obj.project_id
         elif hasattr(obj, 'appraisal'):
-            project = obj.appraisal.project
+            project_id = obj.appraisal.project_id
         else:
             return False
 
-        # Check if user is a REPORTER in this project
-        is_reporter = ProjectMembership.objects.filter(
-            project=project,
-            user=user,
-            role='REPORTER'
-        ).exists()
+        # Staff skip the lookup; otherwise the user must be a REPORTER in this project
+        return user.is_staff or is_reporter(request, project_id)
 
-        return is_reporter or user.is_staff
+
+class IsOpenEvaluation(permissions.BasePermission):
+    """Overall evaluations can only be changed until they are finalized"""
+
+    message = "A finalized evaluation can no longer be changed."
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return self.can_change(request, obj)
+
+    def can_change(self, request, obj):
+        return obj.finalized_at is None
 
 
 class IsSameProject(permissions.BasePermission):
@@ -61,18 +72,12 @@ class IsSameProject(permissions.BasePermission):
             return True
 
         # For appraisals, check if reviewer and appraisee are in same project
-        if hasattr(obj, 'appraisee') and hasattr(obj, 'project'):
+        if hasattr(obj, 'appraisee_id') and hasattr(obj, 'project_id'):
             # Check if reviewer is in the project
-            reviewer_in_project = ProjectMembership.objects.filter(
-                project=obj.project,
-                user=user
-            ).exists()
+            reviewer_in_project = is_member(request, obj.project_id)
 
             # Check if appraisee is in the project
-            appraisee_in_project = ProjectMembership.objects.filter(
-                project=obj.project,
-                user=obj.appraisee
-            ).exists()
+            appraisee_in_project = is_member(request, obj.project_id, user_id=obj.appraisee_id)
 
             return reviewer_in_project and appraisee_in_project
 
@@ -98,26 +103,24 @@ class CanCreateAppraisal(permissions.BasePermission):
             return False
 
         # For creation, check the data being submitted
-        if request.method == 'POST':
+        if request.method == 'POST' and getattr(view, 'action', None) == 'create':
             project_id = request.data.get('project')
             appraisee_id = request.data.get('appraisee')
 
-            if not project_id or not appraisee_id:
+            try:
+                project_id, appraisee_id = int(project_id), int(appraisee_id)
+            except (TypeError, ValueError):
                 return False
 
+            if request.user.is_staff:
+                return True
+
             # Check if user is a REPORTER in the project
-            is_reporter = ProjectMembership.objects.filter(
-                project_id=project_id,
-                user=request.user,
-                role='REPORTER'
-            ).exists()
+            is_project_reporter = is_reporter(request, project_id)
 
             # Check if appraisee is a member of the project
-            appraisee_in_project = ProjectMembership.objects.filter(
-                project_id=project_id,
-                user_id=appraisee_id
-            ).exists()
+            appraisee_in_project = is_member(request, project_id, user_id=appraisee_id)
 
-            return (is_reporter and appraisee_in_project) or request.user.is_staff
+            return is_project_reporter and appraisee_in_project
 
         return True
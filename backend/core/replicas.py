@@ -0,0 +1,99 @@
+"""
+Read replica routing.
+
+Replicas are the DATABASE_REPLICAS aliases, built from DATABASE_REPLICA_URLS.
+Reads go to one of them only while use_replicas is set, which
+ReplicaReadMixin does for safe requests to list actions and read-only
+viewsets; every other read and every write uses the primary. A user who wrote is pinned to
+the primary for REPLICA_PIN_SECONDS (see ReplicaPinMiddleware), so their
+next requests never read rows the replicas have not caught up with yet.
+The pins live in the cache, so without CACHE_IS_SHARED every read stays on
+the primary.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+use_replicas = ContextVar('use_replicas', default=False)
+
+
+def pin_key(user_id):
+    return f'primary-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    cache.set(pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+async def apin_to_primary(user_id):
+    await cache.aset(pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(pin_key(user_id)) is not None
+
+
+@contextmanager
+def replica_reads():
+    """Route the reads of the current thread or task to the replicas until the block exits"""
+    token = use_replicas.set(True)
+    try:
+        yield
+    finally:
+        use_replicas.reset(token)
+
+
+class ReplicaRouter:
+    """Primary for writes and by default, a random replica inside replica_reads()"""
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and use_replicas.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication
+        return db == 'default'
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe requests for replica_actions from the replicas, unless the
+    requester is pinned to the primary.
+
+    The routing starts after authentication and permission checks, which
+    read cached or primary data, and ends when the response is finalized;
+    streaming bodies evaluated later read the primary.
+    """
+    replica_actions = ('list',)
+
+    def reads_from_replica(self, request):
+        return (
+            bool(settings.DATABASE_REPLICAS)
+            and settings.CACHE_IS_SHARED
+            and request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and not is_pinned(request.user.pk)
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.reads_from_replica(request):
+            self._replica_token = use_replicas.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            self._replica_token = None
+            use_replicas.reset(token)
+        return super().finalize_response(request, response, *args, **kwargs)
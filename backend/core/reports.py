@@ -0,0 +1,142 @@
+"""
+Cycle analytics computed with GROUP BY queries into summary tables.
+
+Each (cycle, project) partition is rebuilt only after a write flagged its
+CycleReportPartition as stale, so reading a report costs the same however
+many appraisals and ratings the cycle holds.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from .models import (
+    Appraisal, AppraisalReview, CompetencyRating,
+    CycleProgressSummary, CycleRatingSummary, CycleReportPartition
+)
+
+RATING_VALUES = [value for value, _ in CompetencyRating.RATING_CHOICES]
+
+
+def refresh_partition(partition_id):
+    """Recompute one stale partition's summary rows; a no-op if another request beat us to it"""
+    with transaction.atomic():
+        # Writers flag the partition with an UPDATE, which waits for this lock,
+        # so a change committed after our reads always leaves it stale again
+        partition = CycleReportPartition.objects.select_for_update().filter(
+            pk=partition_id, is_stale=True
+        ).first()
+        if partition is None:
+            return
+
+        scope = {'cycle_id': partition.cycle_id, 'project_id': partition.project_id}
+        CycleProgressSummary.objects.filter(**scope).delete()
+        CycleRatingSummary.objects.filter(**scope).delete()
+
+        progress = {}
+        appraisals = (
+            Appraisal.objects.filter(**scope)
+            .values(division=F('appraisee__division'))
+            .annotate(
+                appraisals=Count('id'),
+                appraisals_completed=Count('id', filter=Q(status='COMPLETED')),
+                evaluations_finalized=Count(
+                    'overall_evaluation', filter=Q(overall_evaluation__finalized_at__isnull=False)
+                ),
+                ready_for_advanced_work=Count(
+                    'overall_evaluation', filter=Q(overall_evaluation__ready_for_advanced_work=True)
+                ),
+                ready_for_promotion=Count(
+                    'overall_evaluation', filter=Q(overall_evaluation__ready_for_promotion=True)
+                ),
+            )
+            .order_by()
+        )
+        for row in appraisals:
+            progress[row['division']] = CycleProgressSummary(**scope, **row)
+
+        reviews = (
+            AppraisalReview.objects
+            .filter(appraisal__cycle_id=partition.cycle_id, appraisal__project_id=partition.project_id)
+            .values(division=F('appraisal__appraisee__division'))
+            .annotate(reviews=Count('id'), reviews_completed=Count('id', filter=Q(is_completed=True)))
+            .order_by()
+        )
+        for row in reviews:
+            # An appraisee's division can change between the two reads
+            summary = progress.setdefault(row['division'], CycleProgressSummary(**scope, division=row['division']))
+            summary.reviews, summary.reviews_completed = row['reviews'], row['reviews_completed']
+
+        ratings = (
+            CompetencyRating.objects
+            .filter(
+                appraisal_review__appraisal__cycle_id=partition.cycle_id,
+                appraisal_review__appraisal__project_id=partition.project_id,
+                appraisal_review__is_completed=True,
+            )
+            .values('category', division=F('appraisal_review__appraisal__appraisee__division'))
+            .annotate(
+                rating_sum=Sum('rating'),
+                rating_count=Count('id'),
+                **{f'rating_{value}': Count('id', filter=Q(rating=value)) for value in RATING_VALUES}
+            )
+            .order_by()
+        )
+
+        CycleProgressSummary.objects.bulk_create(progress.values())
+        CycleRatingSummary.objects.bulk_create([CycleRatingSummary(**scope, **row) for row in ratings])
+
+        partition.is_stale = False
+        partition.refreshed_at = timezone.now()
+        partition.save(update_fields=['is_stale', 'refreshed_at'])
+
+
+def refresh_stale_partitions(cycle):
+    for partition_id in cycle.report_partitions.filter(is_stale=True).values_list('pk', flat=True):
+        refresh_partition(partition_id)
+
+
+def build_cycle_report(cycle, project_ids=None):
+    """Report rows per project and division, limited to project_ids when given"""
+    refresh_stale_partitions(cycle)
+
+    # Order by the key columns alone; Meta.ordering would join the cycle and company
+    progress = (
+        CycleProgressSummary.objects.filter(cycle=cycle).select_related('project')
+        .order_by('project__name', 'project_id', 'division')
+    )
+    ratings = CycleRatingSummary.objects.filter(cycle=cycle).order_by('category')
+    if project_ids is not None:
+        progress = progress.filter(project_id__in=project_ids)
+        ratings = ratings.filter(project_id__in=project_ids)
+
+    categories = {}
+    for row in ratings:
+        categories.setdefault((row.project_id, row.division), []).append({
+            'category': row.category,
+            'average_rating': round(row.rating_sum / row.rating_count, 2) if row.rating_count else None,
+            'rating_count': row.rating_count,
+            'histogram': {str(value): getattr(row, f'rating_{value}') for value in RATING_VALUES},
+        })
+
+    groups = []
+    for row in progress:
+        groups.append({
+            'project': row.project_id,
+            'project_name': row.project.name,
+            'division': row.division,
+            'appraisals': row.appraisals,
+            'appraisals_completed': row.appraisals_completed,
+            'completion_rate': rate(row.appraisals_completed, row.appraisals),
+            'reviews': row.reviews,
+            'reviews_completed': row.reviews_completed,
+            'review_completion_rate': rate(row.reviews_completed, row.reviews),
+            'evaluations_finalized': row.evaluations_finalized,
+            'ready_for_advanced_work': row.ready_for_advanced_work,
+            'ready_for_promotion': row.ready_for_promotion,
+            'categories': categories.get((row.project_id, row.division), []),
+        })
+
+    return {'cycle': cycle.pk, 'groups': groups}
+
+
+def rate(part, whole):
+    return round(part / whole, 4) if whole else None
@@ -1,15 +1,170 @@
-from rest_framework import serializers
+from rest_framework import permissions, serializers
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
 from .models import (
     Company, User, Project, ProjectMembership,
     AppraisalCycle, Appraisal, AppraisalReview,
-    CompetencyRating, OverallEvaluation
+    CompetencyRating, OverallEvaluation, SignatureBlob, CycleReportPartition, Job
 )
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+def parse_field_paths(value):
+    """Turn 'a,b.c,b.d' into the nested tree {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def field_options_from_request(request):
+    """(fields tree or None for all, expand tree) requested via the query string"""
+    fields = request.query_params.get('fields')
+    only = None
+    # Never drop writable fields from a write; ?fields= only shapes reads
+    if fields and request.method in permissions.SAFE_METHODS:
+        only = parse_field_paths(fields)
+    return only, parse_field_paths(request.query_params.get('expand', ''))
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets and on-demand expansion via ?fields= and ?expand=.
+
+    Relations listed in Meta.expandable_fields are left out unless expanded or
+    named in ?fields=. Dotted paths reach nested serializers, e.g.
+    ?fields=id,status,reviews.reviewer_name&expand=reviews.competency_ratings
+    """
+    # (fields tree, expand tree) handed down by an enclosing DynamicFieldsMixin
+    field_options = None
+
+    @staticmethod
+    def keeps_field(name, only, expand, expandable):
+        if only is not None and name not in only:
+            return False
+        if name in expandable:
+            return name in expand or (only is not None and name in only)
+        return True
+
+    @classmethod
+    def includes(cls, request, path):
+        """Whether the dotted field path will be serialized for this request"""
+        only, expand = field_options_from_request(request)
+        serializer_class = cls
+
+        for name in path.split('.'):
+            if serializer_class is None:
+                return False
+            expandable = getattr(serializer_class.Meta, 'expandable_fields', ())
+            if not cls.keeps_field(name, only, expand, expandable):
+                return False
+
+            field = serializer_class._declared_fields.get(name)
+            nested = getattr(field, 'child', field)
+            serializer_class = type(nested) if isinstance(nested, DynamicFieldsMixin) else None
+            only = (only or {}).get(name) or None
+            expand = expand.get(name, {})
+
+        return True
+
+    def get_field_options(self):
+        if self.field_options is not None:
+            return self.field_options
+
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+
+        request = self.context.get('request')
+        if parent is not None or request is None:
+            return None, {}
+        return field_options_from_request(request)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only, expand = self.get_field_options()
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+
+        for name in list(fields):
+            if not self.keeps_field(name, only, expand, expandable):
+                del fields[name]
+                continue
+
+            nested = getattr(fields[name], 'child', fields[name])
+            if isinstance(nested, DynamicFieldsMixin):
+                nested.field_options = ((only or {}).get(name) or None, expand.get(name, {}))
+
+        return fields
+
+
+class SignatureUploadField(serializers.CharField):
+    """Write-only data URL, validated into an unsaved SignatureBlob (see SignatureStoreMixin)"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('write_only', True)
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('allow_blank', True)
+        kwargs.setdefault('allow_null', True)
+        super().__init__(**kwargs)
+
+    def run_validation(self, data=serializers.empty):
+        # Blank or null clears the signature
+        value = super().run_validation(data)
+        if not value:
+            return None
+        try:
+            return SignatureBlob.from_data_url(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+
+class SignatureStoreMixin:
+    """
+    Store the blobs of validated SignatureUploadFields and save their digests.
+
+    The blobs are only written together with the instance, so a request that
+    fails validation leaves no unreferenced images behind.
+    """
+
+    def store_signatures(self, validated_data):
+        blobs = {
+            name: value for name, value in validated_data.items() if isinstance(value, SignatureBlob)
+        }
+        SignatureBlob.store(list(blobs.values()))
+        for name, blob in blobs.items():
+            validated_data[name] = blob.digest
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            self.store_signatures(validated_data)
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            self.store_signatures(validated_data)
+            return super().update(instance, validated_data)
+
+
+class SignatureURLField(serializers.Field):
+    """URL of the cacheable signature endpoint instead of the image payload"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        url = reverse('signature-detail', args=[value])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """User serializer"""
     full_name = serializers.SerializerMethodField()
 
@@ -26,7 +181,7 @@ class UserSerializer(serializers.ModelSerializer):
         return obj.get_full_name()
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Company serializer"""
     class Meta:
         model = Company
@@ -34,7 +189,7 @@ class CompanySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Project serializer"""
     company_name = serializers.CharField(source='company.name', read_only=True)
 
@@ -47,7 +202,7 @@ class ProjectSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ProjectMembershipSerializer(serializers.ModelSerializer):
+class ProjectMembershipSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Project membership serializer"""
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     user_email = serializers.CharField(source='user.email', read_only=True)
@@ -62,20 +217,24 @@ class ProjectMembershipSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'joined_at', 'created_at']
 
 
-class AppraisalCycleSerializer(serializers.ModelSerializer):
+class AppraisalCycleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Appraisal cycle serializer"""
     company_name = serializers.CharField(source='company.name', read_only=True)
 
     class Meta:
         model = AppraisalCycle
         fields = [
-            'id', 'company', 'company_name', 'period_start', 'period_end',
-            'status', 'created_at', 'updated_at'
+            'id', 'company', 'company_name', 'period_start', 'period_end', 'status',
+            'appraisals_pending', 'appraisals_in_progress', 'appraisals_completed', 'appraisals_finalized',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'appraisals_pending', 'appraisals_in_progress', 'appraisals_completed',
+            'appraisals_finalized', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class CompetencyRatingSerializer(serializers.ModelSerializer):
+class CompetencyRatingSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Competency rating serializer"""
     rating_display = serializers.CharField(source='get_rating_display', read_only=True)
 
@@ -88,36 +247,128 @@ class CompetencyRatingSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
 
-class AppraisalReviewSerializer(serializers.ModelSerializer):
+class CompetencyRatingEntrySerializer(serializers.ModelSerializer):
+    """Single scorecard entry used by the bulk upsert"""
+    class Meta:
+        model = CompetencyRating
+        fields = ['category', 'criterion_name', 'rating', 'comments']
+
+
+class CompetencyRatingBulkUpsertSerializer(serializers.Serializer):
+    """Whole scorecard for one review, keyed on criterion_name"""
+    appraisal_review = serializers.PrimaryKeyRelatedField(queryset=AppraisalReview.objects.all())
+    ratings = CompetencyRatingEntrySerializer(many=True, allow_empty=False)
+
+    def validate_ratings(self, value):
+        names = [entry['criterion_name'] for entry in value]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise serializers.ValidationError(
+                f"Each criterion can only be rated once per scorecard: {', '.join(duplicates)}"
+            )
+        return value
+
+    def create(self, validated_data):
+        """Insert new criteria and update existing ones with one statement each"""
+        # Lock the review row so concurrent saves of the same scorecard serialize
+        appraisal_review = AppraisalReview.objects.select_for_update().get(
+            pk=validated_data['appraisal_review'].pk
+        )
+        existing = {
+            rating.criterion_name: rating
+            for rating in CompetencyRating.objects.filter(appraisal_review=appraisal_review)
+        }
+
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        sum_delta = 0
+        for entry in validated_data['ratings']:
+            rating = existing.get(entry['criterion_name'])
+            if rating is None:
+                to_create.append(CompetencyRating(appraisal_review=appraisal_review, **entry))
+                sum_delta += entry['rating']
+                continue
+            sum_delta += entry['rating'] - rating.rating
+            rating.category = entry['category']
+            rating.rating = entry['rating']
+            rating.comments = entry.get('comments', '')
+            rating.updated_at = now
+            to_update.append(rating)
+
+        created = CompetencyRating.objects.bulk_create(to_create)
+        CompetencyRating.objects.bulk_update(
+            to_update, ['category', 'rating', 'comments', 'updated_at']
+        )
+
+        # bulk_* skips CompetencyRating.save, so apply the whole scorecard's delta once
+        AppraisalReview.apply_rating_delta(appraisal_review.pk, sum_delta, len(created))
+        CycleReportPartition.mark_stale(Appraisal.objects.filter(pk=appraisal_review.appraisal_id))
+
+        return sorted(created + to_update, key=lambda r: (r.category, r.criterion_name))
+
+
+class AppraisalReviewSerializer(SignatureStoreMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """Appraisal review serializer"""
     reviewer_name = serializers.CharField(source='reviewer.get_full_name', read_only=True)
+    reviewer_signature_base64 = SignatureUploadField(source='reviewer_signature_id')
+    reviewer_signature_url = SignatureURLField(source='reviewer_signature_id')
     competency_ratings = CompetencyRatingSerializer(many=True, read_only=True)
 
     class Meta:
         model = AppraisalReview
         fields = [
             'id', 'appraisal', 'reviewer', 'reviewer_name', 'is_completed',
-            'reviewer_signature_base64', 'reviewer_signed_at',
+            'reviewer_signature_base64', 'reviewer_signature_url', 'reviewer_signed_at',
             'competency_ratings', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = ['competency_ratings']
+
+    def validate_appraisal(self, value):
+        # The review's totals and the appraisal counters are kept per appraisal
+        if self.instance is not None and value.pk != self.instance.appraisal_id:
+            raise serializers.ValidationError("A review cannot be moved to another appraisal.")
+        return value
 
 
-class OverallEvaluationSerializer(serializers.ModelSerializer):
+class WorkspaceReviewSerializer(AppraisalReviewSerializer):
+    """Review in the appraisal workspace, with its ratings grouped by category"""
+    ratings = serializers.SerializerMethodField()
+
+    class Meta(AppraisalReviewSerializer.Meta):
+        fields = [
+            name for name in AppraisalReviewSerializer.Meta.fields if name != 'competency_ratings'
+        ] + ['ratings']
+        expandable_fields = []
+
+    def get_ratings(self, review):
+        grouped = {category: [] for category, _ in CompetencyRating.CATEGORY_CHOICES}
+        for rating in CompetencyRatingSerializer(review.competency_ratings.all(), many=True).data:
+            grouped[rating['category']].append(rating)
+        return grouped
+
+
+class OverallEvaluationSerializer(SignatureStoreMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """Overall evaluation serializer"""
+    appraisee_signature_base64 = SignatureUploadField(source='appraisee_signature_id')
+    appraisee_signature_url = SignatureURLField(source='appraisee_signature_id')
+    hr_signature_base64 = SignatureUploadField(source='hr_signature_id')
+    hr_signature_url = SignatureURLField(source='hr_signature_id')
+
     class Meta:
         model = OverallEvaluation
         fields = [
             'id', 'appraisal', 'overall_rating_avg',
             'ready_for_advanced_work', 'ready_for_promotion', 'summary_comment',
-            'appraisee_signature_base64', 'appraisee_signed_at',
-            'hr_signature_base64', 'hr_signed_at', 'finalized_at',
+            'appraisee_signature_base64', 'appraisee_signature_url', 'appraisee_signed_at',
+            'hr_signature_base64', 'hr_signature_url', 'hr_signed_at', 'finalized_at',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'overall_rating_avg', 'created_at', 'updated_at']
 
 
-class AppraisalSerializer(serializers.ModelSerializer):
+class AppraisalSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Appraisal serializer"""
     appraisee_name = serializers.CharField(source='appraisee.get_full_name', read_only=True)
     project_name = serializers.CharField(source='project.name', read_only=True)
@@ -129,10 +380,12 @@ class AppraisalSerializer(serializers.ModelSerializer):
         model = Appraisal
         fields = [
             'id', 'cycle', 'cycle_info', 'appraisee', 'appraisee_name',
-            'project', 'project_name', 'discussion_date', 'status',
+            'project', 'project_name', 'discussion_date', 'status', 'reviews_total', 'reviews_completed',
             'reviews', 'overall_evaluation', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        # status follows the review counters
+        read_only_fields = ['id', 'status', 'reviews_total', 'reviews_completed', 'created_at', 'updated_at']
+        expandable_fields = ['reviews', 'overall_evaluation']
 
     def get_cycle_info(self, obj):
         return {
@@ -142,9 +395,40 @@ class AppraisalSerializer(serializers.ModelSerializer):
         }
 
 
+class PendingReviewSerializer(serializers.ModelSerializer):
+    """A reviewer's unfinished review with the appraisal it belongs to, for the dashboard"""
+    appraisee = serializers.IntegerField(source='appraisal.appraisee_id', read_only=True)
+    appraisee_name = serializers.CharField(source='appraisal.appraisee.get_full_name', read_only=True)
+    project_name = serializers.CharField(source='appraisal.project.name', read_only=True)
+    cycle = serializers.IntegerField(source='appraisal.cycle_id', read_only=True)
+    period_end = serializers.DateField(source='appraisal.cycle.period_end', read_only=True)
+    appraisal_status = serializers.CharField(source='appraisal.status', read_only=True)
+
+    class Meta:
+        model = AppraisalReview
+        fields = [
+            'id', 'appraisal', 'appraisee', 'appraisee_name', 'project_name',
+            'cycle', 'period_end', 'appraisal_status', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
 class AppraisalCreateSerializer(serializers.ModelSerializer):
     """Simplified serializer for creating appraisals"""
     class Meta:
         model = Appraisal
         fields = ['id', 'cycle', 'appraisee', 'project', 'discussion_date', 'status']
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'status']
+        # Duplicates are caught by the unique constraint on insert instead of a query up front
+        validators = []
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Background job status"""
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'payload', 'status', 'attempts', 'max_attempts', 'run_after',
+            'result', 'error', 'created_by', 'created_at', 'updated_at', 'finished_at'
+        ]
+        read_only_fields = fields
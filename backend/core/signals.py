@@ -0,0 +1,166 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from .authentication import invalidate_user_claims, remember_blacklist_state
+from .caching import invalidate_reference_data
+from .memberships import invalidate_project_roles
+from .models import (
+    STATUS_COUNTERS, Appraisal, AppraisalCycle, AppraisalReview, Company, CompetencyRating, CycleReportPartition,
+    OverallEvaluation, Project, ProjectMembership, User
+)
+
+
+def invalidate_after_commit(invalidate, *args):
+    """Invalidate now for this transaction and again once other requests can see the change"""
+    invalidate(*args)
+    transaction.on_commit(lambda: invalidate(*args))
+
+
+@receiver(pre_save, sender=ProjectMembership)
+def remember_previous_member(sender, instance, raw=False, **kwargs):
+    """Note who held a membership before an update that may move it to another user"""
+    if raw or instance._state.adding:
+        return
+    instance._previous_user_id = (
+        ProjectMembership.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=ProjectMembership)
+def membership_saved(sender, instance, **kwargs):
+    invalidate_after_commit(invalidate_project_roles, instance.user_id)
+
+    previous_user_id = getattr(instance, '_previous_user_id', None)
+    if previous_user_id is not None and previous_user_id != instance.user_id:
+        invalidate_after_commit(invalidate_project_roles, previous_user_id)
+
+
+@receiver(post_delete, sender=ProjectMembership)
+def membership_deleted(sender, instance, **kwargs):
+    invalidate_after_commit(invalidate_project_roles, instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_after_commit(invalidate_user_claims, instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(pre_delete, sender=User)
+def appraisee_changed(sender, instance, raw=False, **kwargs):
+    """The cycle reports group appraisees by division, so flag their partitions"""
+    if not raw:
+        CycleReportPartition.mark_stale(Appraisal.objects.filter(appraisee_id=instance.pk))
+
+
+@receiver(pre_delete, sender=CompetencyRating)
+def rating_deleted(sender, instance, **kwargs):
+    """
+    Take the rating out of the running totals, also when deleted by a
+    cascade or a queryset delete, which skip Model.delete().
+    """
+    previous = CompetencyRating.objects.filter(pk=instance.pk).values_list(
+        'appraisal_review_id', 'rating'
+    ).first()
+    if previous:
+        AppraisalReview.apply_rating_delta(previous[0], -previous[1], -1)
+        CycleReportPartition.mark_stale(Appraisal.objects.filter(reviews=previous[0]))
+
+
+@receiver(pre_delete, sender=AppraisalReview)
+def review_deleted(sender, instance, **kwargs):
+    """
+    Take the review out of its evaluation's totals and its appraisal's
+    progress, also when deleted by a cascade.
+
+    A cascade sends pre_delete for the review's ratings first, and those have
+    already moved the review's totals out, so only what is left is shifted.
+    """
+    previous = AppraisalReview.objects.select_for_update().filter(pk=instance.pk).values(
+        'is_completed', 'rating_sum', 'rating_count'
+    ).first()
+    if previous is None:
+        return
+    if previous['is_completed']:
+        OverallEvaluation.shift_rating_totals(
+            OverallEvaluation.objects.filter(appraisal_id=instance.appraisal_id),
+            -previous['rating_sum'],
+            -previous['rating_count']
+        )
+    CycleReportPartition.mark_stale(Appraisal.objects.filter(pk=instance.appraisal_id))
+    # Also touches the appraisal: a deleted review leaves no newer
+    # updated_at behind for the rendered form to notice
+    Appraisal.shift_review_counts(instance.appraisal_id, -1, -int(previous['is_completed']))
+
+
+@receiver(pre_delete, sender=Appraisal)
+def appraisal_deleted(sender, instance, **kwargs):
+    """Take the appraisal out of its cycle's counts, also when deleted by a cascade"""
+    # Read the status again: deleting its reviews in the same cascade may have moved it
+    status = Appraisal.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+    if status is not None:
+        AppraisalCycle.shift_progress(
+            AppraisalCycle.objects.filter(pk=instance.cycle_id), **{STATUS_COUNTERS[status]: -1}
+        )
+
+
+@receiver(pre_delete, sender=OverallEvaluation)
+def evaluation_deleted(sender, instance, **kwargs):
+    if instance.finalized_at is not None:
+        AppraisalCycle.shift_progress(
+            AppraisalCycle.objects.filter(appraisals=instance.appraisal_id), appraisals_finalized=-1
+        )
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def company_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_after_commit(invalidate_reference_data, instance.pk)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_after_commit(invalidate_reference_data, instance.company_id)
+
+
+@receiver(post_save, sender=ProjectMembership)
+@receiver(post_delete, sender=ProjectMembership)
+def membership_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        company_id = Project.objects.filter(pk=instance.project_id).values_list('company_id', flat=True).first()
+        invalidate_after_commit(invalidate_reference_data, company_id)
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_company(sender, instance, raw=False, **kwargs):
+    """Note the company a user is about to leave, whose cached lists still show them"""
+    if raw or instance._state.adding:
+        return
+    instance._previous_company_id = (
+        User.objects.filter(pk=instance.pk).values_list('company_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(pre_delete, sender=User)
+def user_reference_changed(sender, instance, raw=False, **kwargs):
+    """Users appear in their own company's lists and in the member lists of their projects"""
+    if raw:
+        return
+    company_ids = set(
+        Project.objects.filter(memberships__user=instance.pk).values_list('company_id', flat=True)
+    )
+    company_ids.update([instance.company_id, getattr(instance, '_previous_company_id', None)])
+    invalidate_after_commit(invalidate_reference_data, *company_ids)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, created, **kwargs):
+    """Overwrite any cached 'not blacklisted' answer for the token"""
+    if created:
+        remember_blacklist_state(instance.token.jti, instance.token.expires_at, True)
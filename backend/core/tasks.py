@@ -0,0 +1,25 @@
+"""Functions the background worker runs, registered by name; imported from CoreConfig.ready"""
+from .documents import render_document
+from .jobs import enqueue, task
+from .launch import launch_cycle
+from .models import AppraisalCycle
+from .reports import refresh_stale_partitions
+
+
+@task('render_document')
+def render_appraisal_form(appraisal_id):
+    document = render_document(appraisal_id)
+    return {'size': document.size} if document is not None else None
+
+
+@task('launch_cycle')
+def launch(cycle_id, reviewers='previous', created_by_id=None):
+    result = launch_cycle(AppraisalCycle.objects.get(pk=cycle_id), reviewers, created_by_id)
+    # Build the report summaries now rather than on the first report request
+    enqueue('refresh_cycle_report', {'cycle_id': cycle_id}, key=f'refresh_cycle_report:{cycle_id}')
+    return result
+
+
+@task('refresh_cycle_report')
+def refresh_cycle_report(cycle_id):
+    refresh_stale_partitions(AppraisalCycle.objects.get(pk=cycle_id))
@@ -1,3 +1,1223 @@
-from django.test import TestCase
+import base64
+import json
+import zipfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import skipUnless
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework.test import APITestCase, APITransactionTestCase
+from .aggregates import rebuild_progress_counters, rebuild_rating_aggregates
+from .authentication import ClaimsRefreshToken
+from .jobs import enqueue, enqueue_many, retry
+from .management.commands.benchmark_endpoints import Command as BenchmarkCommand, router_endpoints
+from .models import (
+    Company, User, Project, ProjectMembership,
+    AppraisalCycle, Appraisal, AppraisalReview,
+    CompetencyRating, OverallEvaluation, CycleReportPartition, Job, SignatureBlob
+)
 
-# Create your tests here.
+
+# Nested appraisal tree for the query plan and conditional GET tests
+FULL_TREE = '?expand=reviews.competency_ratings,overall_evaluation'
+
+
+# Replica connections cannot see the test transaction, so these tests read the primary.
+# The test process is the only worker, so its local cache counts as shared.
+@override_settings(DATABASE_REPLICAS=[], CACHE_IS_SHARED=True)
+class AppraisalTestCase(APITestCase):
+    """An active cycle of one project with two reporters; appraisals come from create_appraisals()"""
+
+    def setUp(self):
+        # Membership roles are cached across requests and ids repeat between tests
+        cache.clear()
+        self.company = Company.objects.create(name='Acme')
+        self.project = Project.objects.create(company=self.company, name='Alpha')
+        self.cycle = AppraisalCycle.objects.create(
+            company=self.company,
+            period_start=date(2026, 1, 1),
+            period_end=date(2026, 6, 30),
+            status='ACTIVE'
+        )
+        self.reporters = [
+            User.objects.create_user(f'reporter{i}', company=self.company, last_name=f'Reporter{i}')
+            for i in range(2)
+        ]
+        for reporter in self.reporters:
+            ProjectMembership.objects.create(project=self.project, user=reporter, role='REPORTER')
+
+    def create_appraisals(self, count):
+        """Create appraisals with two reviews of three ratings each, in bulk, then their totals"""
+        appraisees = User.objects.bulk_create([
+            User(username=f'member{i}', company=self.company, last_name=f'Member{i:04d}')
+            for i in range(count)
+        ])
+        ProjectMembership.objects.bulk_create([
+            ProjectMembership(project=self.project, user=appraisee) for appraisee in appraisees
+        ])
+        appraisals = Appraisal.objects.bulk_create([
+            Appraisal(cycle=self.cycle, appraisee=appraisee, project=self.project)
+            for appraisee in appraisees
+        ])
+        OverallEvaluation.objects.bulk_create([
+            OverallEvaluation(appraisal=appraisal) for appraisal in appraisals
+        ])
+        reviews = AppraisalReview.objects.bulk_create([
+            AppraisalReview(appraisal=appraisal, reviewer=reporter)
+            for appraisal in appraisals
+            for reporter in self.reporters
+        ])
+        CompetencyRating.objects.bulk_create([
+            CompetencyRating(
+                appraisal_review=review,
+                category='PERSONAL',
+                criterion_name=f'Criterion {i}',
+                rating=3
+            )
+            for review in reviews
+            for i in range(3)
+        ])
+        rebuild_rating_aggregates()
+        Appraisal.recount_progress(Appraisal.objects.filter(cycle=self.cycle))
+        AppraisalCycle.recount_progress(AppraisalCycle.objects.filter(pk=self.cycle.pk))
+        return appraisals
+
+    def run_worker(self):
+        call_command('run_worker', burst=True, concurrency=1, stdout=StringIO())
+
+
+class AppraisalQueryPlanTests(AppraisalTestCase):
+    """The nested appraisal responses must cost a fixed number of queries"""
+
+    def assert_list_queries(self, user, count, expected, query=FULL_TREE):
+        self.create_appraisals(count)
+        self.client.force_authenticate(user)
+        with self.assertNumQueries(expected):
+            response = self.client.get(f'/api/appraisals/{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 20)
+        return response
+
+    def test_staff_list_with_20_appraisals(self):
+        staff = User.objects.create_user('staff', is_staff=True)
+        self.assert_list_queries(staff, 20, 3)
+
+    def test_staff_list_with_200_appraisals(self):
+        staff = User.objects.create_user('staff', is_staff=True)
+        self.assert_list_queries(staff, 200, 3)
+
+    def test_member_list_with_20_appraisals(self):
+        # One more query to load the member's project roles into the cache
+        self.assert_list_queries(self.reporters[0], 20, 4)
+
+    def test_member_list_with_200_appraisals(self):
+        self.assert_list_queries(self.reporters[0], 200, 4)
+
+    def test_sparse_list_skips_unrequested_relations(self):
+        response = self.assert_list_queries(
+            self.reporters[0], 200, 2, query='?fields=id,appraisee_name,status'
+        )
+        self.assertEqual(set(response.data['results'][0]), {'id', 'appraisee_name', 'status'})
+
+    def test_default_list_leaves_nested_relations_out(self):
+        response = self.assert_list_queries(self.reporters[0], 20, 2, query='')
+        self.assertNotIn('reviews', response.data['results'][0])
+        self.assertNotIn('overall_evaluation', response.data['results'][0])
+
+    def test_retrieve_and_reviews_queries(self):
+        appraisal = self.create_appraisals(20)[0]
+        self.client.force_authenticate(self.reporters[0])
+
+        # Object, reviews and ratings, plus the roles of the reporter and the appraisee
+        with self.assertNumQueries(5):
+            response = self.client.get(f'/api/appraisals/{appraisal.pk}/{FULL_TREE}')
+        self.assertEqual(len(response.data['reviews']), 2)
+        self.assertEqual(len(response.data['reviews'][0]['competency_ratings']), 3)
+
+        # Both role maps are cached now
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                f'/api/appraisals/{appraisal.pk}/reviews/?expand=competency_ratings'
+            )
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data[0]['competency_ratings']), 3)
+
+
+class KeysetPaginationTests(AppraisalTestCase):
+    """Cursor pages walk the list in Meta.ordering without gaps or repeats"""
+
+    def test_cursor_pages_follow_meta_ordering(self):
+        self.create_appraisals(45)
+        # A second cycle puts a different period_start at the head of the key
+        earlier = AppraisalCycle.objects.create(
+            company=self.company, period_start=date(2025, 7, 1), period_end=date(2025, 12, 31)
+        )
+        Appraisal.objects.bulk_create([
+            Appraisal(cycle=earlier, appraisee=user, project=self.project)
+            for user in User.objects.filter(username__startswith='member')[:10]
+        ])
+        self.client.force_authenticate(self.reporters[0])
+
+        seen = []
+        url = '/api/appraisals/?fields=id&count=true'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.data['count'], 55)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+
+        expected = list(Appraisal.objects.values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+        # Following previous from the second page returns the first page intact
+        first = self.client.get('/api/appraisals/?fields=id')
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_malformed_cursor_values_are_not_found(self):
+        self.create_appraisals(1)
+        self.client.force_authenticate(self.reporters[0])
+        for path, values in [
+            ('/api/appraisal-reviews/', ['x', 'y']),
+            ('/api/competency-ratings/', [None, None, None]),
+            ('/api/competency-ratings/', [{}, {}, {}]),
+            ('/api/appraisals/', ['not a date', 'a', 'b', 1]),
+        ]:
+            cursor = base64.urlsafe_b64encode(json.dumps({'v': values, 'r': 0}).encode()).decode()
+            response = self.client.get(path, {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, (path, values))
+            self.assertEqual(response.data['detail'], 'Invalid cursor')
+
+
+class ConditionalGetTests(AppraisalTestCase):
+    """Detail views answer 304 while nothing in the returned tree changed"""
+
+    def test_unchanged_appraisal_tree_answers_304_without_serializing(self):
+        appraisal = self.create_appraisals(2)[0]
+        self.client.force_authenticate(self.reporters[0])
+        url = f'/api/appraisals/{appraisal.pk}/{FULL_TREE}'
+        etag = self.client.get(url)['ETag']
+
+        # One query for the object and its tree stamp; roles are cached by now
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Another representation of the same appraisal gets its own tag
+        self.assertNotEqual(self.client.get(f'/api/appraisals/{appraisal.pk}/')['ETag'], etag)
+
+        rating = CompetencyRating.objects.filter(appraisal_review__appraisal=appraisal).first()
+        rating.rating = 4
+        rating.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        review_url = f'/api/appraisal-reviews/{rating.appraisal_review_id}/'
+        review_etag = self.client.get(review_url)['ETag']
+        self.assertEqual(self.client.get(review_url, HTTP_IF_NONE_MATCH=review_etag).status_code, 304)
+
+        evaluation_url = f'/api/overall-evaluations/{appraisal.overall_evaluation.pk}/'
+        last_modified = self.client.get(evaluation_url)['Last-Modified']
+        response = self.client.get(evaluation_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+
+def data_url(data, content_type='image/png'):
+    return f'data:{content_type};base64,{base64.b64encode(data).decode()}'
+
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'signature'
+
+
+class SignatureTests(AppraisalTestCase):
+    """Signatures are PNG or JPEG blobs served by digest to the people who can see them"""
+
+    def sign(self, review, value):
+        return self.client.patch(
+            f'/api/appraisal-reviews/{review.pk}/', {'reviewer_signature_base64': value}, format='json'
+        )
+
+    def test_only_images_are_accepted_and_served_as_images(self):
+        review = self.create_appraisals(1)[0].reviews.get(reviewer=self.reporters[0])
+        self.client.force_authenticate(self.reporters[0])
+
+        for value in [
+            data_url(b'<script>alert(1)</script>', 'text/html'),
+            data_url(b'<script>alert(1)</script>', 'image/png'),
+            data_url(PNG, 'image/jpeg'),
+        ]:
+            self.assertEqual(self.sign(review, value).status_code, 400)
+
+        url = self.sign(review, data_url(PNG)).data['reviewer_signature_url']
+        response = self.client.get(url)
+        self.assertEqual(response.content, PNG)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Content-Disposition'], 'inline')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+        # Rows migrated from inline data URLs may carry any claimed type
+        markup = b'<script>alert(1)</script>'
+        blob = SignatureBlob.objects.create(digest='a' * 64, content_type='text/html', data=markup, size=len(markup))
+        AppraisalReview.objects.filter(pk=review.pk).update(reviewer_signature=blob)
+        self.assertEqual(self.client.get(f'/api/signatures/{blob.digest}/')['Content-Type'], 'application/octet-stream')
+
+    def test_identical_signatures_share_a_blob_visible_to_members(self):
+        first, second = (
+            appraisal.reviews.get(reviewer=self.reporters[0]) for appraisal in self.create_appraisals(2)
+        )
+        self.client.force_authenticate(self.reporters[0])
+        url = self.sign(first, data_url(PNG)).data['reviewer_signature_url']
+        self.assertEqual(self.sign(second, data_url(PNG)).data['reviewer_signature_url'], url)
+        self.assertEqual(SignatureBlob.objects.count(), 1)
+        self.assertEqual(AppraisalReview.objects.filter(reviewer_signature__isnull=False).count(), 2)
+
+        self.client.force_authenticate(self.reporters[1])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        other = Project.objects.create(company=self.company, name='Beta')
+        outsider = User.objects.create_user('outsider', company=self.company)
+        ProjectMembership.objects.create(project=other, user=outsider, role='REPORTER')
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_invalid_requests_store_no_blob(self):
+        review = self.create_appraisals(1)[0].reviews.get(reviewer=self.reporters[0])
+        self.client.force_authenticate(self.reporters[0])
+        response = self.client.patch(
+            f'/api/appraisal-reviews/{review.pk}/',
+            {'reviewer_signature_base64': data_url(PNG), 'is_completed': 'maybe'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(SignatureBlob.objects.exists())
+
+
+class SignatureMigrationTests(TransactionTestCase):
+    """0004 moves inline base64 signatures into shared blobs and back"""
+    before = [('core', '0003_rating_aggregates')]
+    after = [('core', '0004_signature_blobs')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_signatures_move_to_blobs_and_back(self):
+        apps = self.migrate(self.before)
+        company = apps.get_model('core', 'Company').objects.create(name='Acme')
+        project = apps.get_model('core', 'Project').objects.create(company=company, name='Alpha')
+        cycle = apps.get_model('core', 'AppraisalCycle').objects.create(
+            company=company, period_start=date(2026, 1, 1), period_end=date(2026, 6, 30)
+        )
+        user = apps.get_model('core', 'User').objects.create(username='member', company=company)
+        appraisal = apps.get_model('core', 'Appraisal').objects.create(
+            cycle=cycle, appraisee=user, project=project
+        )
+        apps.get_model('core', 'AppraisalReview').objects.create(
+            appraisal=appraisal, reviewer=user, reviewer_signature_base64=data_url(PNG)
+        )
+        apps.get_model('core', 'OverallEvaluation').objects.create(
+            appraisal=appraisal,
+            appraisee_signature_base64=base64.b64encode(PNG).decode(),
+            hr_signature_base64='not base64!'
+        )
+
+        apps = self.migrate(self.after)
+        review = apps.get_model('core', 'AppraisalReview').objects.get()
+        evaluation = apps.get_model('core', 'OverallEvaluation').objects.get()
+        self.assertEqual(review.reviewer_signature_id, evaluation.appraisee_signature_id)
+        self.assertEqual(bytes(review.reviewer_signature.data), PNG)
+        self.assertEqual(evaluation.hr_signature.content_type, 'application/octet-stream')
+        self.assertEqual(apps.get_model('core', 'SignatureBlob').objects.count(), 2)
+
+        apps = self.migrate(self.before)
+        review = apps.get_model('core', 'AppraisalReview').objects.get()
+        self.assertEqual(review.reviewer_signature_base64, data_url(PNG))
+
+
+class MembershipCacheTests(AppraisalTestCase):
+    """Cached project roles follow membership changes"""
+
+    def test_membership_changes_invalidate_cached_roles(self):
+        appraisal = self.create_appraisals(1)[0]
+        reporter = self.reporters[0]
+        self.client.force_authenticate(reporter)
+        url = f'/api/appraisals/{appraisal.pk}/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        ProjectMembership.objects.get(project=self.project, user=reporter).delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        ProjectMembership.objects.create(project=self.project, user=reporter)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_roles_are_read_per_request_without_a_shared_cache(self):
+        self.client.force_authenticate(self.reporters[0])
+        with override_settings(CACHE_IS_SHARED=False):
+            for _ in range(2):
+                with CaptureQueriesContext(connection) as context:
+                    self.client.get('/api/appraisals/')
+                self.assertTrue(
+                    any('core_projectmembership' in query['sql'] for query in context.captured_queries)
+                )
+
+
+class ReferenceCacheTests(AppraisalTestCase):
+    """Reference responses are served from the cache until a write"""
+
+    def test_reference_responses_are_cached_until_a_write(self):
+        self.client.force_authenticate(self.reporters[0])
+        url = f'/api/projects/{self.project.pk}/members/'
+        first = self.client.get(url).data
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data, first)
+
+        newcomer = User.objects.create_user('newcomer', company=self.company)
+        ProjectMembership.objects.create(project=self.project, user=newcomer)
+        self.assertEqual(len(self.client.get(url).data), len(first) + 1)
+
+        users_url = f'/api/users/?company={self.company.pk}&fields=username,last_name'
+        self.client.get(users_url)
+        newcomer.last_name = 'Renamed'
+        newcomer.save()
+        self.assertIn('Renamed', [row['last_name'] for row in self.client.get(users_url).data['results']])
+
+        # The cached copy is keyed by company, so outsiders still get a 404
+        outsider = User.objects.create_user('outsider', company=Company.objects.create(name='Other'))
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class FilterTests(AppraisalTestCase):
+    """List filters narrow every viewset and reject values they cannot parse"""
+
+    def setUp(self):
+        super().setUp()
+        self.create_appraisals(2)
+        User.objects.filter(pk=self.reporters[0].pk).update(division='Sales')
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+
+    def count(self, path, **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200, (path, params))
+        return len(response.data['results'])
+
+    def assertRejected(self, path, **params):
+        self.assertEqual(self.client.get(path, params).status_code, 400, (path, params))
+
+    def test_reference_filters(self):
+        self.assertEqual(self.count('/api/companies/', name='acm'), 1)
+        self.assertEqual(self.count('/api/companies/', name='globex'), 0)
+        self.assertEqual(self.count('/api/users/', company=self.company.pk, division='Sales'), 1)
+        self.assertRejected('/api/users/', company='acme')
+        self.assertEqual(self.count('/api/projects/', company=self.company.pk), 1)
+        self.assertRejected('/api/projects/', company='acme')
+        self.assertEqual(self.count('/api/project-memberships/', project=self.project.pk, role='REPORTER'), 2)
+        self.assertRejected('/api/project-memberships/', role='OWNER')
+        self.assertEqual(self.count('/api/appraisal-cycles/', status='ACTIVE'), 1)
+        self.assertEqual(self.count('/api/appraisal-cycles/', status='CLOSED'), 0)
+        self.assertRejected('/api/appraisal-cycles/', status='OPEN')
+
+    def test_appraisal_tree_filters(self):
+        review = AppraisalReview.objects.filter(reviewer=self.reporters[0]).first()
+        review.is_completed = True
+        review.save()
+
+        self.assertEqual(self.count('/api/appraisals/', cycle=self.cycle.pk, status='IN_PROGRESS'), 1)
+        self.assertEqual(self.count('/api/appraisals/', status='PENDING'), 1)
+        self.assertRejected('/api/appraisals/', status='DONE')
+        self.assertRejected('/api/appraisals/', cycle='current')
+        self.assertEqual(self.count('/api/appraisal-reviews/', reviewer=self.reporters[0].pk), 2)
+        self.assertEqual(self.count('/api/appraisal-reviews/', is_completed='true'), 1)
+        self.assertRejected('/api/appraisal-reviews/', reviewer='me')
+        self.assertEqual(self.count('/api/competency-ratings/', appraisal_review=review.pk), 3)
+        self.assertEqual(self.count('/api/competency-ratings/', category='PERSONAL'), 12)
+        self.assertRejected('/api/competency-ratings/', category='OTHER')
+        self.assertEqual(self.count('/api/overall-evaluations/', finalized='false'), 2)
+        self.assertEqual(self.count('/api/overall-evaluations/', finalized='true'), 0)
+        self.assertRejected('/api/overall-evaluations/', appraisal='latest')
+
+    def test_job_filters(self):
+        enqueue('refresh_cycle_report', {'cycle_id': self.cycle.pk})
+        self.assertEqual(self.count('/api/jobs/', name='refresh_cycle_report', status='QUEUED'), 1)
+        self.assertEqual(self.count('/api/jobs/', status='FAILED'), 0)
+        self.assertRejected('/api/jobs/', status='LOST')
+
+
+class WorkspaceTests(AppraisalTestCase):
+    """The appraisal workspace returns the whole detail page in a fixed number of queries"""
+
+    def test_workspace_loads_the_whole_document_in_three_queries(self):
+        appraisal = self.create_appraisals(1)[0]
+        url = f'/api/appraisals/{appraisal.pk}/workspace/'
+        self.client.force_authenticate(self.reporters[0])
+        self.client.get(url)
+
+        # Appraisal with its relations and evaluation, reviews, ratings; roles come from the cache
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        data = response.data
+        self.assertEqual(data['appraisal']['id'], appraisal.pk)
+        self.assertEqual(
+            {category: len(ratings) for category, ratings in data['reviews'][0]['ratings'].items()},
+            {'WORK_EFFICIENCY': 0, 'PRODUCTIVITY': 0, 'PERSONAL': 3}
+        )
+        my_review = AppraisalReview.objects.get(appraisal=appraisal, reviewer=self.reporters[0]).pk
+        self.assertEqual(data['permissions'], {
+            'role': 'REPORTER', 'is_appraisee': False, 'my_review': my_review,
+            'editable_reviews': [my_review], 'can_edit_evaluation': True,
+        })
+
+        # A plain member appraisee can see the reviews about them but not change them
+        self.client.force_authenticate(appraisal.appraisee)
+        permissions = self.client.get(url).data['permissions']
+        self.assertEqual(permissions['editable_reviews'], [])
+        self.assertTrue(permissions['can_edit_evaluation'])
+
+    def test_workspace_flags_match_what_the_endpoints_accept(self):
+        appraisal = self.create_appraisals(1)[0]
+        evaluation = appraisal.overall_evaluation
+        # A reporter appraised by the other reporter
+        appraisal.appraisee = self.reporters[1]
+        appraisal.save()
+        url = f'/api/appraisals/{appraisal.pk}/workspace/'
+
+        self.client.force_authenticate(self.reporters[1])
+        permissions = self.client.get(url).data['permissions']
+        reviews = sorted(appraisal.reviews.values_list('pk', flat=True))
+        self.assertEqual(sorted(permissions['editable_reviews']), reviews)
+        for pk in reviews:
+            response = self.client.patch(f'/api/appraisal-reviews/{pk}/', {}, format='json')
+            self.assertEqual(response.status_code, 200)
+
+        OverallEvaluation.objects.filter(pk=evaluation.pk).update(finalized_at=timezone.now())
+        self.assertFalse(self.client.get(url).data['permissions']['can_edit_evaluation'])
+        response = self.client.patch(
+            f'/api/overall-evaluations/{evaluation.pk}/', {'summary_comment': 'Late edit'}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class DashboardTests(AppraisalTestCase):
+    """The dashboard summary costs a fixed set of queries"""
+
+    def test_dashboard_costs_a_fixed_set_of_queries(self):
+        appraisals = self.create_appraisals(30)
+        Appraisal.objects.filter(pk=appraisals[0].pk).update(status='COMPLETED')
+        AppraisalReview.objects.filter(appraisal=appraisals[0]).update(is_completed=True)
+
+        self.client.force_authenticate(self.reporters[0])
+        # Project roles, then user, cycles, pending reviews, their count, own appraisals, status counts
+        with self.assertNumQueries(7):
+            response = self.client.get('/api/dashboard/')
+        data = response.json()
+        self.assertEqual([cycle['id'] for cycle in data['active_cycles']], [self.cycle.pk])
+        self.assertEqual(len(data['pending_reviews']), 20)
+        self.assertEqual(data['my_appraisals'], [])
+        self.assertEqual(data['counts'], {
+            'projects': 1,
+            'pending_reviews': 29,
+            'appraisals': {'PENDING': 29, 'IN_PROGRESS': 0, 'COMPLETED': 1},
+        })
+
+        self.client.force_authenticate(appraisals[1].appraisee)
+        data = self.client.get('/api/dashboard/').json()
+        self.assertEqual([appraisal['id'] for appraisal in data['my_appraisals']], [appraisals[1].pk])
+        self.assertEqual(data['pending_reviews'], [])
+
+
+@override_settings(SQL_INSTRUMENTATION=True)
+class QueryInstrumentationTests(AppraisalTestCase):
+    """Server-Timing headers and the slow request log"""
+
+    @override_settings(SQL_INSTRUMENTATION=False)
+    def test_instrumentation_is_off_unless_enabled(self):
+        self.client.force_authenticate(self.reporters[0])
+        response = self.client.get('/api/appraisals/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_server_timing_reports_view_and_queries(self):
+        self.create_appraisals(20)
+        self.client.force_authenticate(self.reporters[0])
+        response = self.client.get(f'/api/appraisals/{FULL_TREE}')
+
+        timing = response['Server-Timing']
+        self.assertIn('view;desc="AppraisalViewSet.list"', timing)
+        self.assertIn('db;desc="4 queries"', timing)
+
+    @override_settings(REQUEST_QUERY_BUDGET=2)
+    def test_requests_over_the_query_budget_are_logged(self):
+        appraisal = self.create_appraisals(1)[0]
+        self.client.force_authenticate(self.reporters[0])
+
+        with self.assertLogs('core.sql', 'WARNING') as logs:
+            self.client.get(f'/api/appraisals/{appraisal.pk}/{FULL_TREE}')
+        self.assertIn('AppraisalViewSet.retrieve', logs.output[0])
+        self.assertIn('Slowest', logs.output[0])
+
+
+class RatingAggregateTests(AppraisalTestCase):
+    """Running rating totals follow every rating and review write, deletes included"""
+
+    def rebuild(self, **options):
+        output = StringIO()
+        call_command('rebuild_rating_aggregates', stdout=output, **options)
+        return output.getvalue()
+
+    def totals(self, model, pk):
+        return tuple(model.objects.filter(pk=pk).values_list('rating_sum', 'rating_count').get())
+
+    def test_rebuild_reports_and_repairs_drift(self):
+        appraisal = self.create_appraisals(2)[0]
+        self.assertIn('consistent', self.rebuild(check=True))
+
+        # Queryset updates bypass the running totals
+        AppraisalReview.objects.filter(appraisal=appraisal).update(is_completed=True)
+        CompetencyRating.objects.filter(appraisal_review__appraisal=appraisal).update(rating=4)
+        with self.assertRaisesMessage(CommandError, '2 review(s) and 1 evaluation(s)'):
+            self.rebuild(check=True)
+
+        self.assertIn('Rebuilt rating aggregates for 2 review(s) and 1 evaluation(s)', self.rebuild())
+        evaluation = OverallEvaluation.objects.get(appraisal=appraisal)
+        self.assertEqual((evaluation.rating_sum, evaluation.rating_count, evaluation.overall_rating_avg), (24, 6, 4.0))
+        self.assertIn('consistent', self.rebuild(check=True))
+
+    def test_deltas_reach_the_evaluation_only_through_completed_reviews(self):
+        appraisal = self.create_appraisals(1)[0]
+        first, second = appraisal.reviews.order_by('pk')
+        first.is_completed = True
+        first.save()
+        evaluation = appraisal.overall_evaluation
+
+        AppraisalReview.apply_rating_delta(first.pk, 5, 1)
+        AppraisalReview.apply_rating_delta(second.pk, 5, 1)
+        self.assertEqual(self.totals(AppraisalReview, first.pk), (14, 4))
+        self.assertEqual(self.totals(AppraisalReview, second.pk), (14, 4))
+        self.assertEqual(self.totals(OverallEvaluation, evaluation.pk), (14, 4))
+
+        evaluations = OverallEvaluation.objects.filter(pk=evaluation.pk)
+        with self.assertNumQueries(0):
+            OverallEvaluation.shift_rating_totals(evaluations, 0, 0)
+        OverallEvaluation.shift_rating_totals(evaluations, -14, -4)
+        evaluation.refresh_from_db()
+        self.assertEqual((evaluation.rating_sum, evaluation.rating_count, evaluation.overall_rating_avg), (0, 0, None))
+
+    def test_cascade_and_queryset_deletes_keep_the_totals(self):
+        appraisal = self.create_appraisals(1)[0]
+        first, second = appraisal.reviews.order_by('pk')
+        for review in (first, second):
+            review.is_completed = True
+            review.save()
+        evaluation = appraisal.overall_evaluation
+        self.assertEqual(self.totals(OverallEvaluation, evaluation.pk), (18, 6))
+
+        CompetencyRating.objects.filter(appraisal_review=second, criterion_name='Criterion 0').delete()
+        self.assertEqual(self.totals(AppraisalReview, second.pk), (6, 2))
+        self.assertEqual(self.totals(OverallEvaluation, evaluation.pk), (15, 5))
+
+        # Deleting the reviewer cascades to their review and its ratings
+        self.reporters[0].delete()
+        evaluation.refresh_from_db()
+        self.assertEqual((evaluation.rating_sum, evaluation.rating_count, evaluation.overall_rating_avg), (6, 2, 3.0))
+        self.assertIn('consistent', self.rebuild(check=True))
+
+    def test_reviews_cannot_move_between_appraisals(self):
+        appraisal, other = self.create_appraisals(2)
+        review = appraisal.reviews.get(reviewer=self.reporters[0])
+        self.client.force_authenticate(self.reporters[0])
+        response = self.client.patch(
+            f'/api/appraisal-reviews/{review.pk}/', {'appraisal': other.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('appraisal', response.data)
+        response = self.client.patch(
+            f'/api/appraisal-reviews/{review.pk}/', {'appraisal': appraisal.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('consistent', self.rebuild(check=True))
+
+
+class BulkUpsertTests(AppraisalTestCase):
+    """A whole scorecard is saved in one request with one totals update"""
+    url = '/api/competency-ratings/bulk-upsert/'
+
+    def upsert(self, review, ratings):
+        return self.client.post(self.url, {
+            'appraisal_review': review.pk,
+            'ratings': [
+                {'category': 'PERSONAL', 'criterion_name': name, 'rating': rating}
+                for name, rating in ratings.items()
+            ],
+        }, format='json')
+
+    def test_scorecard_creates_and_updates_with_one_recompute(self):
+        review = self.create_appraisals(1)[0].reviews.get(reviewer=self.reporters[0])
+        self.client.force_authenticate(self.reporters[0])
+
+        response = self.upsert(review, {'Criterion 0': 5, 'Criterion 3': 4})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(review.competency_ratings.count(), 4)
+        self.assertEqual(review.competency_ratings.get(criterion_name='Criterion 0').rating, 5)
+        review.refresh_from_db()
+        self.assertEqual((review.rating_sum, review.rating_count), (3 + 3 + 5 + 4, 4))
+
+        # The statement count does not grow with the scorecard
+        def queries(ratings):
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.upsert(review, ratings).status_code, 200)
+            return len(context)
+        small = queries({'Criterion 0': 1, 'New 0': 1})
+        large = queries({**{f'Criterion {i}': 2 for i in range(4)}, **{f'New {i}': 2 for i in range(6)}})
+        self.assertEqual(small, large)
+        review.refresh_from_db()
+        self.assertEqual((review.rating_sum, review.rating_count), (2 * 10, 10))
+
+    def test_reviewers_cannot_rate_each_others_reviews(self):
+        review = self.create_appraisals(1)[0].reviews.get(reviewer=self.reporters[0])
+        self.client.force_authenticate(self.reporters[1])
+        self.assertEqual(self.upsert(review, {'Criterion 0': 1, 'Criterion 9': 1}).status_code, 403)
+        self.assertEqual(
+            sorted(review.competency_ratings.values_list('rating', flat=True)), [3, 3, 3]
+        )
+
+
+# Fast hashing for the generated users, and no slow request logs from a cold dataset
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    SLOW_REQUEST_MS=60_000, REQUEST_QUERY_BUDGET=10_000
+)
+class BenchmarkTests(AppraisalTestCase):
+    """benchmark_endpoints measures every endpoint of a generated dataset"""
+
+    def test_smoke_scale_answers_every_endpoint(self):
+        command = BenchmarkCommand(stdout=StringIO())
+        results = command.run_scale('smoke', {'seed': 1, 'repeat': 1})
+
+        names = {name for name, _, _ in router_endpoints()}
+        self.assertLessEqual(set(results), names)
+        self.assertLessEqual({name for name in names if '{id}' not in name}, set(results))
+        self.assertIn('GET /appraisals/{id}/', results)
+        for name, result in results.items():
+            self.assertLess(result['status'], 500, name)
+        self.assertEqual(command.compare({'smoke': results}, {'smoke': results}, 0.2), [])
+
+
+class ProgressCounterTests(AppraisalTestCase):
+    """Review and cycle progress counters follow review and evaluation writes"""
+
+    def test_completed_reviews_drive_status_and_cycle_counters(self):
+        appraisal = self.create_appraisals(2)[0]
+        self.cycle.refresh_from_db()
+        self.assertEqual((self.cycle.appraisals_pending, self.cycle.appraisals_completed), (2, 0))
+
+        first, second = appraisal.reviews.order_by('pk')
+        first.is_completed = True
+        first.save()
+        appraisal.refresh_from_db()
+        self.assertEqual((appraisal.status, appraisal.reviews_completed), ('IN_PROGRESS', 1))
+
+        second.is_completed = True
+        second.save()
+        self.cycle.refresh_from_db()
+        self.assertEqual(Appraisal.objects.get(pk=appraisal.pk).status, 'COMPLETED')
+        self.assertEqual(
+            (self.cycle.appraisals_pending, self.cycle.appraisals_in_progress, self.cycle.appraisals_completed),
+            (1, 0, 1)
+        )
+
+        # A new reviewer reopens the appraisal
+        AppraisalReview.objects.create(appraisal=appraisal, reviewer=User.objects.create_user('late'))
+        self.assertEqual(Appraisal.objects.get(pk=appraisal.pk).status, 'IN_PROGRESS')
+
+        evaluation = appraisal.overall_evaluation
+        evaluation.finalized_at = timezone.now()
+        evaluation.save()
+        self.cycle.refresh_from_db()
+        self.assertEqual((self.cycle.appraisals_in_progress, self.cycle.appraisals_finalized), (1, 1))
+
+        appraisal.delete()
+        self.cycle.refresh_from_db()
+        self.assertEqual(
+            (self.cycle.appraisals_pending, self.cycle.appraisals_in_progress, self.cycle.appraisals_finalized),
+            (1, 0, 0)
+        )
+
+    def progress(self):
+        self.cycle.refresh_from_db()
+        return self.cycle.appraisals_pending, self.cycle.appraisals_in_progress, self.cycle.appraisals_completed
+
+    def counters(self, appraisal):
+        return tuple(
+            Appraisal.objects.filter(pk=appraisal.pk).values_list('status', 'reviews_total', 'reviews_completed').get()
+        )
+
+    def rebuild(self, **options):
+        output = StringIO()
+        call_command('rebuild_progress_counters', stdout=output, **options)
+        return output.getvalue()
+
+    def test_cascade_and_queryset_deletes_keep_the_counters(self):
+        first, second = self.create_appraisals(2)
+        for appraisal, reporter in ((first, self.reporters[0]), (second, self.reporters[1])):
+            review = appraisal.reviews.get(reviewer=reporter)
+            review.is_completed = True
+            review.save()
+        self.assertEqual(self.progress(), (0, 2, 0))
+
+        # Deleting a reviewer cascades to one review of each appraisal
+        self.reporters[0].delete()
+        self.assertEqual(self.counters(first), ('PENDING', 1, 0))
+        self.assertEqual(self.counters(second), ('COMPLETED', 1, 1))
+        self.assertEqual(self.progress(), (1, 0, 1))
+
+        AppraisalReview.objects.filter(appraisal=second).delete()
+        self.assertEqual(self.counters(second), ('PENDING', 0, 0))
+        self.assertEqual(self.progress(), (2, 0, 0))
+
+        # The appraisee's appraisal goes after its reviews
+        first.appraisee.delete()
+        self.assertEqual(self.progress(), (1, 0, 0))
+        self.assertIn('consistent', self.rebuild(check=True))
+
+    def test_rebuild_reports_and_repairs_drift(self):
+        appraisal = self.create_appraisals(2)[0]
+        # Queryset updates bypass the counters
+        AppraisalReview.objects.filter(appraisal=appraisal).update(is_completed=True)
+        with self.assertRaisesMessage(CommandError, '1 appraisal(s) and 0 cycle(s)'):
+            self.rebuild(check=True)
+
+        self.assertIn('Rebuilt progress counters for 1 appraisal(s) and 1 cycle(s)', self.rebuild())
+        self.assertEqual(self.counters(appraisal), ('COMPLETED', 2, 2))
+        self.assertEqual(self.progress(), (1, 0, 1))
+        self.assertIn('consistent', self.rebuild(check=True))
+
+class GenerateDatasetTests(AppraisalTestCase):
+    """generate_dataset writes consistent rows and counters without going through save()"""
+
+    def test_small_dataset_counts_and_counters(self):
+        call_command(
+            'generate_dataset', users_per_company=12, projects_per_company=2, reporters_per_project=2,
+            cycles=2, reviewers_per_appraisal=2, ratings_per_review=3, seed=3, stdout=StringIO()
+        )
+        company = Company.objects.get(name='Gen Company 0')
+        appraisals = Appraisal.objects.filter(cycle__company=company)
+        self.assertEqual(User.objects.filter(company=company).count(), 12)
+        self.assertEqual(ProjectMembership.objects.filter(project__company=company, role='REPORTER').count(), 4)
+        self.assertEqual(appraisals.count(), 2 * (12 - 4))
+        self.assertEqual(AppraisalReview.objects.filter(appraisal__in=appraisals).count(), 2 * 16)
+        self.assertEqual(OverallEvaluation.objects.filter(appraisal__in=appraisals).count(), 16)
+        # Every review of the closed cycle is completed with a full scorecard
+        ratings = CompetencyRating.objects.filter(appraisal_review__appraisal__in=appraisals).count()
+        self.assertEqual(ratings % 3, 0)
+        self.assertGreaterEqual(ratings, 16 * 3)
+
+        def snapshot():
+            return (
+                list(appraisals.order_by('pk').values_list('status', 'reviews_total', 'reviews_completed')),
+                list(AppraisalCycle.objects.filter(company=company).order_by('pk').values_list(
+                    'appraisals_pending', 'appraisals_in_progress', 'appraisals_completed', 'appraisals_finalized'
+                )),
+            )
+        generated = snapshot()
+        self.assertEqual(rebuild_progress_counters(fix=False), {'appraisals': 0, 'cycles': 0})
+        self.assertEqual(rebuild_rating_aggregates(fix=False), {'reviews': 0, 'evaluations': 0})
+
+        Appraisal.recount_progress(appraisals)
+        AppraisalCycle.recount_progress(AppraisalCycle.objects.filter(company=company))
+        self.assertEqual(snapshot(), generated)
+        # The closed cycle is fully completed and finalized
+        self.assertEqual(generated[1][0], (0, 0, 8, 8))
+
+
+class CycleReportTests(AppraisalTestCase):
+    """The cycle report recomputes only the partitions writes touched"""
+
+    def test_cycle_report_is_recomputed_only_after_writes(self):
+        self.create_appraisals(20)
+        CycleReportPartition.touch(self.cycle.pk, [self.project.pk])
+        review = AppraisalReview.objects.filter(reviewer=self.reporters[0]).first()
+        review.is_completed = True
+        review.save()
+        self.client.force_authenticate(self.reporters[0])
+        url = f'/api/appraisal-cycles/{self.cycle.pk}/report/'
+
+        group = self.client.get(url).data['groups'][0]
+        self.assertEqual(group['appraisals'], 20)
+        self.assertEqual((group['reviews'], group['reviews_completed']), (40, 1))
+        self.assertEqual(group['categories'][0]['histogram']['3'], 3)
+
+        # Fresh partitions are read straight from the summary tables
+        with self.assertNumQueries(4):
+            self.client.get(url)
+
+        rating = review.competency_ratings.first()
+        rating.rating = 5
+        rating.save()
+        category = self.client.get(url).data['groups'][0]['categories'][0]
+        self.assertEqual((category['histogram']['3'], category['histogram']['5']), (2, 1))
+        self.assertEqual(category['average_rating'], 3.67)
+
+
+class CycleExportTests(AppraisalTestCase):
+    """Cycle exports stream every rating"""
+
+    def test_cycle_export_streams_one_row_per_rating(self):
+        self.create_appraisals(3)
+        bare = User.objects.create_user('bare', company=self.company)
+        Appraisal.objects.create(cycle=self.cycle, appraisee=bare, project=self.project)
+        url = f'/api/appraisal-cycles/{self.cycle.pk}/export/'
+
+        self.client.force_authenticate(self.reporters[0])
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        # Header, 3 appraisals x 2 reviews x 3 ratings, and the appraisal without reviews
+        self.assertEqual(len(lines), 1 + 18 + 1)
+        self.assertTrue(lines[0].startswith('appraisal_id,appraisal_status'))
+
+        response = self.client.get(f'{url}?output=ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 19)
+        self.assertEqual(rows[-1]['appraisee_username'], 'bare')
+        self.assertIsNone(rows[-1]['rating'])
+
+        self.assertEqual(self.client.get(f'{url}?output=xml').status_code, 400)
+
+    async def test_cycle_export_streams_under_asgi(self):
+        await sync_to_async(self.create_appraisals)(3)
+        staff = await sync_to_async(User.objects.create_user)('staff', is_staff=True)
+        token = (await sync_to_async(ClaimsRefreshToken.for_user)(staff)).access_token
+
+        response = await self.async_client.get(
+            f'/api/appraisal-cycles/{self.cycle.pk}/export/', headers={'Authorization': f'Bearer {token}'}
+        )
+        # A synchronous body would have been read into memory whole before sending
+        self.assertTrue(response.is_async)
+        lines = b''.join([part async for part in response.streaming_content]).decode().splitlines()
+        self.assertEqual(len(lines), 1 + 18)
+
+
+class DocumentRenderTests(AppraisalTestCase):
+    """PDF forms are rendered by the worker and reused until their data changes"""
+
+    def test_pdf_forms_render_in_background_until_data_changes(self):
+        appraisal = self.create_appraisals(2)[0]
+        self.client.force_authenticate(self.reporters[0])
+        url = f'/api/appraisals/{appraisal.pk}/pdf/'
+
+        # Reading never queues a render; posting does, once
+        self.assertEqual(self.client.get(url).status_code, 409)
+        self.assertFalse(Job.objects.exists())
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.post(url).data['job'], response.data['job'])
+        self.assertEqual(self.client.get(url).data['job'], response.data['job'])
+
+        self.run_worker()
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertEqual(self.client.post(url).data['status'], 'ready')
+
+        rating = CompetencyRating.objects.filter(appraisal_review__appraisal=appraisal).first()
+        rating.rating = 5
+        rating.save()
+        self.assertEqual(self.client.get(url).status_code, 409)
+
+        # The cycle zip waits until every form is current
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        forms_url = f'/api/appraisal-cycles/{self.cycle.pk}/forms/'
+        self.assertEqual(self.client.get(forms_url).status_code, 409)
+        self.assertEqual(self.client.post(forms_url).data['pending'], 2)
+        self.assertEqual(self.client.get(forms_url).status_code, 202)
+        self.run_worker()
+        response = self.client.get(forms_url)
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as bundle:
+            self.assertEqual(len(bundle.namelist()), 2)
+
+    def test_cycle_project_and_reviewer_changes_make_the_form_stale(self):
+        appraisal = self.create_appraisals(1)[0]
+        self.client.force_authenticate(self.reporters[0])
+        url = f'/api/appraisals/{appraisal.pk}/pdf/'
+
+        for printed in (self.cycle, self.project, self.reporters[1]):
+            self.assertEqual(self.client.post(url).status_code, 202)
+            self.run_worker()
+            self.assertEqual(self.client.get(url).status_code, 200)
+            printed.save()
+            self.assertEqual(self.client.get(url).status_code, 409)
+
+
+class CycleLaunchTests(AppraisalTestCase):
+    """Launching a cycle creates its appraisals in bulk, once"""
+
+    def test_launch_clones_reviewers_and_is_idempotent(self):
+        previous = self.create_appraisals(3)
+        AppraisalReview.objects.filter(appraisal=previous[0], reviewer=self.reporters[1]).delete()
+        cycle = AppraisalCycle.objects.create(
+            company=self.company, period_start=date(2026, 7, 1), period_end=date(2026, 12, 31)
+        )
+        url = f'/api/appraisal-cycles/{cycle.pk}/launch/'
+
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        response = self.client.post(url)
+        self.assertEqual((response.status_code, response.data['status']), (202, 'QUEUED'))
+        self.run_worker()
+
+        job = self.client.get(f"/api/jobs/{response.data['id']}/").data
+        self.assertEqual(job['status'], 'SUCCEEDED')
+        self.assertEqual(job['result']['appraisals_created'], 3)
+        self.assertEqual(job['result']['reviews_created'], 5)
+        self.assertEqual(job['result']['status'], 'ACTIVE')
+        # The follow-up job built the report summaries
+        self.assertFalse(cycle.report_partitions.filter(is_stale=True).exists())
+
+        launched = Appraisal.objects.get(cycle=cycle, appraisee=previous[0].appraisee_id)
+        self.assertEqual(
+            list(launched.reviews.values_list('reviewer_id', flat=True)), [self.reporters[0].pk]
+        )
+        self.assertEqual(OverallEvaluation.objects.filter(appraisal__cycle=cycle).count(), 3)
+        job_id = self.client.post(url).data['id']
+        self.run_worker()
+        self.assertEqual(Job.objects.get(pk=job_id).result['appraisals_created'], 0)
+
+        # One-off creation is rejected by the unique constraint
+        self.client.force_authenticate(self.reporters[0])
+        response = self.client.post('/api/appraisals/', {
+            'cycle': cycle.pk, 'appraisee': launched.appraisee_id, 'project': self.project.pk
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already exists', str(response.data['non_field_errors']))
+
+
+class JobQueueTests(AppraisalTestCase):
+    """Failed jobs back off, fail for good and can be retried"""
+
+    def test_failed_jobs_back_off_then_fail_and_can_be_retried(self):
+        job = Job.objects.create(name='no_such_task', max_attempts=2)
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.run_worker()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('QUEUED', 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('No task registered', job.error)
+
+        # Not due yet, so the worker leaves it alone
+        self.run_worker()
+        self.assertEqual(Job.objects.get(pk=job.pk).attempts, 1)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.run_worker()
+        self.assertEqual(Job.objects.get(pk=job.pk).status, 'FAILED')
+
+        self.client.force_authenticate(User.objects.create_user('staff', is_staff=True))
+        response = self.client.post(f'/api/jobs/{job.pk}/retry/')
+        self.assertEqual((response.data['status'], response.data['attempts']), ('QUEUED', 0))
+        self.assertEqual(self.client.post(f'/api/jobs/{job.pk}/retry/').status_code, 400)
+
+    def test_keyed_jobs_are_queued_once_while_pending(self):
+        first = enqueue('refresh_cycle_report', {'cycle_id': self.cycle.pk}, key='report')
+        self.assertEqual(enqueue('refresh_cycle_report', {'cycle_id': 0}, key='report').pk, first.pk)
+
+        # A racing insert of the same key is ignored by the unique index
+        Job.objects.bulk_create([Job(name='refresh_cycle_report', key='report')], ignore_conflicts=True)
+        self.assertEqual(Job.objects.filter(key='report').count(), 1)
+
+        jobs = enqueue_many('refresh_cycle_report', {'report': {}, 'other': {}})
+        self.assertEqual([job.key for job in jobs], ['report', 'other'])
+        self.assertEqual(jobs[0].pk, first.pk)
+
+        # A failed job is not retried while its key is queued again
+        Job.objects.filter(pk=first.pk).update(status='FAILED')
+        enqueue('refresh_cycle_report', {'cycle_id': self.cycle.pk}, key='report')
+        self.assertFalse(retry(first))
+
+
+# Real password hashing would make every login in these tests a slow request
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    DATABASE_REPLICAS=[], CACHE_IS_SHARED=True
+)
+class ClaimsAuthenticationTests(APITestCase):
+    """Token claims must stand in for the User row until the user changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='Acme')
+        self.user = User.objects.create_user(
+            'reporter', password='correct-horse-battery', company=self.company
+        )
+        response = self.client.post(
+            '/api/auth/login/', {'username': 'reporter', 'password': 'correct-horse-battery'}
+        )
+        self.refresh = response.data['refresh']
+        self.access = response.data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query for query in context.captured_queries if 'core_user' in query['sql']]
+
+    def test_current_claims_skip_the_user_query(self):
+        self.assertEqual(self.user_queries('/api/appraisal-cycles/'), [])
+
+    def test_changed_user_falls_back_to_a_cached_snapshot(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        self.assertEqual(len(self.user_queries('/api/appraisal-cycles/')), 1)
+        self.assertEqual(self.user_queries('/api/appraisal-cycles/'), [])
+
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_claims_are_not_trusted_without_a_shared_cache(self):
+        self.assertEqual(len(self.user_queries('/api/appraisal-cycles/')), 1)
+        self.assertEqual(len(self.user_queries('/api/appraisal-cycles/')), 1)
+
+    def test_token_user_creates_and_lists_appraisals(self):
+        project = Project.objects.create(company=self.company, name='Alpha')
+        cycle = AppraisalCycle.objects.create(
+            company=self.company, period_start=date(2026, 1, 1), period_end=date(2026, 6, 30), status='ACTIVE'
+        )
+        appraisee = User.objects.create_user('member', company=self.company)
+        ProjectMembership.objects.create(project=project, user=self.user, role='REPORTER')
+        ProjectMembership.objects.create(project=project, user=appraisee)
+
+        data = {'cycle': cycle.pk, 'appraisee': appraisee.pk, 'project': project.pk}
+        self.assertEqual(self.client.post('/api/appraisals/', data, format='json').status_code, 201)
+        self.assertEqual(self.client.post('/api/appraisals/', data, format='json').status_code, 400)
+
+        self.assertEqual(len(self.client.get('/api/appraisals/').data['results']), 1)
+        reviews = self.client.get('/api/appraisal-reviews/').data['results']
+        self.assertEqual([review['reviewer'] for review in reviews], [self.user.pk])
+        self.assertEqual(self.client.get('/api/auth/me/').json()['username'], 'reporter')
+
+    def test_deactivated_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get('/api/appraisal-cycles/').status_code, 401)
+
+    @override_settings(SQL_INSTRUMENTATION=True)
+    async def test_current_user_is_served_through_the_async_chain(self):
+        response = await self.async_client.get(
+            '/api/auth/me/', headers={'Authorization': f'Bearer {self.access}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['username'], 'reporter')
+        self.assertIn('view;desc="MeView.get"', response['Server-Timing'])
+        self.assertIn('db;desc="1 queries"', response['Server-Timing'])
+
+        response = await self.async_client.get('/api/auth/me/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+    def test_rotated_refresh_token_is_rejected_from_the_cache(self):
+        response = self.client.post('/api/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, 200)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(context), 0)
+
+    def test_purge_tokens_deletes_only_expired_tokens(self):
+        expired = OutstandingToken.objects.bulk_create([
+            OutstandingToken(jti=f'expired-{i}', token='', expires_at=timezone.now() - timedelta(days=1))
+            for i in range(3)
+        ])
+        BlacklistedToken.objects.create(token=expired[0])
+
+        call_command('purge_tokens', batch_size=2, pause=0, stdout=StringIO())
+
+        self.assertFalse(OutstandingToken.objects.filter(jti__startswith='expired-').exists())
+        self.assertFalse(BlacklistedToken.objects.exists())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'Set DATABASE_REPLICA_URLS to test replica routing')
+@override_settings(DATABASE_REPLICAS=settings.DATABASE_REPLICAS[:1], CACHE_IS_SHARED=True)
+class ReplicaRoutingTests(APITransactionTestCase):
+    """List reads go to a replica, except for users who just wrote"""
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.company = Company.objects.create(name='Acme')
+        self.cycle = AppraisalCycle.objects.create(
+            company=self.company, period_start=date(2026, 1, 1), period_end=date(2026, 6, 30)
+        )
+        self.user = User.objects.create_user('member', company=self.company)
+        self.client.force_authenticate(self.user)
+
+    def request(self, method, path, data=None):
+        """Response and the number of queries it ran on the primary and on the replica"""
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        with CaptureQueriesContext(connections['default']) as on_primary, \
+                CaptureQueriesContext(replica) as on_replica:
+            response = getattr(self.client, method)(path, data)
+        return response, len(on_primary), len(on_replica)
+
+    def test_lists_read_the_replica_until_the_user_writes(self):
+        url = '/api/appraisal-cycles/'
+        response, _, on_replica = self.request('get', url)
+        self.assertEqual(response.data['count'], 1)
+        self.assertGreater(on_replica, 0)
+
+        # Details, and requests that change data, stay on the primary
+        self.assertEqual(self.request('get', f'{url}{self.cycle.pk}/')[2], 0)
+        response, _, on_replica = self.request('patch', f'{url}{self.cycle.pk}/', {'status': 'ACTIVE'})
+        self.assertEqual((response.status_code, on_replica), (200, 0))
+
+        response, on_primary, on_replica = self.request('get', url)
+        self.assertEqual(response.data['results'][0]['status'], 'ACTIVE')
+        self.assertEqual(on_replica, 0)
+        self.assertGreater(on_primary, 0)
+
+        # Once the pin expires
+        cache.clear()
+        self.assertGreater(self.request('get', url)[2], 0)
+
+    def test_roles_are_read_from_the_primary_during_replica_reads(self):
+        project = Project.objects.create(company=self.company, name='Alpha')
+        ProjectMembership.objects.create(project=project, user=self.user, role='REPORTER')
+
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        with CaptureQueriesContext(connections['default']) as on_primary, \
+                CaptureQueriesContext(replica) as on_replica:
+            self.assertEqual(self.client.get('/api/appraisals/').status_code, 200)
+
+        def reads_roles(context):
+            return any('core_projectmembership' in query['sql'] for query in context.captured_queries)
+        self.assertTrue(reads_roles(on_primary))
+        self.assertFalse(reads_roles(on_replica))
+
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_lists_read_the_primary_without_a_shared_cache(self):
+        # Other workers could not see this worker's pins
+        response, on_primary, on_replica = self.request('get', '/api/appraisal-cycles/')
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(on_replica, 0)
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
+from .async_views import DashboardView, MeView
 from .views import (
     AuthViewSet, CompanyViewSet, UserViewSet, ProjectViewSet,
     ProjectMembershipViewSet, AppraisalCycleViewSet, AppraisalViewSet,
-    AppraisalReviewViewSet, CompetencyRatingViewSet, OverallEvaluationViewSet
+    AppraisalReviewViewSet, CompetencyRatingViewSet, OverallEvaluationViewSet,
+    SignatureViewSet, JobViewSet
 )
 
 router = DefaultRouter()
@@ -24,8 +26,15 @@ router.register(r'appraisals', AppraisalViewSet, basename='appraisal')
 router.register(r'appraisal-reviews', AppraisalReviewViewSet, basename='appraisal-review')
 router.register(r'competency-ratings', CompetencyRatingViewSet, basename='competency-rating')
 router.register(r'overall-evaluations', OverallEvaluationViewSet, basename='overall-evaluation')
+router.register(r'signatures', SignatureViewSet, basename='signature')
+
+# Background jobs
+router.register(r'jobs', JobViewSet, basename='job')
 
 urlpatterns = [
+    # Async views, see core.async_views
+    path('auth/me/', MeView.as_view(), name='auth-me'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
     path('', include(router.urls)),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
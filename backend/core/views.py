@@ -1,21 +1,69 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Prefetch, Q
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, Http404, StreamingHttpResponse
 from .models import (
     Company, User, Project, ProjectMembership,
     AppraisalCycle, Appraisal, AppraisalReview,
-    CompetencyRating, OverallEvaluation
+    CompetencyRating, OverallEvaluation, SignatureBlob, Job
 )
 from .serializers import (
     CompanySerializer, UserSerializer, ProjectSerializer,
     ProjectMembershipSerializer, AppraisalCycleSerializer,
     AppraisalSerializer, AppraisalCreateSerializer,
     AppraisalReviewSerializer, CompetencyRatingSerializer,
-    OverallEvaluationSerializer
+    CompetencyRatingBulkUpsertSerializer, OverallEvaluationSerializer, WorkspaceReviewSerializer,
+    JobSerializer
 )
-from .permissions import IsReporter, IsSameProject, CanCreateAppraisal
+from .authentication import ClaimsRefreshToken
+from .permissions import IsOpenEvaluation, IsReporter, IsSameProject, CanCreateAppraisal
+from .memberships import project_ids, project_roles, is_reporter
+from .caching import CachedResponseMixin, cached_response
+from .pagination import KeysetPagination
+from .conditional import ConditionalRetrieveMixin, latest, newest
+from .replicas import ReplicaReadMixin
+from .reports import build_cycle_report
+from .exports import FORMATS as EXPORT_FORMATS, stream_cycle_export
+from .launch import REVIEWER_LAYOUTS
+from .jobs import enqueue, retry as retry_job
+from .documents import current_document, pending_renders, queue_render, stale_appraisal_ids, write_cycle_zip
+from .filters import (
+    CompanyFilter, UserFilter, ProjectFilter, ProjectMembershipFilter,
+    AppraisalCycleFilter, AppraisalFilter, AppraisalReviewFilter,
+    CompetencyRatingFilter, OverallEvaluationFilter, JobFilter
+)
+
+
+def rating_prefetch():
+    """Ratings ordered on their own columns, skipping the Meta.ordering joins"""
+    return Prefetch(
+        'competency_ratings',
+        queryset=CompetencyRating.objects.order_by('category', 'criterion_name')
+    )
+
+
+def review_prefetch(request, serializer_class, prefix=''):
+    """Prefetch reviews with just the relations the response will render"""
+    reviews = AppraisalReview.objects.order_by('reviewer__last_name', 'reviewer__first_name')
+    if serializer_class.includes(request, f'{prefix}reviewer_name'):
+        reviews = reviews.select_related('reviewer')
+    if serializer_class.includes(request, f'{prefix}competency_ratings'):
+        reviews = reviews.prefetch_related(rating_prefetch())
+    return Prefetch('reviews', queryset=reviews)
+
+
+def with_membership_relations(queryset, request):
+    """Join a membership queryset to the user and project only when they are shown"""
+    related = []
+    if ProjectMembershipSerializer.includes(request, 'user_name') or \
+            ProjectMembershipSerializer.includes(request, 'user_email'):
+        related.append('user')
+    if ProjectMembershipSerializer.includes(request, 'project_name'):
+        related.append('project')
+    return queryset.select_related(*related) if related else queryset
 
 
 class AuthViewSet(viewsets.GenericViewSet):
@@ -44,7 +92,7 @@ class AuthViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
 
         return Response({
             'refresh': str(refresh),
@@ -57,97 +105,221 @@ class AuthViewSet(viewsets.GenericViewSet):
         """Logout user (blacklist refresh token)"""
         try:
             refresh_token = request.data.get('refresh')
-            token = RefreshToken(refresh_token)
+            token = ClaimsRefreshToken(refresh_token)
             token.blacklist()
             return Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
-    def me(self, request):
-        """Get current user"""
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
-
 
-class CompanyViewSet(viewsets.ReadOnlyModelViewSet):
+class CompanyViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """Company ViewSet - read-only for now"""
     queryset = Company.objects.filter(is_active=True)
     serializer_class = CompanySerializer
     permission_classes = [permissions.IsAuthenticated]
+    filterset_class = CompanyFilter
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """User ViewSet - read-only"""
     queryset = User.objects.filter(is_active=True)
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filterset_class = UserFilter
 
+    def response_cache_company(self, request):
+        """Lists filtered to one company only change with that company"""
+        company = request.query_params.get('company')
+        if self.action == 'list' and company and company.isdigit():
+            return int(company)
+        return None
 
-class ProjectViewSet(viewsets.ReadOnlyModelViewSet):
+
+class ProjectViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     """Project ViewSet"""
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filterset_class = ProjectFilter
+
+    def response_cache_company(self, request):
+        """Members only ever see their own company's projects"""
+        return None if request.user.is_staff else request.user.company_id
 
     def get_queryset(self):
         """Filter projects by user's company"""
         user = self.request.user
         if user.is_staff:
-            return Project.objects.filter(is_active=True)
-        return Project.objects.filter(company=user.company, is_active=True)
+            queryset = Project.objects.filter(is_active=True)
+        else:
+            queryset = Project.objects.filter(company_id=user.company_id, is_active=True)
+
+        if self.action in ('list', 'retrieve') and ProjectSerializer.includes(self.request, 'company_name'):
+            queryset = queryset.select_related('company')
+        return queryset
+
+    def get_membership_queryset(self, project):
+        """Memberships of a project, joined only to what the response shows"""
+        return with_membership_relations(
+            ProjectMembership.objects.filter(project=project), self.request
+        )
 
     @action(detail=True, methods=['get'])
+    @cached_response
     def members(self, request, pk=None):
         """Get all members of a project"""
         project = self.get_object()
-        memberships = ProjectMembership.objects.filter(project=project)
-        serializer = ProjectMembershipSerializer(memberships, many=True)
+        memberships = self.get_membership_queryset(project)
+        serializer = ProjectMembershipSerializer(
+            memberships, many=True, context=self.get_serializer_context()
+        )
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'])
+    @cached_response
     def reporters(self, request, pk=None):
         """Get all reporters of a project"""
         project = self.get_object()
-        memberships = ProjectMembership.objects.filter(
-            project=project,
-            role='REPORTER'
+        memberships = self.get_membership_queryset(project).filter(role='REPORTER')
+        serializer = ProjectMembershipSerializer(
+            memberships, many=True, context=self.get_serializer_context()
         )
-        serializer = ProjectMembershipSerializer(memberships, many=True)
         return Response(serializer.data)
 
 
-class ProjectMembershipViewSet(viewsets.ModelViewSet):
+class ProjectMembershipViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Project Membership ViewSet"""
     queryset = ProjectMembership.objects.all()
     serializer_class = ProjectMembershipSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filterset_class = ProjectMembershipFilter
 
     def get_queryset(self):
         """Filter memberships by user's projects"""
         user = self.request.user
         if user.is_staff:
-            return ProjectMembership.objects.all()
-        return ProjectMembership.objects.filter(user=user)
+            queryset = ProjectMembership.objects.all()
+        else:
+            queryset = ProjectMembership.objects.filter(user_id=user.id)
+        return with_membership_relations(queryset, self.request)
 
 
-class AppraisalCycleViewSet(viewsets.ModelViewSet):
+class AppraisalCycleViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Appraisal Cycle ViewSet"""
     queryset = AppraisalCycle.objects.all()
     serializer_class = AppraisalCycleSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filterset_class = AppraisalCycleFilter
 
     def get_queryset(self):
         """Filter cycles by user's company"""
         user = self.request.user
         if user.is_staff:
-            return AppraisalCycle.objects.all()
-        return AppraisalCycle.objects.filter(company=user.company)
+            queryset = AppraisalCycle.objects.all()
+        else:
+            queryset = AppraisalCycle.objects.filter(company_id=user.company_id)
+
+        if AppraisalCycleSerializer.includes(self.request, 'company_name'):
+            queryset = queryset.select_related('company')
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def report(self, request, pk=None):
+        """Cycle statistics per project, division and competency category"""
+        cycle = self.get_object()
+        # Staff see the whole cycle; everyone else only their own projects
+        visible_projects = None if request.user.is_staff else project_ids(request)
+        return Response(build_cycle_report(cycle, project_ids=visible_projects))
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """Stream every rating of the cycle as CSV or NDJSON (?output=csv|ndjson)"""
+        if not request.user.is_staff:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Only staff can export appraisal cycles.')
+
+        # ?format= is taken by DRF's renderer negotiation
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            from rest_framework.exceptions import ValidationError
+            raise ValidationError({'output': f"Choose one of: {', '.join(EXPORT_FORMATS)}"})
+
+        cycle = self.get_object()
+        response = StreamingHttpResponse(
+            stream_cycle_export(cycle, output), content_type=EXPORT_FORMATS[output]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="cycle-{cycle.pk}-{cycle.period_start:%Y-%m}.{output}"'
+        )
+        return response
+
+    @action(detail=True, methods=['post'])
+    def launch(self, request, pk=None):
+        """Queue a job creating every member's appraisal, reviews and evaluation"""
+        if not request.user.is_staff:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Only staff can launch appraisal cycles.')
+
+        from rest_framework.exceptions import ValidationError
+        reviewers = request.data.get('reviewers', 'previous')
+        if reviewers not in REVIEWER_LAYOUTS:
+            raise ValidationError({'reviewers': f"Choose one of: {', '.join(REVIEWER_LAYOUTS)}"})
+
+        cycle = self.get_object()
+        if cycle.status == 'CLOSED':
+            raise ValidationError({'non_field_errors': ['A closed cycle cannot be launched.']})
+
+        job = enqueue(
+            'launch_cycle',
+            {'cycle_id': cycle.pk, 'reviewers': reviewers, 'created_by_id': request.user.id},
+            key=f'launch_cycle:{cycle.pk}',
+            created_by_id=request.user.id,
+        )
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get', 'post'])
+    def forms(self, request, pk=None):
+        """
+        Zip of every appraisal form in the cycle. POST queues renders of the
+        stale forms; GET serves the zip once none are, 202 while renders are
+        pending and 409 while some stale form has none.
+        """
+        if not request.user.is_staff:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Only staff can download cycle forms.')
+
+        cycle = self.get_object()
+        appraisals = Appraisal.objects.filter(cycle=cycle)
+        stale = stale_appraisal_ids(appraisals)
+        if stale:
+            if request.method == 'POST':
+                queue_render(stale, created_by_id=request.user.id)
+            elif len(pending_renders(stale)) < len(stale):
+                return Response(
+                    {'status': 'stale', 'stale': len(stale), 'detail': 'Forms are out of date; POST to render them.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return Response(
+                {'status': 'rendering', 'pending': len(stale)},
+                status=status.HTTP_202_ACCEPTED, headers={'Retry-After': '5'}
+            )
+        if request.method == 'POST':
+            return Response({'status': 'ready'})
+
+        return FileResponse(
+            write_cycle_zip(appraisals), as_attachment=True,
+            filename=f'cycle-{cycle.pk}-{cycle.period_start:%Y-%m}-forms.zip',
+            content_type='application/zip',
+        )
 
 
-class AppraisalViewSet(viewsets.ModelViewSet):
+class AppraisalViewSet(ConditionalRetrieveMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """Appraisal ViewSet with permissions"""
     queryset = Appraisal.objects.all()
     permission_classes = [permissions.IsAuthenticated, CanCreateAppraisal, IsSameProject]
+    filterset_class = AppraisalFilter
+    pagination_class = KeysetPagination
+    # Meta.ordering with 'appraisee' expanded to User.Meta.ordering, plus pk as tie-breaker
+    keyset_ordering = ['-cycle__period_start', 'appraisee__last_name', 'appraisee__first_name', 'pk']
 
     def get_serializer_class(self):
         """Use different serializers for create vs list/retrieve"""
@@ -160,82 +332,200 @@ class AppraisalViewSet(viewsets.ModelViewSet):
         user = self.request.user
 
         if user.is_staff:
-            return Appraisal.objects.all()
-
-        # Get projects where user is a member
-        user_projects = ProjectMembership.objects.filter(user=user).values_list('project', flat=True)
+            queryset = Appraisal.objects.all()
+        else:
+            # Return appraisals for the projects where user is a member
+            queryset = Appraisal.objects.filter(project__in=project_ids(self.request))
+
+        return self.get_query_plan(queryset)
+
+    def get_query_plan(self, queryset):
+        """Eager-load only what the current action serializes, so query count is flat"""
+        request = self.request
+
+        if self.action in ('list', 'retrieve', 'update', 'partial_update'):
+            wanted = {
+                'cycle': AppraisalSerializer.includes(request, 'cycle_info'),
+                'appraisee': AppraisalSerializer.includes(request, 'appraisee_name'),
+                'project': AppraisalSerializer.includes(request, 'project_name'),
+                'overall_evaluation': AppraisalSerializer.includes(request, 'overall_evaluation'),
+            }
+            queryset = queryset.select_related(*[name for name, needed in wanted.items() if needed])
+            if AppraisalSerializer.includes(request, 'reviews'):
+                queryset = queryset.prefetch_related(
+                    review_prefetch(request, AppraisalSerializer, prefix='reviews.')
+                )
+            return queryset
+
+        if self.action == 'reviews':
+            return queryset.prefetch_related(
+                review_prefetch(request, AppraisalReviewSerializer)
+            )
 
-        # Return appraisals for those projects
-        return Appraisal.objects.filter(project__in=user_projects)
+        if self.action == 'workspace':
+            reviews = AppraisalReview.objects.select_related('reviewer').order_by(
+                'reviewer__last_name', 'reviewer__first_name'
+            ).prefetch_related(rating_prefetch())
+            return queryset.select_related(
+                'cycle', 'appraisee', 'project', 'overall_evaluation'
+            ).prefetch_related(Prefetch('reviews', queryset=reviews))
+
+        return queryset
+
+    def tree_updated_at(self):
+        """Newest change among the appraisal, its relations, reviews, ratings and evaluation"""
+        return latest(
+            F('cycle__updated_at'),
+            F('appraisee__updated_at'),
+            F('project__updated_at'),
+            F('overall_evaluation__updated_at'),
+            newest(AppraisalReview.objects.filter(appraisal=OuterRef('pk'))),
+            newest(CompetencyRating.objects.filter(appraisal_review__appraisal=OuterRef('pk'))),
+            newest(User.objects.filter(reviews_given__appraisal=OuterRef('pk'))),
+        )
 
     def perform_create(self, serializer):
         """Create appraisal and associated review for the creator"""
-        # Validate: Check if appraisal already exists for this appraisee/cycle/project
-        cycle = serializer.validated_data['cycle']
-        appraisee = serializer.validated_data['appraisee']
         project = serializer.validated_data['project']
 
-        if Appraisal.objects.filter(cycle=cycle, appraisee=appraisee, project=project).exists():
-            from rest_framework.exceptions import ValidationError
-            raise ValidationError({
-                'non_field_errors': ['An appraisal already exists for this appraisee in this project and cycle.']
-            })
-
         # Validate: Creator must be a REPORTER in the project
-        is_reporter = ProjectMembership.objects.filter(
-            project=project,
-            user=self.request.user,
-            role='REPORTER'
-        ).exists()
-
-        if not is_reporter and not self.request.user.is_staff:
+        if not self.request.user.is_staff and not is_reporter(self.request, project.pk):
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied('You must be a REPORTER in this project to create appraisals.')
 
-        appraisal = serializer.save()
-
-        # Create AppraisalReview for the creator (reporter)
-        AppraisalReview.objects.create(
-            appraisal=appraisal,
-            reviewer=self.request.user
-        )
-
-        # Create OverallEvaluation
-        OverallEvaluation.objects.create(appraisal=appraisal)
+        # The (cycle, appraisee, project) unique constraint rejects duplicates
+        try:
+            with transaction.atomic():
+                appraisal = serializer.save()
+
+                # Create AppraisalReview for the creator (reporter)
+                AppraisalReview.objects.create(
+                    appraisal=appraisal,
+                    reviewer_id=self.request.user.id
+                )
+
+                # Create OverallEvaluation
+                OverallEvaluation.objects.create(appraisal=appraisal)
+        except IntegrityError:
+            from rest_framework.exceptions import ValidationError
+            raise ValidationError({
+                'non_field_errors': ['An appraisal already exists for this appraisee in this project and cycle.']
+            })
 
     @action(detail=True, methods=['get'])
     def reviews(self, request, pk=None):
         """Get all reviews for an appraisal"""
         appraisal = self.get_object()
-        reviews = AppraisalReview.objects.filter(appraisal=appraisal)
-        serializer = AppraisalReviewSerializer(reviews, many=True)
+        serializer = AppraisalReviewSerializer(
+            appraisal.reviews.all(), many=True, context=self.get_serializer_context()
+        )
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def workspace(self, request, pk=None):
+        """Everything the detail page edits, and what the requester may change, in one response"""
+        appraisal = self.get_object()
+        user = request.user
+        context = self.get_serializer_context()
+        reviews = list(appraisal.reviews.all())
+        evaluation = getattr(appraisal, 'overall_evaluation', None)
+
+        # What PATCH on the review and evaluation endpoints would accept: the object is
+        # in the endpoint's queryset and passes its permission classes
+        role = project_roles(request).get(appraisal.project_id)
+        my_review = next((review.pk for review in reviews if review.reviewer_id == user.id), None)
+        is_appraisee = appraisal.appraisee_id == user.id
+        editable_reviews = [
+            review.pk for review in reviews
+            if AppraisalReviewViewSet.is_visible(user, review) and IsReporter().can_change(request, review)
+        ]
+        can_edit_evaluation = (
+            evaluation is not None
+            and OverallEvaluationViewSet.is_visible(request, evaluation)
+            and IsOpenEvaluation().can_change(request, evaluation)
+        )
+
+        return Response({
+            'appraisal': AppraisalSerializer(appraisal, context=context).data,
+            'reviews': WorkspaceReviewSerializer(reviews, many=True, context=context).data,
+            'overall_evaluation': (
+                OverallEvaluationSerializer(evaluation, context=context).data if evaluation is not None else None
+            ),
+            'permissions': {
+                'role': role,
+                'is_appraisee': is_appraisee,
+                'my_review': my_review,
+                'editable_reviews': editable_reviews,
+                'can_edit_evaluation': can_edit_evaluation,
+            },
+        })
+
+    @action(detail=True, methods=['get', 'post'])
+    def pdf(self, request, pk=None):
+        """
+        Printable form. POST queues a render unless the stored form is current;
+        GET serves the current form, 202 while a render is pending, 409 otherwise.
+        """
+        appraisal = self.get_object()
+        document = current_document(appraisal)
+        if document is None:
+            if request.method == 'POST':
+                jobs = queue_render([appraisal.pk], created_by_id=request.user.id)
+            else:
+                jobs = pending_renders([appraisal.pk])
+            if not jobs:
+                return Response(
+                    {'status': 'stale', 'detail': 'The form is out of date; POST to render it.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return Response(
+                {'status': 'rendering', 'job': jobs[0].pk},
+                status=status.HTTP_202_ACCEPTED, headers={'Retry-After': '2'}
+            )
+        if request.method == 'POST':
+            return Response({'status': 'ready'})
+
+        response = HttpResponse(bytes(document.data), content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="appraisal-{appraisal.pk}.pdf"'
+        return response
+
 
-class AppraisalReviewViewSet(viewsets.ModelViewSet):
+class AppraisalReviewViewSet(ConditionalRetrieveMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """Appraisal Review ViewSet"""
     queryset = AppraisalReview.objects.all()
     serializer_class = AppraisalReviewSerializer
     permission_classes = [permissions.IsAuthenticated, IsReporter]
+    filterset_class = AppraisalReviewFilter
+    pagination_class = KeysetPagination
+    keyset_ordering = ['appraisal_id', 'reviewer_id']
+
+    @staticmethod
+    def is_visible(user, review):
+        """Whether get_queryset() includes the review, for a review with its appraisal loaded"""
+        return user.is_staff or review.reviewer_id == user.id or review.appraisal.appraisee_id == user.id
 
     def get_queryset(self):
         """Filter reviews by user"""
         user = self.request.user
         if user.is_staff:
-            return AppraisalReview.objects.all()
-
-        # Return reviews where user is the reviewer or appraisee
-        return AppraisalReview.objects.filter(reviewer=user) | \
-               AppraisalReview.objects.filter(appraisal__appraisee=user)
-
-    def perform_update(self, serializer):
-        """Update review and recalculate overall evaluation"""
-        review = serializer.save()
-
-        # Recalculate and update overall evaluation
-        if hasattr(review.appraisal, 'overall_evaluation'):
-            overall_eval = review.appraisal.overall_evaluation
-            overall_eval.save()  # This triggers the calculate_average_rating
+            queryset = AppraisalReview.objects.all()
+        else:
+            # Return reviews where user is the reviewer or appraisee
+            queryset = AppraisalReview.objects.filter(reviewer_id=user.id) | \
+                       AppraisalReview.objects.filter(appraisal__appraisee_id=user.id)
+
+        if AppraisalReviewSerializer.includes(self.request, 'reviewer_name'):
+            queryset = queryset.select_related('reviewer')
+        if AppraisalReviewSerializer.includes(self.request, 'competency_ratings'):
+            queryset = queryset.prefetch_related(rating_prefetch())
+        return queryset
+
+    def tree_updated_at(self):
+        """Newest change among the review, its reviewer and its ratings"""
+        return latest(
+            F('reviewer__updated_at'),
+            newest(CompetencyRating.objects.filter(appraisal_review=OuterRef('pk'))),
+        )
 
     @action(detail=True, methods=['get'])
     def ratings(self, request, pk=None):
@@ -246,11 +536,14 @@ class AppraisalReviewViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class CompetencyRatingViewSet(viewsets.ModelViewSet):
+class CompetencyRatingViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     """Competency Rating ViewSet"""
     queryset = CompetencyRating.objects.all()
     serializer_class = CompetencyRatingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filterset_class = CompetencyRatingFilter
+    pagination_class = KeysetPagination
+    keyset_ordering = ['appraisal_review_id', 'category', 'criterion_name']
 
     def get_queryset(self):
         """Filter ratings by user's reviews"""
@@ -259,7 +552,7 @@ class CompetencyRatingViewSet(viewsets.ModelViewSet):
             return CompetencyRating.objects.all()
 
         # Get user's reviews
-        user_reviews = AppraisalReview.objects.filter(reviewer=user)
+        user_reviews = AppraisalReview.objects.filter(reviewer_id=user.id)
         return CompetencyRating.objects.filter(appraisal_review__in=user_reviews)
 
     def perform_create(self, serializer):
@@ -267,23 +560,43 @@ class CompetencyRatingViewSet(viewsets.ModelViewSet):
         # Validate: User can only create ratings for their own reviews
         appraisal_review = serializer.validated_data['appraisal_review']
 
-        if appraisal_review.reviewer != self.request.user and not self.request.user.is_staff:
+        if appraisal_review.reviewer_id != self.request.user.id and not self.request.user.is_staff:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('You can only create ratings for your own reviews.')
+
+        # Saving the rating updates the review and evaluation totals
+        serializer.save()
+
+    @action(detail=False, methods=['post'], url_path='bulk-upsert')
+    def bulk_upsert(self, request):
+        """Create or update a review's whole scorecard and recalculate once"""
+        serializer = CompetencyRatingBulkUpsertSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Validate: User can only save ratings for their own reviews
+        appraisal_review = serializer.validated_data['appraisal_review']
+
+        if appraisal_review.reviewer_id != request.user.id and not request.user.is_staff:
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied('You can only create ratings for your own reviews.')
 
-        rating = serializer.save()
+        with transaction.atomic():
+            ratings = serializer.save()
 
-        # Recalculate overall evaluation
-        if hasattr(rating.appraisal_review.appraisal, 'overall_evaluation'):
-            overall_eval = rating.appraisal_review.appraisal.overall_evaluation
-            overall_eval.save()
+        return Response(CompetencyRatingSerializer(ratings, many=True).data)
 
 
-class OverallEvaluationViewSet(viewsets.ModelViewSet):
+class OverallEvaluationViewSet(ConditionalRetrieveMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """Overall Evaluation ViewSet"""
     queryset = OverallEvaluation.objects.all()
     serializer_class = OverallEvaluationSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, IsOpenEvaluation]
+    filterset_class = OverallEvaluationFilter
+
+    @staticmethod
+    def is_visible(request, evaluation):
+        """Whether get_queryset() includes the evaluation, for one with its appraisal loaded"""
+        return request.user.is_staff or evaluation.appraisal.project_id in project_roles(request)
 
     def get_queryset(self):
         """Filter evaluations based on user access"""
@@ -291,8 +604,82 @@ class OverallEvaluationViewSet(viewsets.ModelViewSet):
         if user.is_staff:
             return OverallEvaluation.objects.all()
 
-        # Get user's projects
-        user_projects = ProjectMembership.objects.filter(user=user).values_list('project', flat=True)
+        # Return evaluations for appraisals in the user's projects
+        return OverallEvaluation.objects.filter(appraisal__project__in=project_ids(self.request))
+
+    def tree_updated_at(self):
+        """The evaluation has no nested rows; signatures are immutable blobs"""
+        return latest()
+
+
+class SignatureViewSet(viewsets.GenericViewSet):
+    """Signature images addressed by content digest, so clients can cache them forever"""
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = 'digest'
+    lookup_value_regex = '[0-9a-f]{64}'
+
+    def get_queryset(self):
+        """Limit signatures to those on appraisals the user can see"""
+        user = self.request.user
+        if user.is_staff:
+            return SignatureBlob.objects.all()
+
+        user_projects = project_ids(self.request)
+        reviews = AppraisalReview.objects.filter(appraisal__project__in=user_projects)
+        evaluations = OverallEvaluation.objects.filter(appraisal__project__in=user_projects)
+
+        return SignatureBlob.objects.filter(
+            Q(digest__in=reviews.values('reviewer_signature'))
+            | Q(digest__in=evaluations.values('appraisee_signature'))
+            | Q(digest__in=evaluations.values('hr_signature'))
+        )
+
+    def retrieve(self, request, digest=None):
+        """Serve the image bytes; the digest doubles as a permanent ETag"""
+        etag = f'"{digest}"'
+
+        if request.headers.get('If-None-Match') == etag:
+            if not self.get_queryset().filter(digest=digest).exists():
+                raise Http404
+            response = HttpResponseNotModified()
+        else:
+            blob = self.get_object()
+            data = bytes(blob.data)
+            # Served by what the bytes are, never by the stored type: rows migrated
+            # from inline data URLs kept whatever type the client had claimed
+            content_type = SignatureBlob.image_type(data) or 'application/octet-stream'
+            response = HttpResponse(data, content_type=content_type)
+            response['Content-Disposition'] = 'inline'
+            response['X-Content-Type-Options'] = 'nosniff'
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
+
+
+class JobViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
+    """Status of background jobs; users see the jobs they queued"""
+    # Only the list: GET actions queue jobs whose detail is polled straight away
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filterset_class = JobFilter
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_staff:
+            return Job.objects.all()
+        return Job.objects.filter(created_by_id=user.id)
 
-        # Return evaluations for appraisals in those projects
-        return OverallEvaluation.objects.filter(appraisal__project__in=user_projects)
+    @action(detail=True, methods=['post'])
+    def retry(self, request, pk=None):
+        """Queue a failed job again"""
+        if not request.user.is_staff:
+            from rest_framework.exceptions import PermissionDenied
+            raise PermissionDenied('Only staff can retry jobs.')
+
+        job = self.get_object()
+        if not retry_job(job):
+            from rest_framework.exceptions import ValidationError
+            raise ValidationError({'status': ['Only failed jobs whose key is not queued again can be retried.']})
+        job.refresh_from_db()
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
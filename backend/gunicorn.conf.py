@@ -0,0 +1,23 @@
+"""
+Gunicorn settings, read from the working directory when gunicorn starts.
+
+SERVER_MODE picks the interface:
+  wsgi (default)  config.wsgi with sync workers, one request per worker
+  asgi            config.asgi with uvicorn workers; async views
+                  (core.async_views) wait on the database without holding
+                  the worker, DRF views run in a thread each
+Worker count comes from WEB_CONCURRENCY as usual.
+"""
+import os
+
+SERVER_MODES = {
+    'wsgi': ('config.wsgi:application', 'sync'),
+    'asgi': ('config.asgi:application', 'uvicorn_worker.UvicornWorker'),
+}
+
+server_mode = os.getenv('SERVER_MODE', 'wsgi')
+if server_mode not in SERVER_MODES:
+    raise ValueError(f"SERVER_MODE must be one of {', '.join(SERVER_MODES)}, not {server_mode!r}")
+
+wsgi_app, worker_class = SERVER_MODES[server_mode]
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
@@ -69,7 +69,6 @@ const AppraisalCreatePage: React.FC = () => {
         project: Number(selectedProject),
         appraisee: Number(selectedAppraisee),
         discussion_date: discussionDate,
-        status: 'PENDING',
       };
 
       const created = await appraisalService.createAppraisal(appraisalData);
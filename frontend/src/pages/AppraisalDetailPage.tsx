@@ -51,12 +51,23 @@ const AppraisalDetailPage: React.FC = () => {
 
   const loadAppraisal = async () => {
     try {
-      const data = await appraisalService.getAppraisal(Number(id));
+      const workspace = await appraisalService.getWorkspace(Number(id));
+      const reviews = workspace.reviews.map(({ ratings, ...review }) => ({
+        ...review,
+        competency_ratings: Object.values(ratings).flat(),
+      }));
+      // The requester's own review first; the rest of the page edits reviews[0]
+      const own = reviews.filter((review) => review.id === workspace.permissions.my_review);
+      const data: Appraisal = {
+        ...workspace.appraisal,
+        reviews: [...own, ...reviews.filter((review) => review.id !== workspace.permissions.my_review)],
+        overall_evaluation: workspace.overall_evaluation,
+      };
       setAppraisal(data);
 
       // Load existing ratings if any
       if (data.reviews && data.reviews.length > 0) {
-        const myReview = data.reviews[0]; // Assuming current user's review
+        const myReview = data.reviews[0];
         if (myReview.competency_ratings) {
           const ratingsMap: any = {};
           myReview.competency_ratings.forEach((rating: CompetencyRating) => {
@@ -67,8 +78,8 @@ const AppraisalDetailPage: React.FC = () => {
           });
           setRatings(ratingsMap);
         }
-        if (myReview.reviewer_signature_base64) {
-          setSignature(myReview.reviewer_signature_base64);
+        if (myReview.reviewer_signature_url) {
+          setSignature(await appraisalService.getSignatureImage(myReview.reviewer_signature_url));
         }
       }
     } catch (err) {
@@ -105,9 +116,10 @@ const AppraisalDetailPage: React.FC = () => {
     try {
       const myReview = appraisal.reviews[0];
 
-      // Save or update each rating
-      for (const [criterion, data] of Object.entries(ratings)) {
-        if (data.rating) {
+      // Save the whole scorecard in one request
+      const entries = Object.entries(ratings)
+        .filter(([, data]) => data.rating)
+        .map(([criterion, data]) => {
           // Find category for this criterion
           let category: 'WORK_EFFICIENCY' | 'PRODUCTIVITY' | 'PERSONAL' = 'WORK_EFFICIENCY';
           if (COMPETENCY_CRITERIA.PRODUCTIVITY.includes(criterion)) {
@@ -116,14 +128,19 @@ const AppraisalDetailPage: React.FC = () => {
             category = 'PERSONAL';
           }
 
-          await appraisalService.createRating({
-            appraisal_review: myReview.id,
+          return {
             category,
             criterion_name: criterion,
             rating: data.rating as 1 | 2 | 3 | 4 | 5,
             comments: data.comments || '',
-          });
-        }
+          };
+        });
+
+      if (entries.length > 0) {
+        await appraisalService.bulkUpsertRatings({
+          appraisal_review: myReview.id,
+          ratings: entries,
+        });
       }
 
       await loadAppraisal();
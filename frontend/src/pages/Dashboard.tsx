@@ -1,9 +1,18 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { useAuth } from '../context/AuthContext';
+import { dashboardService } from '../services/dashboardService';
+import { DashboardSummary } from '../types';
 import './Dashboard.css';
 
 const Dashboard: React.FC = () => {
   const { user } = useAuth();
+  const [summary, setSummary] = useState<DashboardSummary | null>(null);
+
+  useEffect(() => {
+    dashboardService.getSummary().then(setSummary).catch(() => setSummary(null));
+  }, []);
+
+  const stat = (value: number | undefined) => (value === undefined ? 'Loading...' : value);
 
   return (
     <div className="dashboard">
@@ -26,16 +35,24 @@ const Dashboard: React.FC = () => {
           <div className="dashboard-card">
             <h3>Quick Stats</h3>
             <div className="stats-info">
-              <p>My Projects: <strong>Loading...</strong></p>
-              <p>Pending Appraisals: <strong>Loading...</strong></p>
-              <p>Completed Appraisals: <strong>Loading...</strong></p>
+              <p>My Projects: <strong>{stat(summary?.counts.projects)}</strong></p>
+              <p>Pending Reviews: <strong>{stat(summary?.counts.pending_reviews)}</strong></p>
+              <p>Completed Appraisals: <strong>{stat(summary?.counts.appraisals.COMPLETED)}</strong></p>
             </div>
           </div>
 
           <div className="dashboard-card">
             <h3>Recent Activity</h3>
             <div className="activity-info">
-              <p>No recent activity</p>
+              {summary && summary.pending_reviews.length > 0 ? (
+                summary.pending_reviews.map((review) => (
+                  <p key={review.id}>
+                    Review {review.appraisee_name} ({review.project_name}) by {review.period_end}
+                  </p>
+                ))
+              ) : (
+                <p>No recent activity</p>
+              )}
             </div>
           </div>
         </div>
@@ -4,7 +4,9 @@ import {
   AppraisalCreate,
   AppraisalCycle,
   AppraisalReview,
+  AppraisalWorkspace,
   CompetencyRating,
+  CompetencyRatingBulkUpsert,
   OverallEvaluation,
 } from '../types';
 
@@ -22,12 +24,24 @@ export const appraisalService = {
 
   // Appraisals
   async getAppraisals(): Promise<Appraisal[]> {
-    const response = await api.get<Appraisal[]>('/appraisals/');
+    // The list only shows summary fields; skip the nested review tree
+    const response = await api.get<Appraisal[]>('/appraisals/', {
+      params: {
+        fields: 'id,appraisee_name,project_name,cycle_info,discussion_date,status,reviews.id',
+      },
+    });
     return response.data;
   },
 
   async getAppraisal(id: number): Promise<Appraisal> {
-    const response = await api.get<Appraisal>(`/appraisals/${id}/`);
+    const response = await api.get<Appraisal>(`/appraisals/${id}/`, {
+      params: { expand: 'reviews.competency_ratings,overall_evaluation' },
+    });
+    return response.data;
+  },
+
+  async getWorkspace(id: number): Promise<AppraisalWorkspace> {
+    const response = await api.get<AppraisalWorkspace>(`/appraisals/${id}/workspace/`);
     return response.data;
   },
 
@@ -78,6 +92,11 @@ export const appraisalService = {
     return response.data;
   },
 
+  async bulkUpsertRatings(data: CompetencyRatingBulkUpsert): Promise<CompetencyRating[]> {
+    const response = await api.post<CompetencyRating[]>('/competency-ratings/bulk-upsert/', data);
+    return response.data;
+  },
+
   async updateRating(id: number, data: Partial<CompetencyRating>): Promise<CompetencyRating> {
     const response = await api.patch<CompetencyRating>(`/competency-ratings/${id}/`, data);
     return response.data;
@@ -87,6 +106,12 @@ export const appraisalService = {
     await api.delete(`/competency-ratings/${id}/`);
   },
 
+  // Signatures are served by URL; fetch with auth and hand back an object URL
+  async getSignatureImage(url: string): Promise<string> {
+    const response = await api.get<Blob>(url, { responseType: 'blob' });
+    return URL.createObjectURL(response.data);
+  },
+
   // Overall Evaluations
   async getOverallEvaluation(appraisalId: number): Promise<OverallEvaluation | null> {
     try {
@@ -0,0 +1,9 @@
+import api from './api';
+import { DashboardSummary } from '../types';
+
+export const dashboardService = {
+  async getSummary(): Promise<DashboardSummary> {
+    const response = await api.get<DashboardSummary>('/dashboard/');
+    return response.data;
+  },
+};
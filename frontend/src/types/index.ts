@@ -56,6 +56,11 @@ export interface AppraisalCycle {
   period_start: string;
   period_end: string;
   status: 'DRAFT' | 'ACTIVE' | 'CLOSED';
+  // Appraisals by status, kept up to date by the server
+  appraisals_pending: number;
+  appraisals_in_progress: number;
+  appraisals_completed: number;
+  appraisals_finalized: number;
   created_at: string;
   updated_at: string;
 }
@@ -72,6 +77,11 @@ export interface CompetencyRating {
   created_at: string;
 }
 
+export interface CompetencyRatingBulkUpsert {
+  appraisal_review: number;
+  ratings: Pick<CompetencyRating, 'category' | 'criterion_name' | 'rating' | 'comments'>[];
+}
+
 // Appraisal Review types
 export interface AppraisalReview {
   id: number;
@@ -79,13 +89,18 @@ export interface AppraisalReview {
   reviewer: number;
   reviewer_name: string;
   is_completed: boolean;
-  reviewer_signature_base64: string;
+  reviewer_signature_base64?: string;
+  reviewer_signature_url: string | null;
   reviewer_signed_at: string | null;
-  competency_ratings: CompetencyRating[];
+  competency_ratings?: CompetencyRating[];
   created_at: string;
   updated_at: string;
 }
 
+export interface WorkspaceReview extends Omit<AppraisalReview, 'competency_ratings'> {
+  ratings: Record<CompetencyRating['category'], CompetencyRating[]>;
+}
+
 // Overall Evaluation types
 export interface OverallEvaluation {
   id: number;
@@ -94,9 +109,11 @@ export interface OverallEvaluation {
   ready_for_advanced_work: boolean;
   ready_for_promotion: boolean;
   summary_comment: string;
-  appraisee_signature_base64: string;
+  appraisee_signature_base64?: string;
+  appraisee_signature_url: string | null;
   appraisee_signed_at: string | null;
-  hr_signature_base64: string;
+  hr_signature_base64?: string;
+  hr_signature_url: string | null;
   hr_signed_at: string | null;
   finalized_at: string | null;
   created_at: string;
@@ -117,19 +134,60 @@ export interface Appraisal {
   project: number;
   project_name: string;
   discussion_date: string | null;
+  // Derived from the review counters; read-only
   status: 'PENDING' | 'IN_PROGRESS' | 'COMPLETED';
-  reviews: AppraisalReview[];
-  overall_evaluation: OverallEvaluation | null;
+  reviews_total: number;
+  reviews_completed: number;
+  // Only present when requested with ?expand=
+  reviews?: AppraisalReview[];
+  overall_evaluation?: OverallEvaluation | null;
   created_at: string;
   updated_at: string;
 }
 
+export interface AppraisalWorkspace {
+  appraisal: Appraisal;
+  reviews: WorkspaceReview[];
+  overall_evaluation: OverallEvaluation | null;
+  permissions: {
+    role: 'REPORTER' | 'MEMBER' | null;
+    is_appraisee: boolean;
+    my_review: number | null;
+    editable_reviews: number[];
+    can_edit_evaluation: boolean;
+  };
+}
+
+// Dashboard types
+export interface PendingReview {
+  id: number;
+  appraisal: number;
+  appraisee: number;
+  appraisee_name: string;
+  project_name: string;
+  cycle: number;
+  period_end: string;
+  appraisal_status: Appraisal['status'];
+  updated_at: string;
+}
+
+export interface DashboardSummary {
+  user: User;
+  active_cycles: AppraisalCycle[];
+  pending_reviews: PendingReview[];
+  my_appraisals: Appraisal[];
+  counts: {
+    projects: number;
+    pending_reviews: number;
+    appraisals: Record<Appraisal['status'], number>;
+  };
+}
+
 export interface AppraisalCreate {
   cycle: number;
   appraisee: number;
   project: number;
   discussion_date: string;
-  status?: 'PENDING' | 'IN_PROGRESS' | 'COMPLETED';
 }
 
 // Auth types